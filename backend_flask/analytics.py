@@ -0,0 +1,147 @@
+from datetime import datetime
+
+
+# Class / teacher attendance analytics.
+#
+# load_analytics() pulls three column sets for the selected sessions: the
+# sessions, the students of their classes and the (student, session) pairs
+# marked PRESENT. compute_analytics() turns them into a students x sessions
+# presence matrix plus an "expected" mask (a student is expected at a
+# session of their class) and reads every rate off row, column and day sums,
+# so 500 students x 200 sessions is a handful of NumPy reductions instead of
+# one report per student.
+#
+# Only sessions that have expired are counted; a running session would
+# otherwise show everyone who hasn't scanned yet as absent.
+
+
+def _percentage(present, expected):
+    import numpy as np
+    return np.where(expected > 0, present / np.maximum(expected, 1) * 100, 0.0)
+
+
+def load_analytics(cur, class_name=None, teacher_id=None, start=None, end=None, now=None):
+    where = ['se.expiry_time <= %s']
+    params = [now or datetime.now()]
+    if class_name is not None:
+        where.append('se.class = %s')
+        params.append(class_name)
+    if teacher_id is not None:
+        where.append('se.created_by = %s')
+        params.append(teacher_id)
+    if start is not None:
+        where.append('se.expiry_time >= %s')
+        params.append(start)
+    if end is not None:
+        where.append('se.expiry_time < %s')
+        params.append(end)
+    where = ' AND '.join(where)
+
+    cur.execute(f"""
+        SELECT se.id, se.session_name, se.expiry_time, se.class
+        FROM session se
+        WHERE {where}
+        ORDER BY se.expiry_time, se.id
+    """, params)
+    sessions = cur.fetchall()
+    if not sessions:
+        return sessions, (), ()
+    classes = sorted({row[3] for row in sessions})
+    cur.execute(f"""
+        SELECT id, name, class FROM student
+        WHERE class IN ({', '.join(['%s'] * len(classes))})
+        ORDER BY id
+    """, classes)
+    students = cur.fetchall()
+    cur.execute(f"""
+        SELECT a.student_id, a.session_id
+        FROM attendance a
+        JOIN session se ON se.id = a.session_id
+        WHERE {where} AND a.status = 'PRESENT'
+    """, params)
+    present = cur.fetchall()
+    return sessions, students, present
+
+
+# sessions: (id, session_name, expiry_time, class)
+# students: (id, name, class)
+# present:  (student_id, session_id) marked PRESENT
+def compute_analytics(sessions, students, present, threshold=75.0):
+    # Imported on first use: NumPy is slow to load and only this report needs it
+    import numpy as np
+    session_ids = np.array([row[0] for row in sessions], dtype=np.int64)
+    student_ids = np.array([row[0] for row in students], dtype=np.int64)
+    session_classes = np.array([row[3] for row in sessions], dtype=object)
+    student_classes = np.array([row[2] for row in students], dtype=object)
+
+    # expected[i, j]: student i belongs to the class of session j
+    class_codes = {name: code for code, name in enumerate(sorted(set(session_classes) | set(student_classes)))}
+    expected = (np.array([class_codes[c] for c in student_classes], dtype=np.int64)[:, None] ==
+                np.array([class_codes[c] for c in session_classes], dtype=np.int64)[None, :])
+
+    marked = np.zeros(expected.shape, dtype=bool)
+    if len(present) and len(students) and len(sessions):
+        pairs = np.array(present, dtype=np.int64).reshape(-1, 2)
+        student_order = np.argsort(student_ids)
+        session_order = np.argsort(session_ids)
+        rows = np.searchsorted(student_ids, pairs[:, 0], sorter=student_order)
+        cols = np.searchsorted(session_ids, pairs[:, 1], sorter=session_order)
+        rows = np.minimum(rows, len(student_ids) - 1)
+        cols = np.minimum(cols, len(session_ids) - 1)
+        rows, cols = student_order[rows], session_order[cols]
+        # Drop pairs for students no longer in the class
+        known = (student_ids[rows] == pairs[:, 0]) & (session_ids[cols] == pairs[:, 1])
+        marked[rows[known], cols[known]] = True
+    marked &= expected
+
+    student_present = marked.sum(axis=1)
+    student_expected = expected.sum(axis=1)
+    student_rate = _percentage(student_present, student_expected)
+    session_present = marked.sum(axis=0)
+    session_expected = expected.sum(axis=0)
+    session_rate = _percentage(session_present, session_expected)
+
+    dates = np.array([row[2].date().isoformat() for row in sessions], dtype=object)
+    days = sorted(set(dates))
+    day_index = np.searchsorted(np.array(days, dtype=object), dates) if len(dates) else np.array([], dtype=np.int64)
+    day_present = np.bincount(day_index, weights=session_present, minlength=len(days))
+    day_expected = np.bincount(day_index, weights=session_expected, minlength=len(days))
+    day_rate = _percentage(day_present, day_expected)
+
+    student_items = [{
+        'id': int(student_ids[i]),
+        'name': students[i][1],
+        'class': students[i][2],
+        'present_count': int(student_present[i]),
+        'total_session': int(student_expected[i]),
+        'attendance_percentage': round(float(student_rate[i]), 2),
+    } for i in range(len(students))]
+    at_risk_order = np.argsort(student_rate, kind='stable')
+    at_risk = [student_items[i] for i in at_risk_order
+               if student_expected[i] > 0 and student_rate[i] < threshold]
+
+    total_present = int(student_present.sum())
+    total_expected = int(student_expected.sum())
+    return {
+        'session_count': len(sessions),
+        'student_count': len(students),
+        'attendance_percentage': round(float(_percentage(total_present, total_expected)), 2),
+        'threshold': threshold,
+        'students': student_items,
+        'sessions': [{
+            'id': int(session_ids[j]),
+            'session_name': sessions[j][1],
+            'class': sessions[j][3],
+            'expiry_time': sessions[j][2].strftime('%Y-%m-%d %H:%M:%S'),
+            'present_count': int(session_present[j]),
+            'expected_count': int(session_expected[j]),
+            'attendance_percentage': round(float(session_rate[j]), 2),
+        } for j in range(len(sessions))],
+        'days': [{
+            'date': day,
+            'present_count': int(day_present[k]),
+            'expected_count': int(day_expected[k]),
+            'attendance_percentage': round(float(day_rate[k]), 2),
+        } for k, day in enumerate(days)],
+        'at_risk': at_risk,
+    }
@@ -1,38 +1,321 @@
-from flask import Flask, request, jsonify
-from flask_mysqldb import MySQL
+from flask import Blueprint, Flask, Response, current_app, jsonify, request
 from flask_cors import CORS
-from geopy.distance import geodesic
+from werkzeug.local import LocalProxy
 from werkzeug.utils import secure_filename
-import pandas as pd
 import os
-import qrcode
-import io
 import base64
+import hmac
+from types import SimpleNamespace
 from datetime import datetime, timedelta
-import uuid # For generating unique session codes
 import MySQLdb # For specific error handling
+import MySQLdb.cursors
+from db_pool import PooledMySQL
+from sqlite_store import PooledSQLite
+from auth import RoleAuthorizer
+from attendance_writer import AttendanceBatchWriter, ER_DUP_ENTRY, ER_NO_REFERENCED_ROW
+from session_cache import SessionCache
+from geofence import GeofenceRegistry
+from pagination import parse_limit, parse_page_args
+from streaming import STREAM_FORMATS, stream_rows
+from student_import import IMPORT_MODES, REQUIRED_COLUMNS, StudentImporter, import_totals
+from roster_reader import roster_extension, read_roster
+from qr_cache import QRImageCache
+from qr_tokens import QRTokenSigner
+from finalize import finalize_sessions
+from finalize_scheduler import FinalizeScheduler
+from roll_call import record_roll_call
+from timetable import expand_rule, insert_sessions, new_session_code
+from analytics import compute_analytics, load_analytics
+from metrics import RequestMetrics
+from summary import add_to_summary, clear_student, student_summary, subtract_session, subtract_sessions_created_by
 
-app = Flask(__name__)
-CORS(app)
-
-# MySQL config
-app.config['MYSQL_HOST'] = '127.0.0.1'
-app.config['MYSQL_USER'] = 'root'
-app.config['MYSQL_PASSWORD'] = '6296930416'
-app.config['MYSQL_DB'] = 'attendance_app'
-
-mysql = MySQL(app)
+bp = Blueprint('api', __name__)
 
 # Example: Allowed location (your campus)
 ALLOWED_LOCATION = (20.2961, 85.8245)  # lat, lng
 ALLOWED_RADIUS = 0.1  # in km
 
+
+def load_config(app):
+    # Storage backend: 'mysql' (below), or 'sqlite' for a single-node site,
+    # an embedded database file in WAL mode (see sqlite_store.py)
+    app.config['STORAGE_BACKEND'] = os.environ.get('STORAGE_BACKEND', 'mysql')
+    app.config['SQLITE_PATH'] = os.environ.get('SQLITE_PATH', 'attendance.db')
+    app.config['SQLITE_BUSY_TIMEOUT'] = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))  # seconds a writer waits for the lock
+    app.config['SQLITE_CACHE_MB'] = int(os.environ.get('SQLITE_CACHE_MB', 64))  # page cache per connection
+    app.config['SQLITE_MMAP_MB'] = int(os.environ.get('SQLITE_MMAP_MB', 256))
+
+    # MySQL config
+    app.config['MYSQL_HOST'] = os.environ.get('MYSQL_HOST', '127.0.0.1')
+    app.config['MYSQL_PORT'] = int(os.environ.get('MYSQL_PORT', 3306))
+    app.config['MYSQL_USER'] = os.environ.get('MYSQL_USER', 'root')
+    app.config['MYSQL_PASSWORD'] = os.environ.get('MYSQL_PASSWORD', '6296930416')
+    app.config['MYSQL_DB'] = os.environ.get('MYSQL_DB', 'attendance_app')
+
+    # Connection pool config (connections are reused across requests)
+    app.config['MYSQL_POOL_SIZE'] = int(os.environ.get('MYSQL_POOL_SIZE', 10))
+    app.config['MYSQL_POOL_TIMEOUT'] = float(os.environ.get('MYSQL_POOL_TIMEOUT', 5))
+    app.config['MYSQL_POOL_MAX_IDLE'] = float(os.environ.get('MYSQL_POOL_MAX_IDLE', 300))
+    app.config['MYSQL_POOL_PING_INTERVAL'] = float(os.environ.get('MYSQL_POOL_PING_INTERVAL', 30))
+
+    # Cached role lookups for authorization checks
+    app.config['ROLE_CACHE_SIZE'] = int(os.environ.get('ROLE_CACHE_SIZE', 10000))
+    app.config['ROLE_CACHE_TTL'] = float(os.environ.get('ROLE_CACHE_TTL', 60))
+
+    # Batched attendance writes: scans are queued and flushed as multi-row inserts
+    # (opt-in with MySQL; on by default with SQLite, where every commit takes
+    # the one write lock). None: decided by create_app() for the backend in use
+    batch_writes = os.environ.get('ATTENDANCE_BATCH_WRITES')
+    app.config['ATTENDANCE_BATCH_WRITES'] = None if batch_writes is None else batch_writes == '1'
+    app.config['ATTENDANCE_BATCH_SIZE'] = int(os.environ.get('ATTENDANCE_BATCH_SIZE', 200))  # flush at this many queued scans
+    app.config['ATTENDANCE_BATCH_DELAY'] = float(os.environ.get('ATTENDANCE_BATCH_DELAY', 0.05))  # or after this many seconds
+    app.config['ATTENDANCE_BATCH_TIMEOUT'] = float(os.environ.get('ATTENDANCE_BATCH_TIMEOUT', 5))  # max wait for a verdict
+
+    # Session metadata cache for the attendance hot path
+    app.config['SESSION_CACHE_SIZE'] = int(os.environ.get('SESSION_CACHE_SIZE', 10000))
+    app.config['SESSION_CACHE_GRACE'] = float(os.environ.get('SESSION_CACHE_GRACE', 300))  # seconds kept after expiry_time
+
+    # Rendered QR images, keyed by payload and bounded by total PNG size
+    app.config['QR_CACHE_BYTES'] = int(os.environ.get('QR_CACHE_BYTES', 32*1024*1024))
+    # Whenever a QR is served, render the next token window's image in the
+    # background, so the page's refresh at the rotation is a cache hit
+    app.config['QR_PRERENDER'] = os.environ.get('QR_PRERENDER', '1') == '1'
+
+    # Rotating signed tokens in the QR code, checked by mark_attendance before
+    # any query. Every worker process must share QR_TOKEN_SECRET, so it is
+    # required while the checks are on.
+    app.config['QR_TOKEN_SECRET'] = os.environ.get('QR_TOKEN_SECRET')
+    app.config['QR_TOKEN_WINDOW'] = int(os.environ.get('QR_TOKEN_WINDOW', 30))  # seconds per token
+    app.config['QR_TOKEN_GRACE'] = int(os.environ.get('QR_TOKEN_GRACE', 1))  # previous windows still accepted
+    # '1': scans must carry a valid token; '0': tokens are not checked at all
+    # (QR codes still include one, signed with a per-process random key when
+    # QR_TOKEN_SECRET is unset)
+    app.config['QR_TOKEN_REQUIRED'] = os.environ.get('QR_TOKEN_REQUIRED', '1') == '1'
+
+    # Finalization: sessions per INSERT ... SELECT statement, and per request
+    app.config['FINALIZE_BATCH_SIZE'] = int(os.environ.get('FINALIZE_BATCH_SIZE', 200))
+    app.config['FINALIZE_MAX_SESSIONS'] = int(os.environ.get('FINALIZE_MAX_SESSIONS', 1000))
+
+    # Timetables: rules and sessions per /add_timetable request, and rows per
+    # multi-row insert (rules are capped before they are expanded)
+    app.config['TIMETABLE_MAX_RULES'] = int(os.environ.get('TIMETABLE_MAX_RULES', 50))
+    app.config['TIMETABLE_MAX_SESSIONS'] = int(os.environ.get('TIMETABLE_MAX_SESSIONS', 5000))
+    app.config['TIMETABLE_INSERT_CHUNK'] = int(os.environ.get('TIMETABLE_INSERT_CHUNK', 500))
+
+    # Bulk roll call: students per /roll_call request
+    app.config['ROLL_CALL_MAX_STUDENTS'] = int(os.environ.get('ROLL_CALL_MAX_STUDENTS', 1000))
+
+    # Automatic finalization of expired sessions by a background thread
+    app.config['FINALIZE_SCHEDULER'] = os.environ.get('FINALIZE_SCHEDULER', '1') == '1'
+    app.config['FINALIZE_DELAY'] = float(os.environ.get('FINALIZE_DELAY', 60))  # seconds after expiry_time
+    app.config['FINALIZE_RELOAD_INTERVAL'] = float(os.environ.get('FINALIZE_RELOAD_INTERVAL', 300))  # look for new sessions
+    app.config['FINALIZE_LOOKBACK_HOURS'] = float(os.environ.get('FINALIZE_LOOKBACK_HOURS', 24))  # expired sessions picked up at startup
+
+    # Background threads (finalize scheduler) start in create_app(); a
+    # preforking server turns this off and starts them in each worker instead.
+    # Only one process's scheduler works at a time (a leader lock in the database)
+    app.config['START_BACKGROUND_TASKS'] = os.environ.get('START_BACKGROUND_TASKS', '1') == '1'
+
+    # Request/query instrumentation, scraped from /metrics (Prometheus text
+    # format). Scrapers must send `Authorization: Bearer <METRICS_TOKEN>`;
+    # without a token /metrics is off. (The peer address can't tell: behind
+    # a reverse proxy on this host every client is 127.0.0.1.)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Students below this attendance percentage are listed as at risk by /class_analytics
+    app.config['AT_RISK_THRESHOLD'] = float(os.environ.get('AT_RISK_THRESHOLD', 75))
+
+    # Page sizes for the list endpoints (keyset pagination with ?after_id=&limit=)
+    app.config['DEFAULT_PAGE_LIMIT'] = int(os.environ.get('DEFAULT_PAGE_LIMIT', 100))
+    app.config['MAX_PAGE_LIMIT'] = int(os.environ.get('MAX_PAGE_LIMIT', 1000))
+
+    # Geofences: campuses per class/session from a JSON file (see geofence.py),
+    # or just the allowed location above
+    app.config['GEOFENCE_CONFIG'] = os.environ.get('GEOFENCE_CONFIG')
+
+    # bulk student import: file upload (parsed in memory, never saved to disk)
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16*1024*1024)) #16mb
+    app.config['IMPORT_CHUNK_SIZE'] = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))  # rows per parse chunk and INSERT batch/commit
+    app.config['IMPORT_MAX_ERRORS'] = int(os.environ.get('IMPORT_MAX_ERRORS', 1000))  # rows listed in the error report
+
+
+# Shared components used by the routes. create_app() builds a set per app and
+# keeps it in app.extensions['attendance']; the names below look them up
+# through current_app, so several apps can live in one process (tests,
+# benchmarks) without sharing pools, caches or threads.
+def components(app=None):
+    return (app or current_app).extensions['attendance']
+
+
+def _component(name):
+    return LocalProxy(lambda: getattr(components(), name))
+
+
+mysql = _component('mysql')
+authz = _component('authz')
+attendance_writer = _component('attendance_writer')
+sessions = _component('sessions')
+qr_images = _component('qr_images')
+qr_tokens = _component('qr_tokens')
+finalize_scheduler = _component('finalize_scheduler')
+geofences = _component('geofences')
+metrics = _component('metrics')
+
+
+def create_app(config=None):
+    app = Flask(__name__)
+    CORS(app, expose_headers=['X-Total-Count'])
+    load_config(app)
+    if config:
+        app.config.update(config)
+
+    if app.config['ATTENDANCE_BATCH_WRITES'] is None:
+        app.config['ATTENDANCE_BATCH_WRITES'] = app.config['STORAGE_BACKEND'] == 'sqlite'
+
+    # Every route goes through mysql.connection, whichever backend is behind it
+    if app.config['STORAGE_BACKEND'] == 'sqlite':
+        mysql = PooledSQLite(app)
+    elif app.config['STORAGE_BACKEND'] == 'mysql':
+        mysql = PooledMySQL(app)
+    else:
+        raise ValueError(f"STORAGE_BACKEND must be 'mysql' or 'sqlite', not {app.config['STORAGE_BACKEND']!r}")
+    authz = RoleAuthorizer(maxsize=app.config['ROLE_CACHE_SIZE'], ttl=app.config['ROLE_CACHE_TTL'])
+    attendance_writer = AttendanceBatchWriter(
+        mysql.connector(app.config),
+        max_batch=app.config['ATTENDANCE_BATCH_SIZE'],
+        max_delay=app.config['ATTENDANCE_BATCH_DELAY'],
+        logger=app.logger,
+    )
+    sessions = SessionCache(maxsize=app.config['SESSION_CACHE_SIZE'], grace=app.config['SESSION_CACHE_GRACE'])
+    qr_images = QRImageCache(max_bytes=app.config['QR_CACHE_BYTES'], logger=app.logger)
+    if app.config['QR_TOKEN_SECRET']:
+        qr_tokens = QRTokenSigner(app.config['QR_TOKEN_SECRET'], window=app.config['QR_TOKEN_WINDOW'],
+                                  grace=app.config['QR_TOKEN_GRACE'])
+    elif app.config['QR_TOKEN_REQUIRED']:
+        # A worker could not verify tokens signed by another worker's key
+        raise RuntimeError("QR_TOKEN_SECRET must be set while QR_TOKEN_REQUIRED is on.")
+    else:
+        qr_tokens = QRTokenSigner.with_random_secret(window=app.config['QR_TOKEN_WINDOW'],
+                                                     grace=app.config['QR_TOKEN_GRACE'])
+    finalize_scheduler = FinalizeScheduler(
+        mysql.connector(app.config),
+        delay=app.config['FINALIZE_DELAY'],
+        batch_size=app.config['FINALIZE_BATCH_SIZE'],
+        reload_interval=app.config['FINALIZE_RELOAD_INTERVAL'],
+        lookback=timedelta(hours=app.config['FINALIZE_LOOKBACK_HOURS']),
+        lead=mysql.leader_lock(app.config, 'finalize_scheduler'),
+        logger=app.logger,
+    )
+    if app.config['GEOFENCE_CONFIG']:
+        geofences = GeofenceRegistry.from_file(app.config['GEOFENCE_CONFIG'])
+    else:
+        geofences = GeofenceRegistry.single(ALLOWED_LOCATION[0], ALLOWED_LOCATION[1], ALLOWED_RADIUS)
+
+    metrics = RequestMetrics()
+    if app.config['METRICS_ENABLED']:
+        metrics.init_app(app)
+        mysql.wrap_connection = metrics.wrap_connection
+    metrics.add_collector('db_pool', lambda: mysql.pool.stats() if mysql.pool else {})
+    metrics.add_collector('role_cache', authz.stats)
+    metrics.add_collector('session_cache', sessions.stats)
+    metrics.add_collector('batch_writer', attendance_writer.stats)
+    metrics.add_collector('roster_import', import_totals)
+    metrics.add_collector('finalize_scheduler', finalize_scheduler.stats)
+    metrics.add_collector('qr_cache', qr_images.stats)
+    metrics.add_collector('qr_tokens', qr_tokens.stats)
+
+    app.extensions['attendance'] = SimpleNamespace(
+        mysql=mysql, authz=authz, attendance_writer=attendance_writer, sessions=sessions, qr_images=qr_images,
+        qr_tokens=qr_tokens, finalize_scheduler=finalize_scheduler, geofences=geofences, metrics=metrics)
+    app.register_blueprint(bp)
+    if app.config['START_BACKGROUND_TASKS']:
+        start_background_tasks(app)
+    return app
+
+
+def start_background_tasks(app):
+    if app.config['FINALIZE_SCHEDULER']:
+        components(app).finalize_scheduler.start()
+
+
+# For preforking servers (see gunicorn.conf.py): the app is created once in
+# the parent and each worker calls this right after fork(). Connections and
+# threads don't survive a fork, so the worker gets its own pool and starts
+# its own background threads; the finalize schedulers elect one of the
+# workers to do the work.
+def after_fork(app):
+    components(app).mysql.reset()
+    start_background_tasks(app)
+
+
+# What a session's QR code encodes
+def qr_payload(session_id, session_code, expiry_time, token):
+    return str({
+        'session_id': session_id,
+        'session_code': session_code,
+        'expiry_time': expiry_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'token': token
+    })
+
+
+# The token (and so the image) changes every QR_TOKEN_WINDOW seconds; render
+# the next one now so the refresh at the rotation doesn't wait for it.
+def prerender_next_qr(session):
+    if current_app.config['QR_PRERENDER']:
+        qr_images.prerender(qr_payload(session.id, session.session_code, session.expiry_time,
+                                       qr_tokens.upcoming(session.id)))
+
+
+# Load a session for QR generation and check that the requesting user created
+# it or is an ADMIN. Returns (session, None) or (None, error response).
+def load_qr_session(cur, session_id, requesting_user_id):
+    session = sessions.load(cur, session_id)
+    if not session:
+        return None, (jsonify({'message': 'Session not found.'}), 404)
+    user_role = authz.get_role(cur, requesting_user_id)
+    if not user_role:
+        return None, (jsonify({'message': 'Requesting user not found.'}), 404)
+    if datetime.now() > session.expiry_time:
+        current_app.logger.info(f"Generating QR for expired session ID: {session_id}")
+    if requesting_user_id != session.created_by and user_role != 'ADMIN':
+        return None, (jsonify({'message': 'Not authorized to generate QR for this session.'}), 403)
+    return session, None
+
+
+# Selectable fields (?fields=) of the list endpoints and their columns
+STUDENT_COLUMNS = {'id': 'id', 'name': 'name', 'class': 'class', 'email': 'email', 'phone': 'phone'}
+SESSION_COLUMNS = {'id': 's.id', 'session_name': 's.session_name', 'session_code': 's.session_code',
+                   'expiry_time': 's.expiry_time', 'created_by': 's.created_by', 'created_by_name': 'u.name',
+                   'class': 's.class'}
+TEACHER_COLUMNS = {'id': 'id', 'name': 'name', 'email': 'email', 'phone': 'phone', 'role': 'role'}
+
+
+def page_args(columns):
+    return parse_page_args(request.args, columns, current_app.config['DEFAULT_PAGE_LIMIT'], current_app.config['MAX_PAGE_LIMIT'])
+
+
+# Response format of the list/report endpoints: 'json' (default) or a
+# streaming export format (?format=ndjson or ?format=csv)
+def response_format():
+    fmt = request.args.get('format', 'json')
+    if fmt != 'json' and fmt not in STREAM_FORMATS:
+        raise ValueError(f"format must be one of: json, {', '.join(STREAM_FORMATS)}.")
+    return fmt
+
+
+# Server-side (unbuffered) cursor for streaming exports: rows are read from
+# MySQL as the response is written instead of being fetched all at once.
+def streaming_cursor():
+    return mysql.connection.cursor(MySQLdb.cursors.SSCursor)
+
+
 # ================================
 #  API Routes
 # ================================
 
 # Add Student
-@app.route('/add_student', methods=['POST'])
+@bp.route('/add_student', methods=['POST'])
 def add_student():
     data = request.get_json()
 
@@ -64,10 +347,7 @@ def add_student():
         cur = mysql.connection.cursor()
 
         # Authorization check
-        cur.execute("SELECT role FROM user WHERE id = %s", (requesting_user_id,))
-        user_role_result = cur.fetchone()
-
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, requesting_user_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to add students.'}), 403
 
         # Check if student ID already exists
@@ -79,7 +359,7 @@ def add_student():
                     (student_id, name, class_name, email, phone))
         mysql.connection.commit()
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in add_student: {e}")
+        current_app.logger.error(f"Database error in add_student: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to add student due to a database error.'}), 500
     finally:
@@ -89,7 +369,7 @@ def add_student():
     return jsonify({'message': 'Student added successfully!'}), 201
 
 # add session
-@app.route('/add_session', methods=['POST'])
+@bp.route('/add_session', methods=['POST'])
 def add_session():
     data = request.get_json()
 
@@ -123,13 +403,12 @@ def add_session():
         cur = mysql.connection.cursor()
 
         # Authorization: Check if the creator is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (created_by,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, created_by, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to create sessions.'}), 403
 
-        # Auto-generate a unique session code based on timestamp
-        session_code = f"SESSION_{int(datetime.now().timestamp())}"
+        # Auto-generate a unique session code (a timestamp collides when two
+        # sessions are created in the same second)
+        session_code = new_session_code()
 
         # Insert into database (id will auto-increment)
         cur.execute("""
@@ -139,9 +418,13 @@ def add_session():
 
         mysql.connection.commit()
         session_id_server = cur.lastrowid  # Get the auto-generated id
+        expiry_time = datetime.strptime(expiry_time_str, '%Y-%m-%d %H:%M:%S')
+        sessions.put(session_id_server, session_code, expiry_time, int(created_by), class_name)
+        if current_app.config['FINALIZE_SCHEDULER']:
+            finalize_scheduler.schedule(session_id_server, expiry_time)
 
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in add_session: {e}")
+        current_app.logger.error(f"Database error in add_session: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to add session due to a database error.'}), 500
     finally:
@@ -155,8 +438,80 @@ def add_session():
     }), 201
 
 
+# Create a class's sessions for a whole term from recurrence rules (see
+# timetable.py) in one transaction, instead of one /add_session per lecture
+@bp.route('/add_timetable', methods=['POST'])
+def add_timetable():
+    data = request.get_json()
+    if not data:
+        return jsonify({"message": "Request payload is missing or not valid JSON."}), 400
+    created_by = data.get('created_by')
+    rules = data.get('rules')
+    if created_by is None or rules is None:
+        return jsonify({"message": "created_by and rules are required."}), 400
+    if not isinstance(rules, list) or not rules:
+        return jsonify({"message": "rules must be a non-empty list."}), 400
+    if len(rules) > current_app.config['TIMETABLE_MAX_RULES']:
+        return jsonify({"message": f"At most {current_app.config['TIMETABLE_MAX_RULES']} rules can be added at once."}), 400
+    try:
+        planned = []
+        for rule in rules:
+            planned.extend(expand_rule(rule))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    # Lectures that are already over are left out: they would be created
+    # expired and finalized at once, with every student marked ABSENT
+    now = datetime.now()
+    skipped_past = sum(1 for _, _, expiry_time in planned if expiry_time <= now)
+    planned = [session for session in planned if session[2] > now]
+    if not planned:
+        message = "All of the rules' dates are in the past." if skipped_past else "The rules don't match any dates."
+        return jsonify({"message": message}), 400
+    if len(planned) > current_app.config['TIMETABLE_MAX_SESSIONS']:
+        return jsonify({"message": f"The rules make {len(planned)} sessions; at most "
+                                   f"{current_app.config['TIMETABLE_MAX_SESSIONS']} can be added at once."}), 400
+
+    cur = None
+    try:
+        cur = mysql.connection.cursor()
+        if not authz.has_role(cur, created_by, ('ADMIN', 'TEACHER')):
+            return jsonify({'message': 'User not authorized to create sessions.'}), 403
+        created = insert_sessions(cur, planned, created_by, chunk_size=current_app.config['TIMETABLE_INSERT_CHUNK'])
+        mysql.connection.commit()
+    except MySQLdb.Error as e:
+        current_app.logger.error(f"Database error in add_timetable: {e}")
+        mysql.connection.rollback()
+        return jsonify({'message': 'Failed to add timetable due to a database error.'}), 500
+    finally:
+        if cur:
+            cur.close()
+
+    if current_app.config['FINALIZE_SCHEDULER']:
+        finalize_scheduler.schedule_many([(session_id, expiry_time) for (session_id, _), (_, _, expiry_time)
+                                          in zip(created, planned)])
+    # Only sessions expiring within a day go into the cache; the rest are
+    # loaded on first use rather than pushing out sessions being scanned now
+    soon = now + timedelta(days=1)
+    for (session_id, session_code), (_, class_name, expiry_time) in zip(created, planned):
+        if expiry_time <= soon:
+            sessions.put(session_id, session_code, expiry_time, int(created_by), class_name)
+
+    return jsonify({
+        "message": f"{len(created)} sessions added successfully!",
+        "session_count": len(created),
+        "skipped_past": skipped_past,
+        "sessions": [{
+            "session_id": session_id,
+            "session_code": session_code,
+            "session_name": session_name,
+            "class": class_name,
+            "expiry_time": expiry_time.strftime('%Y-%m-%d %H:%M:%S')
+        } for (session_id, session_code), (session_name, class_name, expiry_time) in zip(created, planned)]
+    }), 201
+
+
 # Generate QR Code
-@app.route('/generate_qr', methods=['POST'])
+@bp.route('/generate_qr', methods=['POST'])
 def generate_qr():
     data = request.get_json()
     if not data:
@@ -171,62 +526,84 @@ def generate_qr():
         requesting_user_id = int(requesting_user_id)
     except (ValueError, TypeError):
         return jsonify({'message': 'session_id and requesting_user_id must be integers.'}), 400
+    cur = None
     try:
         cur = mysql.connection.cursor()
-        # Fetch session details
-        cur.execute("""
-            SELECT session_code, expiry_time, created_by 
-            FROM session 
-            WHERE id = %s
-        """, (session_id,))
-        session = cur.fetchone()
-        # Check if session exists
-        if not session:
-            return jsonify({'message': 'Session not found.'}), 404
-        # Unpack session details
-        session_code, expiry_time, created_by = session
-        # Fetch requesting user's role
-        cur.execute("SELECT role FROM user WHERE id = %s", (requesting_user_id,))
-        user = cur.fetchone()
-        if not user:
-            return jsonify({'message': 'Requesting user not found.'}), 404
-        user_role = user[0]
-        # Check expiration
-        if datetime.now() > expiry_time:
-            app.logger.info(f"Generating QR for expired session ID: {session_id}")
-        # Authorization check
-        if requesting_user_id != created_by and user_role != 'ADMIN':
-            return jsonify({'message': 'Not authorized to generate QR for this session.'}), 403
-        # Prepare QR data
+        # Fetch the session and check the requesting user may generate its QR
+        session, error = load_qr_session(cur, session_id, requesting_user_id)
+        if error:
+            return error
+        session_code, expiry_time = session.session_code, session.expiry_time
         formatted_expiry_time = expiry_time.strftime('%Y-%m-%d %H:%M:%S')
-        qr_data = {
-            'session_id': session_id,
-            'session_code': session_code,
-            'expiry_time': formatted_expiry_time
-        }
-        # Generate QR
-        qr_img = qrcode.make(str(qr_data))
-        buffered = io.BytesIO()
-        qr_img.save(buffered, format="PNG")
-        qr_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+        # The token changes every QR_TOKEN_WINDOW seconds; the page should
+        # fetch a new QR when token_expires_in runs out
+        token = qr_tokens.issue(session_id)
+        token_expires_in = int(qr_tokens.seconds_left()) + 1
+        # Rendered once per payload and then served from the cache
+        _, qr_png = qr_images.get(qr_payload(session_id, session_code, expiry_time, token))
+        prerender_next_qr(session)
+        qr_base64 = base64.b64encode(qr_png).decode('utf-8')
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in generate_qr: {e}")
+        current_app.logger.error(f"Database error in generate_qr: {e}")
         return jsonify({'message': 'Failed to generate QR due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in generate_qr: {e}")
+        current_app.logger.error(f"Unexpected error in generate_qr: {e}")
         return jsonify({'message': 'An unexpected error occurred while generating QR code.'}), 500
     finally:
         if cur:
             cur.close()
     return jsonify({
         'qr_code': qr_base64,
+        'qr_url': f'/qr/{session_id}.png?requesting_user_id={requesting_user_id}',
         'session_id': session_id,
         'session_code': session_code,
-        'expiry_time': formatted_expiry_time
+        'expiry_time': formatted_expiry_time,
+        'token': token,
+        'token_expires_in': token_expires_in
     }), 200
 
+
+# QR code as a PNG image, for <img src> on the projector page. The ETag is the
+# payload hash, so refreshes are answered with 304 Not Modified.
+@bp.route('/qr/<int:session_id>.png', methods=['GET'])
+def get_qr_png(session_id):
+    requesting_user_id = request.args.get('requesting_user_id')
+    if not requesting_user_id:
+        return jsonify({'message': 'requesting_user_id is required.'}), 400
+    try:
+        requesting_user_id = int(requesting_user_id)
+    except ValueError:
+        return jsonify({'message': 'requesting_user_id must be an integer.'}), 400
+    cur = None
+    try:
+        cur = mysql.connection.cursor()
+        session, error = load_qr_session(cur, session_id, requesting_user_id)
+        if error:
+            return error
+        token = qr_tokens.issue(session_id)
+        token_expires_in = int(qr_tokens.seconds_left()) + 1
+        etag, qr_png = qr_images.get(qr_payload(session_id, session.session_code, session.expiry_time, token))
+        prerender_next_qr(session)
+    except MySQLdb.Error as e:
+        current_app.logger.error(f"Database error in get_qr_png: {e}")
+        return jsonify({'message': 'Failed to generate QR due to a database error.'}), 500
+    except Exception as e:
+        current_app.logger.error(f"Unexpected error in get_qr_png: {e}")
+        return jsonify({'message': 'An unexpected error occurred while generating QR code.'}), 500
+    finally:
+        if cur:
+            cur.close()
+    response = Response(qr_png, mimetype='image/png')
+    response.set_etag(etag)
+    # The image is per user (authorization) and only useful until its token
+    # rotates or the session expires, whichever comes first
+    response.cache_control.private = True
+    response.cache_control.max_age = max(0, min(token_expires_in,
+                                                int((session.expiry_time - datetime.now()).total_seconds())))
+    return response.make_conditional(request)
+
 # mark attendance
-@app.route('/mark_attendance', methods=['POST'])
+@bp.route('/mark_attendance', methods=['POST'])
 def mark_attendance():
     data = request.get_json()
     if not data:
@@ -235,6 +612,7 @@ def mark_attendance():
     session_id = data.get('session_id')
     lat = data.get('latitude')
     lng = data.get('longitude')
+    token = data.get('token')
     # Validate required fields
     if not all([student_id, session_id, lat, lng]):
         return jsonify({'message': 'Missing required fields in request.'}), 400
@@ -245,102 +623,195 @@ def mark_attendance():
         lng = float(lng)
     except (ValueError, TypeError):
         return jsonify({'message': 'Invalid data type for student_id, session_id, latitude, or longitude.'}), 400
+    # Check the QR token (signature and time window) before touching the database
+    reason = qr_tokens.verify(token, session_id) if current_app.config['QR_TOKEN_REQUIRED'] else None
+    if reason == 'missing':
+        return jsonify({'message': 'Missing QR token, please scan the QR code again.', 'status': 'invalid_token'}), 403
+    elif reason == 'expired':
+        return jsonify({'message': 'QR code has expired, please scan the current one.', 'status': 'expired_token'}), 403
+    elif reason:
+        return jsonify({'message': 'Invalid QR token.', 'status': 'invalid_token'}), 403
     cur = None
     current_time = datetime.now()
     try:
-        cur = mysql.connection.cursor()
-        # Check session existence and expiry
-        cur.execute("SELECT expiry_time FROM session WHERE id = %s", (session_id,))
-        result = cur.fetchone()
-        if not result:
+        # Check session existence and expiry (no query when the session is cached)
+        session = sessions.get(session_id)
+        if session is None:
+            cur = mysql.connection.cursor()
+            session = sessions.load(cur, session_id)
+        if not session:
             return jsonify({'message': 'Invalid session ID.'}), 400
-        expiry_time = result[0]
+        expiry_time = session.expiry_time
         if current_time > expiry_time:
             status = 'ABSENT'
         else:
-            # Compare student's location to default allowed location
-            user_location = (lat, lng)
-            distance_km = geodesic(ALLOWED_LOCATION, user_location).km
-            status = 'PRESENT' if distance_km <= ALLOWED_RADIUS else 'ABSENT'
-        # Check if attendance already marked for this student and session
-        cur.execute("SELECT id FROM attendance WHERE student_id = %s AND session_id = %s", (student_id, session_id))
-        if cur.fetchone():
-            # Optionally, you could update the existing record or simply inform the user.
-            # For now, let's prevent duplicate entries and inform.
+            # Check the student's location against the session's campus fences
+            inside = geofences.contains(lat, lng, class_name=session.class_name, session_id=session_id)
+            status = 'PRESENT' if inside else 'ABSENT'
+        # Record attendance; duplicates are rejected by the (student_id, session_id) unique key
+        if current_app.config['ATTENDANCE_BATCH_WRITES']:
+            # Queue the scan for the batch writer and give the pooled connection
+            # back while waiting for its batch to commit
+            if cur:
+                cur.close()
+                cur = None
+            mysql.release_connection()
+            result = attendance_writer.submit(student_id, session_id, status, current_time, session.class_name).result(
+                timeout=current_app.config['ATTENDANCE_BATCH_TIMEOUT'])
+            if result == 'duplicate':
+                return jsonify({'message': 'Attendance already marked for this session.', 'status': 'already_marked'}), 409
+        else:
+            if cur is None:
+                cur = mysql.connection.cursor()
+            cur.execute("""
+                INSERT INTO attendance (student_id, session_id, status, timestamp)
+                VALUES (%s, %s, %s, %s)
+            """, (student_id, session_id, status, current_time))
+            add_to_summary(cur, [(student_id, session.class_name, status)])
+            mysql.connection.commit()
+    except MySQLdb.IntegrityError as e:
+        mysql.rollback_if_held()
+        if e.args and e.args[0] == ER_DUP_ENTRY:
             return jsonify({'message': 'Attendance already marked for this session.', 'status': 'already_marked'}), 409
-        # Record attendance
-        cur.execute("""
-            INSERT INTO attendance (student_id, session_id, status, timestamp)
-            VALUES (%s, %s, %s, %s)
-        """, (student_id, session_id, status, current_time))
-        mysql.connection.commit()
+        if e.args and e.args[0] == ER_NO_REFERENCED_ROW:
+            # Unknown student, or a session deleted since it was cached
+            sessions.invalidate(session_id)
+            return jsonify({'message': 'Invalid student ID or session ID.'}), 400
+        current_app.logger.error(f"Database error in mark_attendance: {e}")
+        return jsonify({'message': 'Database error occurred while marking attendance.'}), 500
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in mark_attendance: {e}")
-        mysql.connection.rollback()
+        current_app.logger.error(f"Database error in mark_attendance: {e}")
+        mysql.rollback_if_held()
         return jsonify({'message': 'Database error occurred while marking attendance.'}), 500
+    except TimeoutError:
+        current_app.logger.error(f"Timed out waiting for batched attendance write (session {session_id}, student {student_id})")
+        return jsonify({'message': 'Attendance could not be recorded in time, please try again.'}), 503
     finally:
         if cur:
             cur.close()
     return jsonify({'message': f'Attendance marked as {status}.', 'status': status}), 200
 
-# finalize attendance
-@app.route('/finalize_attendance', methods=['POST'])
-def finalize_attendance():
+# Manual roll call: a whole class's attendance for a session in one request,
+# with a result per student (see roll_call.py); status defaults to PRESENT.
+# No geofence or QR token, and only the session's creator or an ADMIN may
+# take it.
+@bp.route('/roll_call', methods=['POST'])
+def roll_call():
     data = request.get_json()
     if not data:
         return jsonify({'message': 'Request payload is missing or not valid JSON.'}), 400
     session_id = data.get('session_id')
-    if not session_id:
-        return jsonify({'message': 'session_id is required.'}), 400
+    requesting_user_id = data.get('requesting_user_id')
+    records = data.get('records')
+    if not all([session_id, requesting_user_id]) or records is None:
+        return jsonify({'message': 'session_id, requesting_user_id and records are required.'}), 400
+    if not isinstance(records, list) or not records:
+        return jsonify({'message': 'records must be a non-empty list of {student_id, status}.'}), 400
+    if len(records) > current_app.config['ROLL_CALL_MAX_STUDENTS']:
+        return jsonify({'message': f"At most {current_app.config['ROLL_CALL_MAX_STUDENTS']} students per roll call."}), 400
     try:
         session_id = int(session_id)
-    except (ValueError, TypeError):
-        return jsonify({'message': 'Invalid session_id.'}), 400
+        requesting_user_id = int(requesting_user_id)
+        entries = [(int(record['student_id']), str(record.get('status', 'PRESENT')).upper()) for record in records]
+    except (ValueError, TypeError, KeyError):
+        return jsonify({'message': 'Invalid session_id, requesting_user_id or student_id.'}), 400
     cur = None
-    current_time = datetime.now()
     try:
         cur = mysql.connection.cursor()
-        # Check if session exists
-        cur.execute("SELECT class FROM session WHERE id = %s", (session_id,))
-        session_result = cur.fetchone()
-        if not session_result:
+        session = sessions.load(cur, session_id)
+        if not session:
             return jsonify({'message': 'Invalid session ID.'}), 400
-        class_name = session_result[0]
-        # Find students of this class who haven't marked attendance yet
-        cur.execute("""
-            SELECT s.id 
-            FROM student s
-            WHERE s.class = %s
-            AND s.id NOT IN (
-                SELECT student_id FROM attendance WHERE session_id = %s
-            )
-        """, (class_name, session_id))
-        absent_students = cur.fetchall()
-        if absent_students:
-            # Insert 'absent' records for them
-            cur.executemany("""
-                INSERT INTO attendance (student_id, session_id, status, timestamp)
-                VALUES (%s, %s, %s, %s)
-            """, [(student_id[0], session_id, 'ABSENT', current_time) for student_id in absent_students])
-            mysql.connection.commit()
-            num_absent = len(absent_students)
-        else:
-            num_absent = 0
+        user_role = authz.get_role(cur, requesting_user_id)
+        if not user_role:
+            return jsonify({'message': 'Requesting user not found.'}), 404
+        if requesting_user_id != session.created_by and user_role != 'ADMIN':
+            return jsonify({'message': 'Not authorized to take roll call for this session.'}), 403
+        cur.close()
+        cur = None
+        results = record_roll_call(mysql.connection, session_id, entries, datetime.now())
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in finalize_session: {e}")
+        current_app.logger.error(f"Database error in roll_call: {e}")
         mysql.connection.rollback()
-        return jsonify({'message': 'Database error occurred while finalizing session.'}), 500
+        return jsonify({'message': 'Database error occurred while recording roll call.'}), 500
     finally:
         if cur:
             cur.close()
+    if results is None:
+        sessions.invalidate(session_id)
+        return jsonify({'message': 'Invalid session ID.'}), 400
+    counts = {}
+    for result in results:
+        counts[result] = counts.get(result, 0) + 1
+    return jsonify({
+        'message': f"Roll call recorded for {counts.get('recorded', 0)} of {len(entries)} students.",
+        'session_id': session_id,
+        'counts': counts,
+        'results': [{'student_id': student_id, 'status': status, 'result': result}
+                    for (student_id, status), result in zip(entries, results)]
+    }), 200
+
+# finalize attendance
+@bp.route('/finalize_attendance', methods=['POST'])
+def finalize_attendance():
+    data = request.get_json()
+    if not data:
+        return jsonify({'message': 'Request payload is missing or not valid JSON.'}), 400
+    # One session (session_id) or a batch of them (session_ids)
+    session_ids = data.get('session_ids')
+    if session_ids is None:
+        session_id = data.get('session_id')
+        if not session_id:
+            return jsonify({'message': 'session_id or session_ids is required.'}), 400
+        session_ids = [session_id]
+    elif not isinstance(session_ids, list) or not session_ids:
+        return jsonify({'message': 'session_ids must be a non-empty list.'}), 400
+    if len(session_ids) > current_app.config['FINALIZE_MAX_SESSIONS']:
+        return jsonify({'message': f"At most {current_app.config['FINALIZE_MAX_SESSIONS']} sessions can be finalized at once."}), 400
+    try:
+        session_ids = [int(session_id) for session_id in session_ids]
+    except (ValueError, TypeError):
+        return jsonify({'message': 'Invalid session_id.'}), 400
+    try:
+        # Absent rows are built and inserted by MySQL in one INSERT ... SELECT
+        # per batch; safe to repeat and to run concurrently
+        result = finalize_sessions(mysql.connection, session_ids, datetime.now(),
+                                   batch_size=current_app.config['FINALIZE_BATCH_SIZE'])
+    except MySQLdb.Error as e:
+        current_app.logger.error(f"Database error in finalize_session: {e}")
+        mysql.connection.rollback()
+        return jsonify({'message': 'Database error occurred while finalizing session.'}), 500
+    if not result['finalized']:
+        return jsonify({'message': 'Invalid session ID.'}), 400
+    num_absent = result['absent_count']
     return jsonify({
         'message': f'Session finalized successfully. {num_absent} students marked as absent.',
-        'absent_count': num_absent
+        **result
     }), 200
 
 
+# Queue depth and lag of the automatic finalization
+@bp.route('/finalize_status', methods=['GET'])
+def finalize_status():
+    if not current_app.config['FINALIZE_SCHEDULER']:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **finalize_scheduler.stats()}), 200
+
+
+# Prometheus scrape endpoint: per-route latency, queries, DB time and rows,
+# plus pool/cache/writer/scheduler stats
+@bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    expected = current_app.config['METRICS_TOKEN']
+    if not current_app.config['METRICS_ENABLED'] or not expected:
+        return jsonify({'message': 'Metrics are disabled.'}), 404
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f'Bearer {expected}'.encode('utf-8')):
+        return jsonify({'message': 'A valid metrics token is required.'}), 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 # Attendance Report for perticular student
-@app.route('/attendance_report', methods=['GET'])
+@bp.route('/attendance_report', methods=['GET'])
 def attendance_report():
     student_id = request.args.get('student_id')
     if not student_id:
@@ -349,34 +820,73 @@ def attendance_report():
         student_id = int(student_id)
     except ValueError:
         return jsonify({'message': 'student_id must be an integer.'}), 400
+    try:
+        fmt = response_format()
+        limit = parse_limit(request.args, current_app.config['DEFAULT_PAGE_LIMIT'], current_app.config['MAX_PAGE_LIMIT'])
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    before = request.args.get('before')
+    if before:
+        try:
+            before_time, before_id = before.rsplit('_', 1)
+            before = (datetime.fromisoformat(before_time), int(before_id))
+        except ValueError:
+            return jsonify({'message': 'Invalid before cursor.'}), 400
     cur = None
     try:
+        if fmt != 'json':
+            # Stream the detailed records only
+            stream_cur = streaming_cursor()
+            stream_cur.execute("""
+                SELECT a.session_id, a.status, a.timestamp
+                FROM attendance a
+                JOIN session s ON a.session_id = s.id
+                WHERE a.student_id = %s
+                ORDER BY a.timestamp DESC
+            """, (student_id,))
+            return stream_rows(stream_cur, ['session_id', 'status', 'timestamp'], fmt,
+                               {'timestamp': str}, filename=f'attendance_report_{student_id}')
         cur = mysql.connection.cursor()
-        cur.execute("""
-            SELECT a.session_id, a.status, a.timestamp
-            FROM attendance a
-            JOIN session s ON a.session_id = s.id
-            WHERE a.student_id = %s
-            ORDER BY a.timestamp DESC
-        """, (student_id,))
-        records = cur.fetchall()
+        # Totals come from attendance_summary (one row per class the student
+        # has sessions in), not from a scan of the student's history
+        by_class = []
         present_count = 0
         absent_count = 0
-        detailed_records = []
-        if records:
-            for row in records:
-                status = row[1]  # a.status
-                if status == 'PRESENT':
-                    present_count += 1
-                elif status == 'ABSENT':
-                    absent_count += 1
-                # Add other status counts here if needed
-                detailed_records.append({
-                    'session_id': row[0],
-                    'status': status,
-                    'timestamp': str(row[2])
-                })
-        response_data = {'present_count': present_count, 'absent_count': absent_count, 'records': detailed_records,}
+        for class_name, class_present, class_absent in student_summary(cur, student_id):
+            class_total = class_present + class_absent
+            by_class.append({
+                'class': class_name,
+                'present_count': class_present,
+                'absent_count': class_absent,
+                'attendance_percentage': (class_present / class_total) * 100 if class_total else 0.0
+            })
+            present_count += class_present
+            absent_count += class_absent
+        # One page of the detailed records, newest first; ?before= takes the
+        # next_cursor of the previous page
+        where, params = 'a.student_id = %s', [student_id]
+        if before:
+            where += ' AND (a.timestamp < %s OR (a.timestamp = %s AND a.id < %s))'
+            params += [before[0], before[0], before[1]]
+        cur.execute(f"""
+            SELECT a.id, a.session_id, a.status, a.timestamp
+            FROM attendance a
+            WHERE {where}
+            ORDER BY a.timestamp DESC, a.id DESC
+            LIMIT %s
+        """, params + [limit + 1])
+        records = cur.fetchall()
+        detailed_records = [{
+            'session_id': row[1],
+            'status': row[2],
+            'timestamp': str(row[3])
+        } for row in records[:limit]]
+        next_cursor = None
+        if len(records) > limit:
+            last = records[limit - 1]
+            next_cursor = f"{last[3].isoformat()}_{last[0]}"
+        response_data = {'present_count': present_count, 'absent_count': absent_count, 'records': detailed_records,
+                         'next_cursor': next_cursor, 'by_class': by_class}
         total_session = present_count + absent_count
         if total_session > 0:
             response_data['attendance_percentage'] = (present_count / total_session) * 100
@@ -385,15 +895,59 @@ def attendance_report():
         response_data['total_session'] = total_session
         return jsonify(response_data), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in attendance_report: {e}")
+        current_app.logger.error(f"Database error in attendance_report: {e}")
         return jsonify({'message': 'Failed to retrieve attendance report due to a database error.'}), 500
     finally:
         if cur:
             cur.close()
 
 
+# Attendance analytics for a class and/or a teacher's sessions over a date
+# range: per-student, per-session and per-day rates and an at-risk list
+@bp.route('/class_analytics', methods=['GET'])
+def class_analytics():
+    request_id = request.args.get('request_id')
+    class_name = request.args.get('class')
+    teacher_id = request.args.get('teacher_id')
+    if not request_id:
+        return jsonify({'message': 'request_id parameter is required.'}), 400
+    if not class_name and not teacher_id:
+        return jsonify({'message': 'class or teacher_id parameter is required.'}), 400
+    try:
+        request_id = int(request_id)
+        teacher_id = int(teacher_id) if teacher_id else None
+    except ValueError:
+        return jsonify({'message': 'request_id and teacher_id must be integers.'}), 400
+    try:
+        # from/to are inclusive dates
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d') if request.args.get('from') else None
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d') + timedelta(days=1) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'message': 'Invalid from/to date format. Expected YYYY-MM-DD'}), 400
+    try:
+        threshold = float(request.args.get('threshold', current_app.config['AT_RISK_THRESHOLD']))
+    except ValueError:
+        return jsonify({'message': 'threshold must be a number.'}), 400
+    cur = None
+    try:
+        cur = mysql.connection.cursor()
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
+            return jsonify({'message': 'User not authorized to view analytics.'}), 403
+        sessions_rows, students, present = load_analytics(cur, class_name or None, teacher_id, start, end)
+        if not sessions_rows:
+            return jsonify({'message': 'No expired sessions found for the given filters.'}), 404
+        report = compute_analytics(sessions_rows, students, present, threshold)
+        return jsonify(report), 200
+    except MySQLdb.Error as e:
+        current_app.logger.error(f"Database error in class_analytics: {e}")
+        return jsonify({'message': 'Failed to compute analytics due to a database error.'}), 500
+    finally:
+        if cur:
+            cur.close()
+
+
 # get all the students 
-@app.route('/get_all_student', methods=['GET'])
+@bp.route('/get_all_student', methods=['GET'])
 def get_all_student():
     request_id = request.args.get('request_id')
     if not request_id:
@@ -402,38 +956,46 @@ def get_all_student():
         request_id = int(request_id)
     except ValueError:
         return jsonify({'message': 'request_id must be an integer.'}), 400
+    try:
+        page = page_args(STUDENT_COLUMNS)
+        fmt = response_format()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     cur = None
     try:
         cur = mysql.connection.cursor()     
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to view students.'}), 403 
-        # Fetch all students
-        cur.execute("SELECT id, name, class, email, phone FROM student")
+        if fmt != 'json':
+            # Export every student after the cursor (no page limit)
+            where, params = page.keyset('id')
+            stream_cur = streaming_cursor()
+            stream_cur.execute(f"SELECT {page.select_list(STUDENT_COLUMNS)} FROM student WHERE {where} ORDER BY id",
+                               params)
+            names = ['id'] + [f for f in page.fields if f != 'id']
+            return stream_rows(stream_cur, names, fmt, filename='students')
+        # Fetch one page of students
+        cur.execute("SELECT COUNT(*) FROM student")
+        total = cur.fetchone()[0]
+        where, params = page.keyset('id')
+        cur.execute(f"SELECT {page.select_list(STUDENT_COLUMNS)} FROM student WHERE {where} ORDER BY id LIMIT %s",
+                    params + [page.limit + 1])
         students = cur.fetchall()
-        if not students:
+        if not students and page.after_id is None:
             return jsonify({'message': 'No students found.'}), 404
-        response_data = []
-        for row in students:
-            response_data.append({
-                'id': row[0],
-                'name': row[1],
-                'class': row[2],
-                'email': row[3],
-                'phone': row[4]
-            })
-        return jsonify({'student_count': len(response_data), 'students': response_data}), 200
+        response_data, next_after_id = page.build(students)
+        return jsonify({'student_count': len(response_data), 'students': response_data,
+                        'next_after_id': next_after_id}), 200, {'X-Total-Count': str(total)}
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in get_students: {e}")
+        current_app.logger.error(f"Database error in get_students: {e}")
         return jsonify({'message': 'Failed to retrieve students due to a database error.'}), 500
     finally:
         if cur:
             cur.close()
 
 # get student by class 
-@app.route('/get_student_by_class', methods=['GET'])
+@bp.route('/get_student_by_class', methods=['GET'])
 def get_student_by_class():
     class_name = request.args.get('class_name')
     request_id = request.args.get('request_id')
@@ -443,14 +1005,22 @@ def get_student_by_class():
         request_id = int(request_id)
     except ValueError:
         return jsonify({'message': 'request_id must be an integer.'}), 400
+    try:
+        fmt = response_format()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     cur = None
     try:
         cur = mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to view students.'}), 403
+        if fmt != 'json':
+            stream_cur = streaming_cursor()
+            stream_cur.execute("SELECT id, name, class, email, phone FROM student WHERE class = %s ORDER BY id",
+                               (class_name,))
+            return stream_rows(stream_cur, ['id', 'name', 'class', 'email', 'phone'], fmt,
+                               filename=f'students_{secure_filename(class_name)}')
         # Fetch students by class
         cur.execute("SELECT id, name, class, email, phone FROM student WHERE class = %s", (class_name,))
         students = cur.fetchall()
@@ -467,7 +1037,7 @@ def get_student_by_class():
             })
         return jsonify({'student_count': len(response_data), 'students': response_data}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in get_student_by_class: {e}")
+        current_app.logger.error(f"Database error in get_student_by_class: {e}")
         return jsonify({'message': 'Failed to retrieve students due to a database error.'}), 500
     finally:
         if cur:
@@ -475,7 +1045,7 @@ def get_student_by_class():
 
 
 # update student
-@app.route('/update_student', methods=['PUT'])
+@bp.route('/update_student', methods=['PUT'])
 def update_student():
     data = request.get_json()
     request_id = data.get('request_id')
@@ -486,9 +1056,7 @@ def update_student():
     try:
         cur=mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to update students.'}), 403
         # Fetch the student details
         cur.execute("SELECT name, email, class, phone FROM student WHERE id = %s", (student_id,))
@@ -506,7 +1074,7 @@ def update_student():
         mysql.connection.commit()
         return jsonify({'message': 'Student updated successfully!'}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in update_student: {e}")
+        current_app.logger.error(f"Database error in update_student: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to update student due to a database error.'}), 500
     finally:
@@ -514,7 +1082,7 @@ def update_student():
             cur.close()
 
 # delete attendance for delete student (by student id )
-@app.route('/delete_attendance_by_student_id', methods=['DELETE'])
+@bp.route('/delete_attendance_by_student_id', methods=['DELETE'])
 def delete_attendance_by_student_id():
     data = request.get_json()
     student_id = data.get('student_id')
@@ -525,9 +1093,7 @@ def delete_attendance_by_student_id():
     try:
         cur = mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if user_role_result is None or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to delete attendance records.'}), 403
         # Check if the student exists
         cur.execute("SELECT id FROM student WHERE id = %s", (student_id,))
@@ -539,12 +1105,13 @@ def delete_attendance_by_student_id():
         attendance_records = cur.fetchall()
         if not attendance_records:
             return jsonify({'message': 'No attendance records found for this student.'}), 404
-        # Delete attendance records
+        # Delete attendance records (and the student's totals)
+        clear_student(cur, student_id)
         cur.execute("DELETE FROM attendance WHERE student_id = %s", (student_id,))
         mysql.connection.commit()
         return jsonify({'message': 'Attendance records deleted successfully!'}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in delete_attendance_by_student_id: {e}")
+        current_app.logger.error(f"Database error in delete_attendance_by_student_id: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to delete attendance records due to a database error.'}), 500
     finally:
@@ -552,7 +1119,7 @@ def delete_attendance_by_student_id():
             cur.close()
 
 # delete student
-@app.route('/delete_student', methods=['DELETE'])
+@bp.route('/delete_student', methods=['DELETE'])
 def delete_student():
     data = request.get_json()
     student_id = data['student_id']
@@ -563,9 +1130,7 @@ def delete_student():
     try:
         cur=mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to delete students.'}), 403
         # Check if the student exists
         cur.execute("SELECT id FROM student WHERE id = %s", (student_id,))
@@ -583,7 +1148,7 @@ def delete_student():
         mysql.connection.commit()
         return jsonify({'message': 'Student deleted successfully!'}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in delete_student: {e}")
+        current_app.logger.error(f"Database error in delete_student: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to delete student due to a database error.'}), 500
     finally:
@@ -591,7 +1156,7 @@ def delete_student():
             cur.close()  
 
 # delete attendance_by_session
-@app.route('/delete_attendance_by_session', methods=['DELETE'])
+@bp.route('/delete_attendance_by_session', methods=['DELETE'])
 def delete_attendance_by_session():
     data=request.get_json()
     request_id=data['request_id'] #user id 
@@ -602,9 +1167,7 @@ def delete_attendance_by_session():
     try:
         cur=mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to delete attendance records.'}), 403
         # check if the session is exist or not 
         cur.execute("SELECT id FROM session WHERE id = %s", (id,))
@@ -616,12 +1179,13 @@ def delete_attendance_by_session():
         attendance = cur.fetchone()
         if not attendance:
             return jsonify({'message': 'No attendance records found for this session.'}), 404
-        # Delete attendance records for the session
+        # Delete attendance records for the session, after taking them out of the totals
+        subtract_session(cur, id)
         cur.execute("DELETE FROM attendance WHERE session_id = %s", (id,))
         mysql.connection.commit()
         return jsonify({'message': 'Attendance records deleted successfully!'}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in delete_attendance_by_session: {e}")
+        current_app.logger.error(f"Database error in delete_attendance_by_session: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to delete attendance records due to a database error.'}), 500
     finally:
@@ -629,7 +1193,7 @@ def delete_attendance_by_session():
             cur.close()
 
 # delete session
-@app.route('/delete_session', methods=['DELETE'])
+@bp.route('/delete_session', methods=['DELETE'])
 def delete_session():
     data = request.get_json()
     request_id=data['request_id']
@@ -640,20 +1204,21 @@ def delete_session():
     try:
         cur = mysql.connection.cursor()
         # check the requesting user is an ADMIN or a TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s ",(request_id,))
-        user_role_result=cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to delete attendance records.'}), 403
         # check if session is exist or not 
         cur.execute("SELECT id FROM session WHERE id = %s",(id,))
         session = cur.fetchone()
         if not session:
             return jsonify({'message' : 'session not found'}), 404
+        # Its attendance goes with it (ON DELETE CASCADE); take it out of the totals first
+        subtract_session(cur, id)
         cur.execute("DELETE FROM session WHERE id = %s",(id,))
         mysql.connection.commit()
+        sessions.invalidate(session[0])
         return jsonify({'message': 'Session deleted successfully!'}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in delete_session: {e}")
+        current_app.logger.error(f"Database error in delete_session: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to delete session due to a database error.'}), 500
     finally:
@@ -662,118 +1227,119 @@ def delete_session():
     
 
 # get all the sessions
-@app.route('/get_sessions', methods=['GET'])
+@bp.route('/get_sessions', methods=['GET'])
 def get_sessions():
     id = request.args.get('id')
+    try:
+        page = page_args(SESSION_COLUMNS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     cur = None
     try:
         cur = mysql.connection.cursor()
         # check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to view sessions.'}), 403
-        # Fetch all sessions
-        cur.execute("SELECT * FROM session")
-        sessions = cur.fetchall()
-        if not sessions:
+        # Fetch one page of sessions with their creator's name in one query
+        cur.execute("SELECT COUNT(*) FROM session")
+        total = cur.fetchone()[0]
+        where, params = page.keyset('s.id')
+        cur.execute(f"""
+            SELECT {page.select_list(SESSION_COLUMNS)}
+            FROM session s
+            LEFT JOIN user u ON u.id = s.created_by
+            WHERE {where}
+            ORDER BY s.id
+            LIMIT %s
+        """, params + [page.limit + 1])
+        rows = cur.fetchall()
+        if not rows and page.after_id is None:
             return jsonify({'message': 'No sessions found.'}), 404
         # Format the session data
-        result = []
-        for row in sessions:
-            # get creater name for more clarity
-            create=row[4]
-            cur.execute("SELECT name FROM user WHERE id = %s", (create,))
-            created_by = cur.fetchone()
-            creator_name = created_by[0] if created_by else "Unknown"
-            result.append({
-                'id': row[0],
-                'session_name': row[1],
-                'session_code': row[2],
-                'expiry_time': str(row[3]),
-                'created_by': row[4],
-                'created_by_name': creator_name,
-                'class': row[5],
-            })
-        return jsonify({'session_count': len(result), 'sessions': result}), 200
+        result, next_after_id = page.build(rows, {
+            'expiry_time': str,
+            'created_by_name': lambda name: name if name else "Unknown",
+        })
+        return jsonify({'session_count': len(result), 'sessions': result,
+                        'next_after_id': next_after_id}), 200, {'X-Total-Count': str(total)}
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in get_sessions: {e}")
+        current_app.logger.error(f"Database error in get_sessions: {e}")
         return jsonify({'message': 'Failed to retrieve sessions due to a database error.'}), 500
     finally:
         if cur:
             cur.close()
             
 # get specific session's attendance
-@app.route('/get_session_attendance', methods=['GET'])
+@bp.route('/get_session_attendance', methods=['GET'])
 def get_session_attendance():
     session_id = request.args.get('session_id')
     request_id = request.args.get('request_id')
     if not session_id or not request_id:
         return jsonify({'message': 'session_id and request_id are required.'}), 400
+    try:
+        fmt = response_format()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     cur = None
     try:
         session_id = int(session_id)
         request_id = int(request_id)
         cur = mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to view attendance.'}), 403
-        # check if session exists
-        cur.execute("SELECT id FROM session WHERE id = %s", (session_id,))
-        session_result = cur.fetchone()
-        if not session_result:
-            return jsonify({'message': 'Session not found.'}), 404
-        # fetch the session name 
-        cur.execute("SELECT session_name FROM session WHERE id = %s", (session_id,))
-        session_name_result = cur.fetchone()
-        session_name = session_name_result[0] if session_name_result else "Unknown"
-        # check if attendance records exist for the session
-        cur.execute("SELECT id FROM attendance WHERE session_id = %s", (session_id,))
-        attendance_result = cur.fetchone()
-        if not attendance_result:
-            return jsonify({'message': 'No attendance records found for this session.'}), 404
-        # Fetch attendance records
-        cur.execute("SELECT * FROM attendance WHERE session_id = %s", (session_id,))
+        if fmt != 'json':
+            if not sessions.load(cur, session_id):
+                return jsonify({'message': 'Session not found.'}), 404
+            stream_cur = streaming_cursor()
+            stream_cur.execute("""
+                SELECT a.student_id, st.name, a.status, a.timestamp
+                FROM attendance a
+                LEFT JOIN student st ON st.id = a.student_id
+                WHERE a.session_id = %s
+                ORDER BY a.id
+            """, (session_id,))
+            return stream_rows(stream_cur, ['student_id', 'student_name', 'status', 'timestamp'], fmt,
+                               {'student_name': lambda name: name if name else "Unknown",
+                                'timestamp': lambda ts: str(ts) if ts else None},
+                               filename=f'session_{session_id}_attendance')
+        # Fetch the session and its attendance records with student names in one query.
+        # A session without attendance comes back as a single row of NULLs.
+        cur.execute("""
+            SELECT se.session_name, a.student_id, st.name, a.status, a.timestamp
+            FROM session se
+            LEFT JOIN attendance a ON a.session_id = se.id
+            LEFT JOIN student st ON st.id = a.student_id
+            WHERE se.id = %s
+            ORDER BY a.id
+        """, (session_id,))
         records = cur.fetchall()
         if not records:
-            return jsonify({'message': 'No attendance records found for this session'}), 404
+            return jsonify({'message': 'Session not found.'}), 404
+        session_name = records[0][0]
+        if records[0][1] is None:
+            return jsonify({'message': 'No attendance records found for this session.'}), 404
         result = []
         for row in records:
-            cur.execute("SELECT name FROM student WHERE id = %s", (row[1],))
-            student_name = cur.fetchone()
-            student_name = student_name[0] if student_name else "Unknown"
             result.append({
                 'student_id': row[1],
-                'student_name': student_name,
+                'student_name': row[2] if row[2] else "Unknown",
                 'status': row[3],
                 'timestamp': str(row[4]) if row[4] else None
             })
-        cur.close()
         return jsonify({'session_name': session_name, 'attendance_records': result, 'record_count': len(result)}), 200
     except ValueError:
         return jsonify({'message': 'session_id and request_id must be integers.'}), 400
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in get_session_attendance: {e}")
+        current_app.logger.error(f"Database error in get_session_attendance: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to retrieve session attendance due to a database error.'}), 500
     finally:
         if cur:
             cur.close()
 
-# bulk student import from excel sheet 
-
-# allow file upload 
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16*1024*1024 #16mb
-allowed_extensions = {'xlsx', 'xls'}
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
-# import students from excel sheet
-@app.route('/import_students', methods=['POST'])
+# bulk student import from excel sheet / csv
+@bp.route('/import_students', methods=['POST'])
 def import_students():
     request_id = request.form.get('request_id')
     if not request_id:
@@ -782,59 +1348,52 @@ def import_students():
         request_id = int(request_id)
     except ValueError:
         return jsonify({'message': 'request_id must be an integer.'}), 400
+    # skip: leave existing students untouched, upsert: update them from the file
+    mode = request.form.get('mode', 'skip')
+    if mode not in IMPORT_MODES:
+        return jsonify({'message': f"mode must be one of: {', '.join(IMPORT_MODES)}."}), 400
     cur = None
     try:
         cur = mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or TEACHER
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to import students.'}), 403
         if 'file' not in request.files:
             return jsonify({'message': 'No file part'}), 400
         file=request.files['file']
         if file.filename == '':
             return jsonify({'message': 'No selected file'}), 400
-        if not allowed_file(file.filename):
-            return jsonify({'message': 'Invalid file type. Only .xlsx and .xls files are allowed.'}), 400
-        filename = secure_filename(file.filename)
-        filepath=os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        df=pd.read_excel(filepath)
-        expected_columns = {'id', 'name', 'class', 'email', 'phone'}
-        if not expected_columns.issubset(df.columns):
-            os.remove(filepath)
-            return jsonify({'message': f'Excel file must contain the following columns: {", ".join(expected_columns)}'}), 400
-        student_count=0
-        for index, row in df.iterrows():
-            id = row['id']
-            name = row['name']
-            class_name=row['class']
-            email = row['email']
-            phone = row['phone']
-            # check student already in  database or not 
-            cur.execute("SELECT id FROM student WHERE id = %s", (id,))
-            student=cur.fetchone()
-            if student:
-                continue #skip if student already exists
-            cur.execute("INSERT INTO student (id, name, class, email, phone) VALUES (%s, %s, %s, %s, %s)", (id, name, class_name, email,phone))
-            student_count += 1
-        mysql.connection.commit()
-        os.remove(filepath)
-        return jsonify({'message': 'Students imported successfully!', 'student_count': student_count}), 201
+        ext = roster_extension(file.filename)
+        if not ext:
+            return jsonify({'message': 'Invalid file type. Only .xlsx, .xls and .csv files are allowed.'}), 400
+        # Parse the upload in fixed-size chunks straight from the request's file object
+        columns, chunks = read_roster(file.stream, ext, chunk_size=current_app.config['IMPORT_CHUNK_SIZE'])
+        if not set(REQUIRED_COLUMNS).issubset(columns):
+            return jsonify({'message': f'File must contain the following columns: {", ".join(REQUIRED_COLUMNS)}'}), 400
+        # Validate and dedup each chunk with pandas, then write it as a
+        # multi-row upsert (one commit per chunk)
+        importer = StudentImporter(mysql.connection, mode=mode, chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+                                   max_errors=current_app.config['IMPORT_MAX_ERRORS'])
+        for chunk in chunks:
+            importer.feed(chunk)
+        report = importer.result()
+        current_app.logger.info(f"import_students: {report['rows_total']} rows in {report['elapsed_seconds']}s "
+                        f"({report['rows_per_second']} rows/s), {report['inserted']} inserted, "
+                        f"{report['updated']} updated, {report['skipped']} skipped, {report['error_count']} rejected")
+        return jsonify({'message': 'Students imported successfully!', 'student_count': report['inserted'], **report}), 201
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in import_students: {e}")
+        current_app.logger.error(f"Database error in import_students: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to import students due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in import_students: {e}")
+        current_app.logger.error(f"Unexpected error in import_students: {e}")
         return jsonify({'message': 'An unexpected error occurred while importing students.'}), 500
     finally:
         if cur:
             cur.close()
     
 # register user
-@app.route('/register_user', methods=['POST'])
+@bp.route('/register_user', methods=['POST'])
 def register_user():
     data = request.get_json()
     name = data.get('name')
@@ -857,9 +1416,10 @@ def register_user():
         cur.execute("INSERT INTO user (name, email, phone, password, role) VALUES (%s, %s, %s, %s, %s)", (name, email, phone, password, role))
         mysql.connection.commit()
         new_user_id = cur.lastrowid
+        authz.invalidate(new_user_id)
         return jsonify({'message': 'User registered successfully!', 'user_id': new_user_id}), 201
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in register_user: {e}")
+        current_app.logger.error(f"Database error in register_user: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to register user due to a database error.'}), 500
     finally:
@@ -868,7 +1428,7 @@ def register_user():
     
 
 # login user
-@app.route('/login_user', methods=['POST'])
+@bp.route('/login_user', methods=['POST'])
 def login_user():
     data = request.get_json()
     email = data.get('email')
@@ -889,18 +1449,18 @@ def login_user():
             return jsonify({'message': 'Only admin or teacher can login!'}), 403
         return jsonify({'message': 'Login successful!','user_id': user_id, 'role': role}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in login_user: {e}")
+        current_app.logger.error(f"Database error in login_user: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to login due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in login_user: {e}")
+        current_app.logger.error(f"Unexpected error in login_user: {e}")
         return jsonify({'message': 'An unexpected error occurred while logging in.'}), 500
     finally:
         if cur:
             cur.close()
 
 # delete teacher
-@app.route('/delete_teacher', methods=['DELETE'])
+@bp.route('/delete_teacher', methods=['DELETE'])
 def delete_teacher():
     data = request.get_json()
     id = data.get('id')
@@ -916,9 +1476,7 @@ def delete_teacher():
     try:
         cur = mysql.connection.cursor()
         # Check if the requesting user is an ADMIN or not 
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] != 'ADMIN':
+        if not authz.has_role(cur, request_id, ('ADMIN',)):
             return jsonify({'message': 'Only admin can delete teacher!'}), 403
         cur.execute("SELECT role FROM user WHERE id = %s", (id,))
         role = cur.fetchone()
@@ -928,23 +1486,25 @@ def delete_teacher():
         cur.execute("SELECT name,email,phone FROM user WHERE id = %s", (id,))
         result = cur.fetchone()
         teacher={"name": result[0], "email": result[1], "phone": result[2]}
-        # delete teacher
+        # delete teacher (cascades to their sessions and those sessions' attendance)
+        subtract_sessions_created_by(cur, id)
         cur.execute("DELETE FROM user WHERE id = %s", (id,))
         mysql.connection.commit()
+        authz.invalidate(id)
         return jsonify({'message': 'Teacher deleted successfully!', 'teacher': teacher}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in delete_teacher: {e}")
+        current_app.logger.error(f"Database error in delete_teacher: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to delete teacher due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in delete_teacher: {e}")
+        current_app.logger.error(f"Unexpected error in delete_teacher: {e}")
         return jsonify({'message': 'An unexpected error occurred while deleting teacher.'}), 500
     finally:
         if cur:
             cur.close()
     
 # get all the teachers
-@app.route('/get_teachers', methods=['GET'])
+@bp.route('/get_teachers', methods=['GET'])
 def get_teachers():
     request_id = request.args.get('request_id')
     if not request_id :
@@ -953,26 +1513,33 @@ def get_teachers():
         request_id = int(request_id)
     except ValueError:
         return jsonify({'message': 'request_id must be an integer!'}), 400
+    try:
+        page = page_args(TEACHER_COLUMNS)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     cur = None
     try:
         cur=mysql.connection.cursor()
         # Check if the requesting user is an ADMIN
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] != 'ADMIN':
+        if not authz.has_role(cur, request_id, ('ADMIN',)):
             return jsonify({'message': 'Only admin can view teachers!'}), 403
-        # Fetch all teachers
-        cur.execute("SELECT * FROM user WHERE role='TEACHER'")
+        # Fetch one page of teachers
+        cur.execute("SELECT COUNT(*) FROM user WHERE role='TEACHER'")
+        total = cur.fetchone()[0]
+        where, params = page.keyset('id')
+        cur.execute(f"SELECT {page.select_list(TEACHER_COLUMNS)} FROM user WHERE role='TEACHER' AND {where} ORDER BY id LIMIT %s",
+                    params + [page.limit + 1])
         teachers=cur.fetchall()
-        if not teachers:
+        if not teachers and page.after_id is None:
             return jsonify({'message': 'No teachers found.'}), 404
-        result = [{'id': row[0], 'name': row[1], 'email': row[2], 'phone' : row[3], 'role': row[5]} for row in teachers]
-        return jsonify({'teacher_count': len(result), 'teachers': result}), 200
+        result, next_after_id = page.build(teachers)
+        return jsonify({'teacher_count': len(result), 'teachers': result,
+                        'next_after_id': next_after_id}), 200, {'X-Total-Count': str(total)}
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in get_teachers: {e}")
+        current_app.logger.error(f"Database error in get_teachers: {e}")
         return jsonify({'message': 'Failed to retrieve teachers due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in get_teachers: {e}")
+        current_app.logger.error(f"Unexpected error in get_teachers: {e}")
         return jsonify({'message': 'An unexpected error occurred while retrieving teachers.'}), 500
     finally:
         if cur:
@@ -980,7 +1547,7 @@ def get_teachers():
 
 
 # add teacher
-@app.route('/add_teacher', methods=['POST'])
+@bp.route('/add_teacher', methods=['POST'])
 def add_teacher():
     data = request.get_json()
     request_id = data.get('request_id')
@@ -994,9 +1561,7 @@ def add_teacher():
     try:
         cur = mysql.connection.cursor()
         # Check if the requesting user is an ADMIN
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role_result = cur.fetchone()
-        if not user_role_result or user_role_result[0] != 'ADMIN':
+        if not authz.has_role(cur, request_id, ('ADMIN',)):
             return jsonify({'message': 'Only admin can add teacher!'}), 403
         # Check if the teacher already exists
         cur.execute("SELECT email FROM user WHERE email = %s", (email,))
@@ -1012,20 +1577,21 @@ def add_teacher():
         cur.execute("INSERT INTO user (name, email, phone, password, role) VALUES (%s, %s, %s, %s, %s)", (name, email, phone, password, 'TEACHER'))
         mysql.connection.commit()
         new_teacher_id = cur.lastrowid
+        authz.invalidate(new_teacher_id)
         return jsonify({'message': 'Teacher added successfully!', 'teacher_id': new_teacher_id}), 201
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in add_teacher: {e}")
+        current_app.logger.error(f"Database error in add_teacher: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to add teacher due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in add_teacher: {e}")
+        current_app.logger.error(f"Unexpected error in add_teacher: {e}")
         return jsonify({'message': 'An unexpected error occurred while adding teacher.'}), 500
     finally:
         if cur:
             cur.close()
 
 # update teacher
-@app.route('/update_teacher', methods=['PUT'])
+@bp.route('/update_teacher', methods=['PUT'])
 def update_teacher():
     data = request.get_json()
     request_id = data['request_id']
@@ -1039,9 +1605,7 @@ def update_teacher():
     try:
         cur = mysql.connection.cursor()
         # check the request id is admin or teacher
-        cur.execute("SELECT role FROM user WHERE id = %s", (request_id,))
-        user_role = cur.fetchone()
-        if not user_role or user_role[0] not in ('ADMIN', 'TEACHER'):
+        if not authz.has_role(cur, request_id, ('ADMIN', 'TEACHER')):
             return jsonify({'message': 'User not authorized to update teacher.'}), 403
         # CHECK teacher is exit or not 
         cur.execute("SELECT role FROM user WHERE id = %s", (id,))
@@ -1066,20 +1630,21 @@ def update_teacher():
             phone = old_data[0][3]
         cur.execute("UPDATE user SET name=%s, email=%s, phone=%s WHERE id=%s ",(name,email,phone,id))
         mysql.connection.commit()
+        authz.invalidate(id)
         return jsonify({'message': 'teacher details update sucessfully'}),200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in update_teacher: {e}")
+        current_app.logger.error(f"Database error in update_teacher: {e}")
         mysql.connection.rollback()
         return jsonify({'message': 'Failed to update teacher due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in update_teacher: {e}")
+        current_app.logger.error(f"Unexpected error in update_teacher: {e}")
         return jsonify({'message': 'An unexpected error occurred while updating teacher.'}), 500
     finally:
         if cur:
             cur.close()
 
 # student login
-@app.route('/student_login', methods=['POST'])
+@bp.route('/student_login', methods=['POST'])
 def student_login():
     data = request.get_json()
     id = data['id']
@@ -1114,10 +1679,10 @@ def student_login():
         }
         return jsonify({'message': 'Login successful!', 'student': result}), 200
     except MySQLdb.Error as e:
-        app.logger.error(f"Database error in student_login: {e}")
+        current_app.logger.error(f"Database error in student_login: {e}")
         return jsonify({'message': 'Failed to login due to a database error.'}), 500
     except Exception as e:
-        app.logger.error(f"Unexpected error in student_login: {e}")
+        current_app.logger.error(f"Unexpected error in student_login: {e}")
         return jsonify({'message': 'An unexpected error occurred while logging in.'}), 500
     finally:
         if cur:
@@ -1129,4 +1694,4 @@ def student_login():
 # Run the App
 # ================================
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
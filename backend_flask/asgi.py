@@ -0,0 +1,35 @@
+# ASGI entry point: the same Flask app served by uvicorn.
+#
+#   python asgi.py                       # or
+#   uvicorn asgi:application --host 0.0.0.0 --port 8000
+#
+# The event loop owns the sockets, so idle and slow clients cost a coroutine
+# rather than a thread, and each request's Flask handler (synchronous
+# MySQLdb code) runs on a pool of ASGI_THREADS threads. Database concurrency
+# is still capped by MYSQL_POOL_SIZE; requests beyond that wait for a
+# connection (MYSQL_POOL_TIMEOUT). With ATTENDANCE_BATCH_WRITES=1, a scan
+# gives its connection back while its batch is written, so many more scans
+# can be in flight than there are connections.
+import os
+
+from a2wsgi import WSGIMiddleware
+
+from app import create_app
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 64))
+
+app = create_app()
+application = WSGIMiddleware(app, workers=ASGI_THREADS)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(
+        application,
+        host=os.environ.get('HOST', '127.0.0.1'),
+        port=int(os.environ.get('PORT', 8000)),
+        backlog=int(os.environ.get('ASGI_BACKLOG', 4096)),
+        timeout_keep_alive=int(os.environ.get('ASGI_KEEP_ALIVE', 5)),
+        log_level=os.environ.get('LOG_LEVEL', 'info'),
+    )
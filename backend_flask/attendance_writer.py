@@ -0,0 +1,201 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import MySQLdb
+
+from summary import add_to_summary
+
+
+# MySQL error codes for a duplicate entry on a unique key and for a
+# foreign key pointing at a missing row.
+ER_DUP_ENTRY = 1062
+ER_NO_REFERENCED_ROW = 1452
+
+INSERT_ATTENDANCE = """
+    INSERT INTO attendance (student_id, session_id, status, timestamp)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = id
+"""
+
+
+# Opt-in write path for /mark_attendance. Scans are queued in memory and a
+# single background thread flushes them to `attendance` as multi-row inserts
+# whenever max_batch rows are waiting or the oldest has waited max_delay
+# seconds, so a burst of scans costs one commit per batch instead of one per
+# scan. attendance_summary is updated for the recorded rows in the same
+# transaction. Each submit() returns a Future that resolves to 'recorded' or
+# 'duplicate' once its batch is committed (or raises the row's database
+# error); duplicates are decided by the uq_attendance_student_session key.
+class AttendanceBatchWriter:
+    def __init__(self, connect, max_batch=200, max_delay=0.05, ping_interval=30.0, logger=None):
+        self.connect = connect
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.ping_interval = ping_interval
+        self.logger = logger
+        self._queue = []  # (student_id, session_id, status, timestamp, future, class_name)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._conn = None
+        self._last_used = 0.0
+        self._metrics = {
+            'submitted': 0,
+            'recorded': 0,
+            'duplicates': 0,
+            'failed': 0,
+            'batches': 0,
+            'rows_per_batch_max': 0,
+            'flush_seconds_total': 0.0,
+        }
+
+    def submit(self, student_id, session_id, status, timestamp, class_name):
+        future = Future()
+        with self._cond:
+            self._start_locked()
+            self._queue.append((student_id, session_id, status, timestamp, future, class_name))
+            self._metrics['submitted'] += 1
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._metrics)
+            stats['queued'] = len(self._queue)
+        return stats
+
+    def _start_locked(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='attendance-batch-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # Give the batch up to max_delay to fill before flushing it.
+                deadline = time.monotonic() + self.max_delay
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+            self._flush(batch)
+
+    def _flush(self, batch):
+        start = time.monotonic()
+        try:
+            results = self._write(batch)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Database error in attendance batch writer: {e}")
+            self._discard_connection()
+            with self._cond:
+                self._metrics['failed'] += len(batch)
+            for item in batch:
+                item[4].set_exception(e)
+            return
+        with self._cond:
+            self._metrics['batches'] += 1
+            self._metrics['rows_per_batch_max'] = max(self._metrics['rows_per_batch_max'], len(batch))
+            self._metrics['flush_seconds_total'] += time.monotonic() - start
+            for result in results:
+                if result == 'recorded':
+                    self._metrics['recorded'] += 1
+                elif result == 'duplicate':
+                    self._metrics['duplicates'] += 1
+                else:
+                    self._metrics['failed'] += 1
+        for item, result in zip(batch, results):
+            if isinstance(result, Exception):
+                item[4].set_exception(result)
+            else:
+                item[4].set_result(result)
+
+    def _write(self, batch):
+        conn = self._connection()
+        cur = conn.cursor()
+        try:
+            results = [None] * len(batch)
+            # The first scan of a student for a session in this batch wins.
+            first = {}
+            for i, (student_id, session_id, _, _, _, _) in enumerate(batch):
+                key = (student_id, session_id)
+                if key in first:
+                    results[i] = 'duplicate'
+                else:
+                    first[key] = i
+
+            # Drop scans that are already in the table with one lookup.
+            if first:
+                placeholders = ', '.join(['(%s, %s)'] * len(first))
+                params = [value for key in first for value in key]
+                cur.execute(f"""
+                    SELECT student_id, session_id FROM attendance
+                    WHERE (student_id, session_id) IN ({placeholders})
+                """, params)
+                for key in cur.fetchall():
+                    results[first.pop((key[0], key[1]))] = 'duplicate'
+
+            pending = sorted(first.values())
+            if pending:
+                rows = [batch[i][:4] for i in pending]
+                try:
+                    # A duplicate key leaves the existing row alone and counts
+                    # as 0 affected rows; any other error fails the statement.
+                    cur.executemany(INSERT_ATTENDANCE, rows)
+                    all_recorded = cur.rowcount == len(rows)
+                except MySQLdb.IntegrityError:
+                    all_recorded = False
+                if all_recorded:
+                    for i in pending:
+                        results[i] = 'recorded'
+                else:
+                    # Either another writer inserted some of these since the
+                    # lookup or a row is invalid (e.g. unknown student). Redo
+                    # the batch row by row so only the offending scans fail.
+                    conn.rollback()
+                    for i in pending:
+                        try:
+                            cur.execute(INSERT_ATTENDANCE, batch[i][:4])
+                            results[i] = 'recorded' if cur.rowcount == 1 else 'duplicate'
+                        except MySQLdb.IntegrityError as e:
+                            results[i] = e
+                add_to_summary(cur, [(batch[i][0], batch[i][5], batch[i][2])
+                                     for i in pending if results[i] == 'recorded'])
+                conn.commit()
+            return results
+        except Exception:
+            try:
+                conn.rollback()
+            except MySQLdb.Error:
+                pass
+            raise
+        finally:
+            cur.close()
+
+    def _connection(self):
+        # The writer keeps its own connection so it never competes with
+        # requests for a pooled one.
+        now = time.monotonic()
+        if self._conn is not None and now - self._last_used >= self.ping_interval:
+            try:
+                self._conn.ping()
+            except MySQLdb.Error:
+                self._discard_connection()
+        if self._conn is None:
+            self._conn = self.connect()
+        self._last_used = now
+        return self._conn
+
+    def _discard_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
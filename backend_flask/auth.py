@@ -0,0 +1,44 @@
+from cache import TTLCache
+
+
+# Role lookups for the authorization checks at the top of the admin/teacher
+# routes. Roles are cached per user id so a request doesn't pay an extra
+# round trip just to be authorized. Unknown users are never cached, and the
+# routes that change users call invalidate() for the ids they touch.
+class RoleAuthorizer:
+    def __init__(self, maxsize=10000, ttl=60.0):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get_role(self, cur, user_id):
+        key = self._key(user_id)
+        if key is None:
+            return None
+        role = self.cache.get(key)
+        if role is not None:
+            return role
+        cur.execute("SELECT role FROM user WHERE id = %s", (key,))
+        result = cur.fetchone()
+        if not result:
+            return None
+        role = result[0]
+        self.cache.set(key, role)
+        return role
+
+    def has_role(self, cur, user_id, roles):
+        return self.get_role(cur, user_id) in roles
+
+    def invalidate(self, user_id):
+        key = self._key(user_id)
+        if key is not None:
+            self.cache.invalidate(key)
+
+    def stats(self):
+        return self.cache.stats()
+
+    @staticmethod
+    def _key(user_id):
+        # Ids arrive as ints from JSON bodies and as strings from query args.
+        try:
+            return int(user_id)
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,85 @@
+# Class analytics benchmark: per-student report loops (what the client did
+# with one /attendance_report call per student, minus the HTTP and database
+# round trips) vs analytics.compute_analytics.
+#
+#   python benchmarks/bench_analytics.py [--students 500] [--sessions 200] [--runs 5]
+#
+# Both methods are checked to produce the same per-student percentages.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analytics import compute_analytics  # noqa: E402
+
+
+def make_data(n_students, n_sessions, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 6, 9, 0)
+    students = [(i, f'Student {i}', 'MCA-1') for i in range(1, n_students + 1)]
+    sessions = [(j, f'Lecture {j}', start + timedelta(days=j // 4, hours=j % 4), 'MCA-1')
+                for j in range(1, n_sessions + 1)]
+    # Each student has their own attendance habit, so some fall below 75%.
+    habit = {i: rng.uniform(0.5, 1.0) for i, _, _ in students}
+    rows = [(i, j, 'PRESENT' if rng.random() < habit[i] else 'ABSENT')
+            for j, _, _, _ in sessions for i, _, _ in students]
+    return students, sessions, rows
+
+
+def per_student_reports(students, rows):
+    # One pass over the attendance rows per student, counting in Python.
+    percentages = {}
+    for student_id, _, _ in students:
+        present = absent = 0
+        for row_student, _, status in rows:
+            if row_student != student_id:
+                continue
+            if status == 'PRESENT':
+                present += 1
+            elif status == 'ABSENT':
+                absent += 1
+        total = present + absent
+        percentages[student_id] = round(present / total * 100, 2) if total else 0.0
+    return percentages
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    students, sessions, rows = make_data(args.students, args.sessions)
+    present = [(i, j) for i, j, status in rows if status == 'PRESENT']
+
+    baseline, t_loop = timed(lambda: per_student_reports(students, rows), args.runs)
+    report, t_vector = timed(lambda: compute_analytics(sessions, students, present), args.runs)
+
+    vector = {item['id']: item['attendance_percentage'] for item in report['students']}
+    agree = sum(1 for sid in baseline if abs(baseline[sid] - vector[sid]) < 0.01) / len(baseline) * 100
+    print(f"students: {args.students}, sessions: {args.sessions}, attendance rows: {len(rows)}, "
+          f"at risk: {len(report['at_risk'])}")
+    print(f"{'method':<34}{'ms':>10}{'speedup':>10}")
+    print(f"{'per-student report loop (old)':<34}{t_loop * 1000:>10.1f}{1:>9.0f}x")
+    print(f"{'analytics.compute_analytics':<34}{t_vector * 1000:>10.1f}{t_loop / t_vector:>9.0f}x")
+    print(f"per-student percentages agree: {agree:.1f}%")
+    print("(the old way also paid one HTTP request and one database query per student)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Geofence benchmark: the old geopy.geodesic check vs the geofence module.
+#
+#   python benchmarks/bench_geofence.py [--points 20000] [--radius-km 0.1]
+#
+# Scans are scattered around the campus centre (about half inside the fence)
+# and every method is checked against geodesic for agreement.
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from geofence import GeofenceRegistry  # noqa: E402
+
+
+CAMPUS = (20.2961, 85.8245)
+
+
+def make_points(n, radius_km, seed=0):
+    rng = np.random.default_rng(seed)
+    # Uniform over a disc of 1.4x the radius: ~half the points fall inside.
+    r = radius_km * 1.4 * np.sqrt(rng.random(n))
+    theta = rng.random(n) * 2 * np.pi
+    lats = CAMPUS[0] + r * np.cos(theta) / 111.32
+    lngs = CAMPUS[1] + r * np.sin(theta) / (111.32 * np.cos(np.radians(CAMPUS[0])))
+    return lats, lngs
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--points', type=int, default=20000)
+    parser.add_argument('--radius-km', type=float, default=0.1)
+    args = parser.parse_args()
+
+    lats, lngs = make_points(args.points, args.radius_km)
+    registry = GeofenceRegistry.single(CAMPUS[0], CAMPUS[1], args.radius_km)
+    points = list(zip(lats.tolist(), lngs.tolist()))
+
+    baseline, t_geodesic = timed(
+        lambda: [geodesic(CAMPUS, p).km <= args.radius_km for p in points])
+    scalar, t_scalar = timed(
+        lambda: [registry.contains(lat, lng) for lat, lng in points])
+    batch, t_batch = timed(
+        lambda: registry.contains_many(lats, lngs))
+
+    baseline = np.array(baseline)
+    print(f"points: {args.points}, inside: {int(baseline.sum())}")
+    print(f"{'method':<28}{'total ms':>10}{'us/point':>10}{'speedup':>10}{'agree %':>10}")
+    for name, result, elapsed in [
+        ('geopy geodesic (old)', baseline, t_geodesic),
+        ('geofence.contains', np.array(scalar), t_scalar),
+        ('geofence.contains_many', batch, t_batch),
+    ]:
+        agree = (result == baseline).mean() * 100
+        print(f"{name:<28}{elapsed * 1000:>10.1f}{elapsed / args.points * 1e6:>10.2f}"
+              f"{t_geodesic / elapsed:>9.0f}x{agree:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# Cold-start benchmark: how long a fresh interpreter takes to import app.py
+# and run create_app(), how much memory it holds afterwards, and which
+# imports dominate (from `python -X importtime`). Each run is a new process,
+# so nothing is cached between runs.
+#
+#   python benchmarks/bench_import_time.py [--runs 5] [--top 15] [--max-ms 400]
+#
+# Exits non-zero if a --lazy module (only needed by one endpoint, e.g. pandas
+# for the roster import) was loaded at startup or, with --max-ms, if the
+# median startup time is over budget, so it can run in CI to catch
+# regressions. No database is needed.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+ENV = dict(os.environ, START_BACKGROUND_TASKS='0', FINALIZE_SCHEDULER='0', QR_TOKEN_SECRET='bench')
+LAZY_MODULES = 'numpy,pandas,openpyxl,qrcode,PIL'
+
+STARTUP = """
+import resource, sys, time
+start = time.perf_counter()
+import app
+app.create_app()
+elapsed = time.perf_counter() - start
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(elapsed, rss_mb, ','.join(sorted(m for m in sys.modules if '.' not in m)))
+"""
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time:  self_us | cumulative_us | <indent>name".
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace('import time:', '|', 1).split('|'))
+        timings[name] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def run_once():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP], cwd=APP_DIR, env=ENV,
+                            capture_output=True, text=True, check=True)
+    elapsed, rss_mb, modules = result.stdout.split()
+    return float(elapsed), float(rss_mb), set(modules.split(',')), parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest top-level packages to list')
+    parser.add_argument('--lazy', default=LAZY_MODULES, help='modules that must not load at startup')
+    parser.add_argument('--max-ms', type=float, help='fail if the median startup time is above this')
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    startup_ms = statistics.median(run[0] for run in runs) * 1000
+    rss_mb = statistics.median(run[1] for run in runs)
+    loaded = runs[-1][2]
+
+    # Median cumulative import time per top-level package across runs.
+    packages = {name for run in runs for name in run[3] if '.' not in name}
+    cumulative = {name: statistics.median(run[3][name][1] for run in runs if name in run[3]) for name in packages}
+
+    print(f"runs: {args.runs} (medians)")
+    print(f"import app + create_app(): {startup_ms:.0f} ms, peak RSS {rss_mb:.1f} MB")
+    print(f"{'top-level import':<32}{'cumulative ms':>14}")
+    for name, us in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<32}{us / 1000:>14.1f}")
+
+    failed = False
+    eager = sorted(name for name in args.lazy.split(',') if name and name in loaded)
+    if eager:
+        print(f"FAIL: loaded at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if args.max_ms is not None and startup_ms > args.max_ms:
+        print(f"FAIL: startup {startup_ms:.0f} ms is over the {args.max_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+# Index benchmark: the hot queries before and after migrations 001 and 002,
+# on a synthetic dataset in a scratch database (dropped and recreated).
+#
+#   python benchmarks/bench_indexes.py [--classes 400] [--students-per-class 50]
+#                                      [--sessions-per-class 50] [--runs 20]
+#                                      [--host 127.0.0.1] [--user root] [--password ...]
+#                                      [--database attendance_bench]
+#
+# The defaults give 20,000 students, 20,000 sessions and 1,000,000 attendance
+# rows. Each query the routes run is timed (median of --runs) and EXPLAINed
+# against the original schema, then again after the migrations; the script
+# exits non-zero if a query does not use one of the indexes it is meant to use.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import MySQLdb
+import MySQLdb.cursors
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from finalize import FINALIZE_SQL  # noqa: E402
+
+MIGRATIONS = [
+    os.path.join(HERE, '..', 'migrations', '001_attendance_unique_student_session.sql'),
+    os.path.join(HERE, '..', 'migrations', '002_access_path_indexes.sql'),
+]
+
+# The schema as it was before the migrations (keys and indexes only from
+# the primary keys, UNIQUE columns and foreign keys).
+BASELINE_SCHEMA = [
+    """CREATE TABLE user (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        name VARCHAR(50) NOT NULL,
+        email VARCHAR(100) NOT NULL UNIQUE,
+        phone VARCHAR(15) NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        role ENUM('admin', 'teacher') NOT NULL
+    )""",
+    """CREATE TABLE student (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        name VARCHAR(50) NOT NULL,
+        class VARCHAR(50) NOT NULL,
+        email VARCHAR(100) NOT NULL UNIQUE,
+        phone VARCHAR(15) NOT NULL
+    )""",
+    """CREATE TABLE session (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        session_name VARCHAR(100) NOT NULL,
+        session_code VARCHAR(50) NOT NULL UNIQUE,
+        expiry_time DATETIME NOT NULL,
+        created_by INT NOT NULL,
+        class VARCHAR(50) NOT NULL,
+        CONSTRAINT fk_created_by FOREIGN KEY (created_by) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
+    )""",
+    """CREATE TABLE attendance (
+        id INT PRIMARY KEY AUTO_INCREMENT,
+        student_id INT NOT NULL,
+        session_id INT NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (student_id) REFERENCES student(id) ON DELETE CASCADE,
+        FOREIGN KEY (session_id) REFERENCES session(id) ON DELETE CASCADE
+    )""",
+]
+
+INSERT_CHUNK = 10000
+
+
+def class_name(i):
+    return f'CLASS-{i:04d}'
+
+
+def load_data(conn, args):
+    rng = random.Random(0)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO user (name, email, phone, password, role) VALUES "
+                "('Bench Teacher', 'bench@example.com', '0000000000', 'x', 'teacher')")
+    teacher_id = cur.lastrowid
+
+    students = []
+    for c in range(args.classes):
+        for _ in range(args.students_per_class):
+            n = len(students) + 1
+            students.append((n, f'Student {n}', class_name(c), f'student{n}@example.com', f'9{n:09d}'))
+    insert_chunks(cur, "INSERT INTO student (id, name, class, email, phone) VALUES (%s, %s, %s, %s, %s)", students)
+
+    # Sessions spread over the last two years, a few still to come.
+    now = datetime.now().replace(microsecond=0)
+    sessions = []
+    for c in range(args.classes):
+        for _ in range(args.sessions_per_class):
+            n = len(sessions) + 1
+            expiry = now - timedelta(days=730) + timedelta(minutes=rng.randrange(731 * 24 * 60))
+            sessions.append((n, f'Session {n}', f'BENCH_{n}', expiry, teacher_id, class_name(c)))
+    insert_chunks(cur, "INSERT INTO session (id, session_name, session_code, expiry_time, created_by, class) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)", sessions)
+
+    # Every student of the class has a row for every session of the class.
+    def attendance_rows():
+        for session_id, _, _, expiry, _, cls in sessions:
+            c = int(cls.split('-')[1])
+            first = c * args.students_per_class + 1
+            for student_id in range(first, first + args.students_per_class):
+                status = 'PRESENT' if rng.random() < 0.8 else 'ABSENT'
+                yield (student_id, session_id, status, expiry - timedelta(minutes=rng.randrange(60)))
+    insert_chunks(cur, "INSERT INTO attendance (student_id, session_id, status, timestamp) "
+                       "VALUES (%s, %s, %s, %s)", attendance_rows())
+    conn.commit()
+    for table in ('student', 'session', 'attendance'):
+        cur.execute(f"ANALYZE TABLE {table}")
+        cur.fetchall()
+    cur.close()
+    return len(students), len(sessions)
+
+
+def insert_chunks(cur, sql, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == INSERT_CHUNK:
+            cur.executemany(sql, chunk)
+            chunk = []
+    if chunk:
+        cur.executemany(sql, chunk)
+
+
+def apply_migrations(conn):
+    cur = conn.cursor()
+    for path in MIGRATIONS:
+        with open(path) as f:
+            lines = [line for line in f if not line.strip().startswith('--')]
+        for statement in ''.join(lines).split(';'):
+            statement = statement.strip()
+            if statement and not statement.upper().startswith('USE '):
+                cur.execute(statement)
+    conn.commit()
+    for table in ('student', 'session', 'attendance'):
+        cur.execute(f"ANALYZE TABLE {table}")
+        cur.fetchall()
+    cur.close()
+
+
+# (name, SQL, params factory, table whose access is checked, expected keys).
+# The statements are the ones the routes run; finalize's is the SELECT half of
+# its INSERT IGNORE ... SELECT.
+def make_queries(args, n_students, n_sessions):
+    rng = random.Random(1)
+    now = datetime.now().replace(microsecond=0)
+    finalize_batch = 20
+    finalize_select = FINALIZE_SQL[FINALIZE_SQL.index('SELECT'):].format(
+        placeholders=', '.join(['%s'] * finalize_batch))
+
+    def class_ids():
+        c = rng.randrange(args.classes)
+        first = c * args.students_per_class + 1
+        return c, list(range(first, first + args.students_per_class))
+
+    def roll_call_roster():
+        c, ids = class_ids()
+        return [class_name(c)] + ids
+
+    def roll_call_marked():
+        c, ids = class_ids()
+        return [c * args.sessions_per_class + rng.randrange(args.sessions_per_class) + 1] + ids
+
+    roster_placeholders = ', '.join(['%s'] * args.students_per_class)
+    return [
+        ('get_student_by_class',
+         "SELECT id, name, class, email, phone FROM student WHERE class = %s",
+         lambda: (class_name(rng.randrange(args.classes)),),
+         'student', ('idx_student_class',)),
+        (f'finalize anti-join ({finalize_batch} sessions)',
+         finalize_select,
+         lambda: [now] + rng.sample(range(1, n_sessions + 1), finalize_batch),
+         'a', ('uq_attendance_student_session',)),
+        ('finalize scheduler startup scan',
+         "SELECT id, expiry_time FROM session WHERE expiry_time >= %s AND id <= %s",
+         lambda: (now - timedelta(days=1), n_sessions),
+         'session', ('idx_session_expiry_time',)),
+        ('attendance_report first page',
+         """SELECT a.id, a.session_id, a.status, a.timestamp
+            FROM attendance a
+            WHERE a.student_id = %s
+            ORDER BY a.timestamp DESC, a.id DESC
+            LIMIT %s""",
+         lambda: (rng.randrange(1, n_students + 1), 51),
+         'a', ('idx_attendance_student_timestamp',)),
+        ('attendance_report next page',
+         """SELECT a.id, a.session_id, a.status, a.timestamp
+            FROM attendance a
+            WHERE a.student_id = %s AND (a.timestamp < %s OR (a.timestamp = %s AND a.id < %s))
+            ORDER BY a.timestamp DESC, a.id DESC
+            LIMIT %s""",
+         lambda: (rng.randrange(1, n_students + 1), now - timedelta(days=365), now - timedelta(days=365),
+                  n_sessions * args.students_per_class, 51),
+         'a', ('idx_attendance_student_timestamp',)),
+        ('attendance_report csv',
+         """SELECT a.session_id, a.status, a.timestamp
+            FROM attendance a
+            JOIN session s ON a.session_id = s.id
+            WHERE a.student_id = %s
+            ORDER BY a.timestamp DESC""",
+         lambda: (rng.randrange(1, n_students + 1),),
+         'a', ('idx_attendance_student_timestamp',)),
+        # Either key narrows the lookup to the class's students
+        ('roll_call roster',
+         f"SELECT id FROM student WHERE class = %s AND id IN ({roster_placeholders})",
+         roll_call_roster,
+         'student', ('idx_student_class', 'PRIMARY')),
+        ('roll_call already marked',
+         f"SELECT student_id FROM attendance WHERE session_id = %s AND student_id IN ({roster_placeholders})",
+         roll_call_marked,
+         'attendance', ('uq_attendance_student_session', 'session_id')),
+    ]
+
+
+def measure(conn, queries, runs):
+    results = {}
+    cur = conn.cursor(MySQLdb.cursors.DictCursor)
+    for name, sql, params, table, _ in queries:
+        cur.execute("EXPLAIN " + sql, params())
+        plan = [row for row in cur.fetchall() if row['table'] == table]
+        plan = plan[0] if plan else {}
+        times = []
+        for _ in range(runs):
+            p = params()
+            start = time.perf_counter()
+            cur.execute(sql, p)
+            cur.fetchall()
+            times.append(time.perf_counter() - start)
+        results[name] = {
+            'ms': statistics.median(times) * 1000,
+            'type': plan.get('type'),
+            'key': plan.get('key'),
+            'rows': plan.get('rows'),
+            'extra': plan.get('Extra') or '',
+        }
+    cur.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--classes', type=int, default=400)
+    parser.add_argument('--students-per-class', type=int, default=50)
+    parser.add_argument('--sessions-per-class', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    parser.add_argument('--database', default='attendance_bench')
+    args = parser.parse_args()
+
+    conn = MySQLdb.connect(host=args.host, user=args.user, passwd=args.password)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS {args.database}")
+    cur.execute(f"CREATE DATABASE {args.database}")
+    cur.execute(f"USE {args.database}")
+    for statement in BASELINE_SCHEMA:
+        cur.execute(statement)
+    cur.close()
+
+    start = time.perf_counter()
+    n_students, n_sessions = load_data(conn, args)
+    n_attendance = n_sessions * args.students_per_class
+    print(f"loaded {n_students} students, {n_sessions} sessions, {n_attendance} attendance rows "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    queries = make_queries(args, n_students, n_sessions)
+    before = measure(conn, queries, args.runs)
+    start = time.perf_counter()
+    apply_migrations(conn)
+    print(f"migrations applied in {time.perf_counter() - start:.1f}s\n")
+    after = measure(conn, queries, args.runs)
+
+    failures = []
+    print(f"{'query':<34}{'before ms':>10}{'after ms':>10}{'speedup':>9}  plan before -> after")
+    for name, _, _, _, expected_keys in queries:
+        b, a = before[name], after[name]
+        print(f"{name:<34}{b['ms']:>10.2f}{a['ms']:>10.2f}{b['ms'] / max(a['ms'], 1e-6):>8.1f}x  "
+              f"{b['type']}/{b['key']}/{b['rows']} rows -> {a['type']}/{a['key']}/{a['rows']} rows"
+              f"{'  [' + a['extra'] + ']' if a['extra'] else ''}")
+        if a['key'] not in expected_keys:
+            failures.append(f"{name}: expected key {' or '.join(expected_keys)}, EXPLAIN chose {a['key']}")
+        if 'filesort' in a['extra'] and name.startswith('attendance_report'):
+            failures.append(f"{name}: still sorts with a filesort")
+
+    conn.close()
+    if failures:
+        print('\n' + '\n'.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
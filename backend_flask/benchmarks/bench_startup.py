@@ -0,0 +1,113 @@
+# Startup benchmark: time and memory to bring up N workers, each importing
+# and building the app itself (no preload) vs building it once and forking
+# the workers from it (preload_app in gunicorn.conf.py). Linux only (fork,
+# /proc). No database is needed: pools connect on first use and background
+# threads are disabled.
+#
+#   python benchmarks/bench_startup.py [--workers 8] [--runs 3]
+#
+# "private MB" is each worker's unshared memory (Private_Clean + Private_Dirty
+# from /proc/<pid>/smaps_rollup), i.e. what one more worker really costs.
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+ENV = dict(os.environ, START_BACKGROUND_TASKS='0', FINALIZE_SCHEDULER='0', QR_TOKEN_SECRET='bench')
+
+# A worker: build the app, report ready, wait to be measured and killed.
+WORKER = """
+import sys, time
+start = time.perf_counter()
+from wsgi import app
+sys.stdout.write(f"{time.perf_counter() - start}\\n")
+sys.stdout.flush()
+sys.stdin.read()
+"""
+
+# A master: build the app once, fork the workers, report when all are ready.
+PRELOAD = """
+import os, sys, time
+start = time.perf_counter()
+from wsgi import app
+import app as app_module
+load = time.perf_counter() - start
+pids = []
+for _ in range(int(sys.argv[1])):
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        app_module.after_fork(app)
+        os.write(w, b'1')
+        os.close(w)
+        time.sleep(3600)
+        os._exit(0)
+    os.close(w)
+    os.read(r, 1)
+    os.close(r)
+    pids.append(pid)
+sys.stdout.write(f"{load} {time.perf_counter() - start} {' '.join(map(str, pids))}\\n")
+sys.stdout.flush()
+sys.stdin.read()
+for pid in pids:
+    os.kill(pid, 9)
+"""
+
+
+def private_mb(pid):
+    total_kb = 0
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total_kb += int(line.split()[1])
+    return total_kb / 1024
+
+
+def without_preload(n):
+    start = time.perf_counter()
+    procs = [subprocess.Popen([sys.executable, '-c', WORKER], cwd=APP_DIR, env=ENV, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE) for _ in range(n)]
+    loads = [float(p.stdout.readline()) for p in procs]
+    elapsed = time.perf_counter() - start
+    memory = [private_mb(p.pid) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return {'ready_s': elapsed, 'load_s': statistics.median(loads), 'worker_private_mb': statistics.median(memory)}
+
+
+def with_preload(n):
+    start = time.perf_counter()
+    master = subprocess.Popen([sys.executable, '-c', PRELOAD, str(n)], cwd=APP_DIR, env=ENV, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    fields = master.stdout.readline().split()
+    elapsed = time.perf_counter() - start
+    memory = [private_mb(int(pid)) for pid in fields[2:]]
+    master.stdin.close()
+    master.wait()
+    return {'ready_s': elapsed, 'load_s': float(fields[0]), 'worker_private_mb': statistics.median(memory)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for name, fn in [('no preload', without_preload), ('preload + fork', with_preload)]:
+        runs = [fn(args.workers) for _ in range(args.runs)]
+        results[name] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+    print(f"workers: {args.workers}, runs: {args.runs} (medians)")
+    print(f"{'mode':<18}{'app load s':>12}{'all ready s':>13}{'private MB/worker':>19}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['load_s']:>12.3f}{r['ready_s']:>13.3f}{r['worker_private_mb']:>19.1f}")
+
+
+if __name__ == '__main__':
+    main()
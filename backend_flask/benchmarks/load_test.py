@@ -0,0 +1,151 @@
+# Load test: many concurrent attendance scans against the sync (Werkzeug)
+# server and the ASGI server (asgi.py).
+#
+#   python benchmarks/load_test.py --compare --session-id 1-2 --students 1-2000
+#   python benchmarks/load_test.py --url http://127.0.0.1:8000 --session-id 3
+#
+# --compare starts each server in turn on --port (needs the database that
+# app.py is configured for), fires the same load at it and prints both
+# results. Each request is a /mark_attendance scan for the next student id in
+# --students, taken from inside the default geofence. Use a fresh session for
+# every run (--compare takes one per server, e.g. 1-2), or later runs measure
+# 409 already_marked responses. Responses below 500 count as successes.
+# Needs httpx.
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CAMPUS = (20.2961, 85.8245)
+
+SERVERS = {
+    'sync': lambda port: [sys.executable, '-c', f'from app import create_app; create_app().run(port={port}, threaded=True)'],
+    'asgi': lambda port: [sys.executable, 'asgi.py'],
+}
+
+
+def parse_range(text):
+    first, _, last = text.partition('-')
+    return list(range(int(first), int(last or first) + 1))
+
+
+async def run_load(url, session_id, student_ids, total, concurrency, token=None):
+    latencies = []
+    statuses = {}
+    errors = 0
+    in_flight = 0
+    max_in_flight = 0
+    queue = asyncio.Queue()
+    for n in range(total):
+        queue.put_nowait(student_ids[n % len(student_ids)])
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors, in_flight, max_in_flight
+            while True:
+                try:
+                    student_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                payload = {'student_id': student_id, 'session_id': session_id,
+                           'latitude': CAMPUS[0], 'longitude': CAMPUS[1]}
+                if token:
+                    payload['token'] = token
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                start = time.perf_counter()
+                try:
+                    response = await client.post('/mark_attendance', json=payload)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                finally:
+                    latencies.append(time.perf_counter() - start)
+                    in_flight -= 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': total,
+        'seconds': elapsed,
+        'rps': total / elapsed,
+        'p50_ms': quantiles[49] * 1000,
+        'p95_ms': quantiles[94] * 1000,
+        'p99_ms': quantiles[98] * 1000,
+        'errors': errors,
+        'max_in_flight': max_in_flight,
+        'statuses': statuses,
+    }
+
+
+def wait_for_port(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url + '/finalize_status', timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server at {url} did not come up')
+
+
+def serve_and_load(kind, session_id, args):
+    env = dict(os.environ, PORT=str(args.port), LOG_LEVEL='warning')
+    env.setdefault('QR_TOKEN_REQUIRED', '0')  # scans only carry a token with --token
+    server = subprocess.Popen(SERVERS[kind](args.port), cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{args.port}'
+    try:
+        wait_for_port(url)
+        return asyncio.run(run_load(url, session_id, args.students, args.requests,
+                                    args.concurrency, args.token))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def print_results(results):
+    print(f"{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'errors':>8}{'in flight':>11}  statuses")
+    for name, r in results.items():
+        print(f"{name:<8}{r['rps']:>10.0f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['errors']:>8}{r['max_in_flight']:>11}  {r['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--compare', action='store_true', help='start and test the sync and ASGI servers')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--session-id', type=parse_range, required=True, help='session id (a range for --compare)')
+    parser.add_argument('--students', type=parse_range, default=parse_range('1-1000'), help='id range, e.g. 1-2000')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--token', help='QR token to send with every scan')
+    args = parser.parse_args()
+
+    if args.compare:
+        if len(args.session_id) < len(SERVERS):
+            parser.error(f'--compare needs {len(SERVERS)} fresh sessions, e.g. --session-id 1-{len(SERVERS)}')
+        results = {kind: serve_and_load(kind, session_id, args) for kind, session_id in zip(SERVERS, args.session_id)}
+    else:
+        results = {'target': asyncio.run(run_load(args.url, args.session_id[0], args.students, args.requests,
+                                                  args.concurrency, args.token))}
+    print_results(results)
+
+
+if __name__ == '__main__':
+    main()
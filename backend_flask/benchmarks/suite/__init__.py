@@ -0,0 +1,3 @@
+# Reproducible end-to-end benchmarks: datagen seeds a synthetic campus,
+# workloads describes a day's traffic, run replays it and reports per-endpoint
+# latency percentiles and throughput. See run.py.
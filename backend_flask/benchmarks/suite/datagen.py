@@ -0,0 +1,222 @@
+# Synthetic campus for the benchmark suite, loaded into a scratch MySQL (or
+# MariaDB) database that is dropped and recreated from database_schema.sql,
+# or with --backend sqlite into a fresh SQLite file (--sqlite-path):
+#
+#   - one admin and one teacher per --classes-per-teacher classes
+#   - --classes classes of --students-per-class students
+#   - --past-sessions-per-class expired sessions per class over the last
+#     --days days, each with a PRESENT/ABSENT row for every student of the
+#     class (attendance_summary is filled to match)
+#   - --open-sessions-per-class sessions per class still open, for the scan
+#     burst and finalize workloads to hit
+#
+# Everything is drawn from a seeded random.Random, so the same arguments give
+# the same data. The returned manifest (also written by --manifest) says
+# which ids the workloads can use.
+#
+#   python -m benchmarks.suite.datagen --database attendance_bench [--classes 40] ...
+#   python -m benchmarks.suite.datagen --backend sqlite --sqlite-path bench.db ...
+import argparse
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+import MySQLdb
+
+import sqlite_store
+
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'database_schema.sql')
+INSERT_CHUNK = 5000
+
+SUMMARY_BACKFILL = """
+    INSERT INTO attendance_summary (student_id, class, present_count, absent_count)
+    SELECT a.student_id, s.class, SUM(a.status = 'PRESENT'), SUM(a.status = 'ABSENT')
+    FROM attendance a
+    JOIN session s ON s.id = a.session_id
+    GROUP BY a.student_id, s.class
+"""
+
+
+def add_arguments(parser):
+    parser.add_argument('--backend', choices=('mysql', 'sqlite'), default='mysql')
+    parser.add_argument('--sqlite-path', default='attendance_bench.db')
+    parser.add_argument('--host', default=os.environ.get('MYSQL_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('MYSQL_PORT', 3306)))
+    parser.add_argument('--user', default=os.environ.get('MYSQL_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    parser.add_argument('--database', default='attendance_bench')
+    parser.add_argument('--classes', type=int, default=40)
+    parser.add_argument('--students-per-class', type=int, default=60)
+    parser.add_argument('--classes-per-teacher', type=int, default=4)
+    parser.add_argument('--past-sessions-per-class', type=int, default=60)
+    parser.add_argument('--open-sessions-per-class', type=int, default=1)
+    parser.add_argument('--days', type=int, default=90, help='past sessions are spread over this many days')
+    parser.add_argument('--attendance-rate', type=float, default=0.85)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def schema_statements(path=SCHEMA):
+    # database_schema.sql minus its comments and the CREATE DATABASE / USE
+    # lines, so it can be loaded into any database.
+    with open(path) as f:
+        text = re.sub(r'--[^\n]*', '', f.read())
+    statements = [statement.strip() for statement in text.split(';')]
+    return [statement for statement in statements
+            if statement and not re.match(r'(CREATE\s+DATABASE|USE)\b', statement, re.IGNORECASE)]
+
+
+def class_name(i):
+    return f'BENCH-{i:03d}'
+
+
+def insert_chunks(cur, sql, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == INSERT_CHUNK:
+            cur.executemany(sql, chunk)
+            chunk = []
+    if chunk:
+        cur.executemany(sql, chunk)
+
+
+def recreate_database(args):
+    if args.backend == 'sqlite':
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.sqlite_path + suffix):
+                os.remove(args.sqlite_path + suffix)
+        sqlite_store.create_schema(args.sqlite_path)
+        return sqlite_store.connect(args.sqlite_path)
+    conn = MySQLdb.connect(host=args.host, port=args.port, user=args.user, passwd=args.password)
+    cur = conn.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS {args.database}")
+    cur.execute(f"CREATE DATABASE {args.database}")
+    cur.execute(f"USE {args.database}")
+    for statement in schema_statements():
+        cur.execute(statement)
+    cur.close()
+    return conn
+
+
+# Load the campus into conn's (empty) database and return its manifest.
+def load_campus(conn, args, now=None):
+    rng = random.Random(args.seed)
+    now = (now or datetime.now()).replace(microsecond=0)
+    classes = [class_name(i) for i in range(args.classes)]
+    cur = conn.cursor()
+
+    cur.execute("INSERT INTO user (name, email, phone, password, role) VALUES "
+                "('Bench Admin', 'admin@bench.example', '0000000000', 'x', 'ADMIN')")
+    admin_id = cur.lastrowid
+    teacher_of = {}
+    teachers = []
+    for i, cls in enumerate(classes):
+        if i % args.classes_per_teacher == 0:
+            n = len(teachers) + 1
+            cur.execute("INSERT INTO user (name, email, phone, password, role) VALUES (%s, %s, %s, 'x', 'TEACHER')",
+                        (f'Teacher {n}', f'teacher{n}@bench.example', f'8{n:09d}'))
+            teachers.append(cur.lastrowid)
+        teacher_of[cls] = teachers[-1]
+
+    students = {}
+    student_rows = []
+    for cls in classes:
+        first = len(student_rows) + 1
+        for n in range(first, first + args.students_per_class):
+            student_rows.append((n, f'Student {n}', cls, f'student{n}@bench.example', f'9{n:09d}'))
+        students[cls] = [first, first + args.students_per_class - 1]
+    insert_chunks(cur, "INSERT INTO student (id, name, class, email, phone) VALUES (%s, %s, %s, %s, %s)",
+                  student_rows)
+
+    # Past sessions on the hour between 9:00 and 16:00; open ones expire later today.
+    past = []
+    open_sessions = []
+    session_rows = []
+    for cls in classes:
+        for _ in range(args.past_sessions_per_class):
+            day = now.date() - timedelta(days=rng.randrange(1, args.days + 1))
+            expiry = datetime(day.year, day.month, day.day, rng.randrange(9, 17))
+            session_rows.append((len(session_rows) + 1, cls, expiry))
+            past.append(len(session_rows))
+        for _ in range(args.open_sessions_per_class):
+            session_rows.append((len(session_rows) + 1, cls, now + timedelta(hours=2)))
+            open_sessions.append(len(session_rows))
+    insert_chunks(cur, "INSERT INTO session (id, session_name, session_code, expiry_time, created_by, class) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)",
+                  ((n, f'Lecture {n}', f'BENCH_{n}', expiry, teacher_of[cls], cls) for n, cls, expiry in session_rows))
+
+    # Each student has their own habit around the campus-wide rate.
+    habit = {n: min(1.0, max(0.0, rng.gauss(args.attendance_rate, 0.1))) for n in range(1, len(student_rows) + 1)}
+
+    def attendance_rows():
+        for n, cls, expiry in session_rows:
+            if expiry > now:
+                continue
+            first, last = students[cls]
+            for student_id in range(first, last + 1):
+                status = 'PRESENT' if rng.random() < habit[student_id] else 'ABSENT'
+                yield (student_id, n, status, expiry - timedelta(minutes=rng.randrange(60)))
+    insert_chunks(cur, "INSERT INTO attendance (student_id, session_id, status, timestamp) "
+                       "VALUES (%s, %s, %s, %s)", attendance_rows())
+    cur.execute(SUMMARY_BACKFILL)
+    conn.commit()
+    if getattr(conn, 'dialect', 'mysql') == 'sqlite':
+        cur.execute("ANALYZE")
+        conn.commit()
+    else:
+        for table in ('user', 'student', 'session', 'attendance', 'attendance_summary'):
+            cur.execute(f"ANALYZE TABLE {table}")
+            cur.fetchall()
+    cur.close()
+
+    return {
+        'database': args.sqlite_path if args.backend == 'sqlite' else args.database,
+        'seed': args.seed,
+        'generated_at': now.isoformat(),
+        'admin_id': admin_id,
+        'teachers': teachers,
+        'teacher_of': teacher_of,
+        'students': students,  # class -> [first id, last id]
+        'past_sessions': past,
+        'open_sessions': open_sessions,
+        'session_class': {str(n): cls for n, cls, _ in session_rows},
+        'counts': {
+            'classes': len(classes),
+            'teachers': len(teachers),
+            'students': len(student_rows),
+            'sessions': len(session_rows),
+            'attendance': len(past) * args.students_per_class,
+        },
+    }
+
+
+def seed_campus(args):
+    start = time.perf_counter()
+    conn = recreate_database(args)
+    try:
+        manifest = load_campus(conn, args)
+    finally:
+        conn.close()
+    manifest['seconds'] = round(time.perf_counter() - start, 1)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    parser.add_argument('--manifest', default='campus.json', help='where to write the manifest')
+    args = parser.parse_args()
+
+    manifest = seed_campus(args)
+    with open(args.manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    counts = manifest['counts']
+    print(f"seeded {manifest['database']}: {counts['students']} students, {counts['sessions']} sessions, "
+          f"{counts['attendance']} attendance rows in {manifest['seconds']}s -> {args.manifest}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+# Benchmark suite: seed a synthetic campus (datagen), start the app against
+# it, replay a day's workloads (workloads.py) and report latency percentiles
+# and throughput per endpoint, as a table and as JSON for tracking over time.
+#
+#   python -m benchmarks.suite.run --password ... [--server gunicorn|asgi|sync]
+#                                  [--workloads scan_burst,finalize,browse]
+#                                  [--out results.json] [--history history.jsonl]
+#   python -m benchmarks.suite.run --backend sqlite --sqlite-path bench.db --server gunicorn
+#   python -m benchmarks.suite.run --url http://127.0.0.1:8000 --no-seed --manifest campus.json
+#
+# Run it from backend_flask/. By default the database is reseeded (and the
+# server started) for every run, so runs are comparable: same data, same
+# requests in the same order (--seed). With --url the server is not started
+# and must already be using the seeded database. The finalize scheduler is
+# off in the started server so it doesn't compete with the workloads.
+# Responses below 500 count as successes (a rescan's 409 is expected).
+# Needs httpx, and a MySQL or MariaDB server unless --backend sqlite, which
+# runs the same suite against an embedded SQLite file.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from benchmarks.load_test import wait_for_port
+from benchmarks.suite import datagen
+from benchmarks.suite.workloads import WORKLOADS
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+SERVERS = {
+    'gunicorn': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+    'asgi': lambda port: [sys.executable, 'asgi.py'],
+    'sync': lambda port: [sys.executable, '-c', f'from app import create_app; create_app().run(port={port}, threaded=True)'],
+}
+
+
+def summarize(latencies, seconds):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / seconds, 1) if seconds else 0.0,
+        'p50_ms': round(quantiles[49] * 1000, 2),
+        'p95_ms': round(quantiles[94] * 1000, 2),
+        'p99_ms': round(quantiles[98] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+
+async def replay(url, workload, timeout=60):
+    latencies = {}
+    statuses = {}
+    errors = {}
+    calls = iter(workload.calls)
+    limits = httpx.Limits(max_connections=workload.concurrency, max_keepalive_connections=workload.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            for call in calls:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(call.method, call.path, params=call.params, json=call.json)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 'error'
+                latencies.setdefault(call.endpoint, []).append(time.perf_counter() - start)
+                by_status = statuses.setdefault(call.endpoint, {})
+                by_status[str(status)] = by_status.get(str(status), 0) + 1
+                if status == 'error' or status >= 500:
+                    errors[call.endpoint] = errors.get(call.endpoint, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(workload.concurrency)])
+        elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for endpoint, values in sorted(latencies.items()):
+        endpoints[endpoint] = summarize(values, elapsed)
+        endpoints[endpoint]['errors'] = errors.get(endpoint, 0)
+        endpoints[endpoint]['statuses'] = statuses[endpoint]
+    total = summarize([value for values in latencies.values() for value in values], elapsed)
+    total['errors'] = sum(errors.values())
+    return {'concurrency': workload.concurrency, 'seconds': round(elapsed, 3), 'total': total, 'endpoints': endpoints}
+
+
+def start_server(args):
+    env = dict(os.environ, MYSQL_HOST=args.host, MYSQL_PORT=str(args.port), MYSQL_USER=args.user,
+               MYSQL_PASSWORD=args.password, MYSQL_DB=args.database, FINALIZE_SCHEDULER='0',
+               STORAGE_BACKEND=args.backend, SQLITE_PATH=os.path.abspath(args.sqlite_path),
+               PORT=str(args.server_port), BIND=f'127.0.0.1:{args.server_port}', LOG_LEVEL='warning')
+    if args.workers:
+        env['WEB_CONCURRENCY'] = str(args.workers)
+    # The scans are built up front, so they can't carry the rotating QR token
+    env.setdefault('QR_TOKEN_REQUIRED', '0')
+    server = subprocess.Popen(SERVERS[args.server](args.server_port), cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{args.server_port}'
+    try:
+        wait_for_port(url)
+    except RuntimeError:
+        server.terminate()
+        raise
+    return server, url
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'workload':<12}{'endpoint':<24}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'errors':>8}")
+    for name, workload in results['workloads'].items():
+        rows = list(workload['endpoints'].items()) + [('(all)', workload['total'])]
+        for endpoint, r in rows:
+            print(f"{name:<12}{endpoint:<24}{r['requests']:>9}{r['rps']:>9.0f}{r['p50_ms']:>9.1f}"
+                  f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['errors']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    datagen.add_arguments(parser)
+    parser.add_argument('--no-seed', action='store_true', help='reuse the database described by --manifest')
+    parser.add_argument('--manifest', default='campus.json')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS))
+    parser.add_argument('--server', choices=SERVERS, default='gunicorn')
+    parser.add_argument('--server-port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, help='gunicorn workers (WEB_CONCURRENCY)')
+    parser.add_argument('--url', help='benchmark an already running server instead of starting one')
+    parser.add_argument('--out', help='write the results as JSON here')
+    parser.add_argument('--history', help='append the results as one JSON line here')
+    args = parser.parse_args()
+
+    names = [name for name in args.workloads.split(',') if name]
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown)} (choose from {', '.join(WORKLOADS)})")
+
+    if args.no_seed:
+        with open(args.manifest) as f:
+            campus = json.load(f)
+    else:
+        campus = datagen.seed_campus(args)
+        with open(args.manifest, 'w') as f:
+            json.dump(campus, f, indent=2)
+    print(f"campus: {campus['counts']}", file=sys.stderr)
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server(args)
+    rng = random.Random(args.seed)
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'server': 'external' if args.url else args.server,
+        'backend': args.backend,
+        'workers': args.workers,
+        'python': platform.python_version(),
+        'seed': args.seed,
+        'dataset': campus['counts'],
+        'workloads': {},
+    }
+    try:
+        for name in names:
+            workload = WORKLOADS[name](campus, rng)
+            results['workloads'][name] = asyncio.run(replay(url, workload))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_results(results)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.history:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(results) + '\n')
+
+
+if __name__ == '__main__':
+    main()
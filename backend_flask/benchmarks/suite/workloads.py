@@ -0,0 +1,112 @@
+# Workloads replayed by benchmarks.suite.run against a campus seeded by
+# datagen. Each one is a list of Calls built up front from a seeded
+# random.Random, so a run with the same manifest and seed sends the same
+# requests in the same order; `concurrency` clients work through the list.
+#
+#   scan_burst  the 9am rush: every student of each open session scans its QR
+#               code once (a few scan twice), while the teachers' screens
+#               keep fetching the QR image
+#   finalize    end of day: the open sessions are finalized in batches
+#   browse      teachers and students browsing reports, rosters and analytics
+from collections import namedtuple
+
+CAMPUS = (20.2961, 85.8245)  # app.ALLOWED_LOCATION
+JITTER = 0.0003  # degrees, about 30 m: well inside the 100 m geofence
+
+Call = namedtuple('Call', 'endpoint method path params json')
+Workload = namedtuple('Workload', 'name calls concurrency')
+
+
+def _get(endpoint, path, params):
+    return Call(endpoint, 'GET', path, params, None)
+
+
+def _post(endpoint, path, json):
+    return Call(endpoint, 'POST', path, None, json)
+
+
+def _students(campus, cls):
+    first, last = campus['students'][cls]
+    return range(first, last + 1)
+
+
+def scan_burst(campus, rng, concurrency=200, rescan_rate=0.02, attendance_rate=0.9, qr_every=50):
+    scans = []
+    for session_id in campus['open_sessions']:
+        for student_id in _students(campus, campus['session_class'][str(session_id)]):
+            if rng.random() >= attendance_rate:
+                continue
+            payload = {'student_id': student_id, 'session_id': session_id,
+                       'latitude': CAMPUS[0] + rng.uniform(-JITTER, JITTER),
+                       'longitude': CAMPUS[1] + rng.uniform(-JITTER, JITTER)}
+            scans.append(_post('mark_attendance', '/mark_attendance', payload))
+            if rng.random() < rescan_rate:
+                scans.append(_post('mark_attendance', '/mark_attendance', dict(payload)))
+    rng.shuffle(scans)
+
+    calls = []
+    for n, scan in enumerate(scans):
+        calls.append(scan)
+        if n % qr_every == 0:
+            session_id = scan.json['session_id']
+            teacher = campus['teacher_of'][campus['session_class'][str(session_id)]]
+            calls.append(_get('qr_image', f'/qr/{session_id}.png', {'requesting_user_id': teacher}))
+    return Workload('scan_burst', calls, concurrency)
+
+
+def finalize(campus, rng, concurrency=4, batch_size=20):
+    sessions = list(campus['open_sessions'])
+    rng.shuffle(sessions)
+    calls = [_post('finalize_attendance', '/finalize_attendance', {'session_ids': sessions[i:i + batch_size]})
+             for i in range(0, len(sessions), batch_size)]
+    return Workload('finalize', calls, concurrency)
+
+
+def browse(campus, rng, concurrency=32, requests=3000):
+    classes = list(campus['students'])
+    past = campus['past_sessions']
+    n_students = campus['counts']['students']
+
+    def attendance_report():
+        return _get('attendance_report', '/attendance_report',
+                    {'student_id': rng.randint(1, n_students), 'limit': 50})
+
+    def session_attendance():
+        session_id = rng.choice(past)
+        teacher = campus['teacher_of'][campus['session_class'][str(session_id)]]
+        return _get('get_session_attendance', '/get_session_attendance',
+                    {'session_id': session_id, 'request_id': teacher})
+
+    def sessions_page():
+        return _get('get_sessions', '/get_sessions',
+                    {'id': rng.choice(campus['teachers']), 'limit': 100,
+                     'after_id': rng.randrange(0, max(len(past) - 100, 1))})
+
+    def class_roster():
+        cls = rng.choice(classes)
+        return _get('get_student_by_class', '/get_student_by_class',
+                    {'class_name': cls, 'request_id': campus['teacher_of'][cls]})
+
+    def all_students_page():
+        return _get('get_all_student', '/get_all_student',
+                    {'request_id': campus['admin_id'], 'limit': 100,
+                     'after_id': rng.randrange(0, max(n_students - 100, 1))})
+
+    def analytics():
+        cls = rng.choice(classes)
+        return _get('class_analytics', '/class_analytics', {'class': cls, 'request_id': campus['teacher_of'][cls]})
+
+    mix = [(attendance_report, 35), (session_attendance, 20), (class_roster, 15),
+           (sessions_page, 10), (all_students_page, 10), (analytics, 10)]
+    makers = [maker for maker, _ in mix]
+    weights = [weight for _, weight in mix]
+    calls = [rng.choices(makers, weights)[0]() for _ in range(requests)]
+    return Workload('browse', calls, concurrency)
+
+
+# In the order a day runs them.
+WORKLOADS = {
+    'scan_burst': scan_burst,
+    'finalize': finalize,
+    'browse': browse,
+}
@@ -19,7 +19,8 @@ CREATE TABLE student (
     name VARCHAR(50) NOT NULL,
     class VARCHAR(50) NOT NULL,
     email VARCHAR(100) NOT NULL UNIQUE,
-    phone VARCHAR(15) NOT NULL
+    phone VARCHAR(15) NOT NULL,
+    INDEX idx_student_class (class)
 );
 
 -- Session Table
@@ -30,7 +31,8 @@ CREATE TABLE session (
     expiry_time DATETIME NOT NULL,
     created_by int not null,
     class VARCHAR(50) NOT NULL,
-    ADD CONSTRAINT fk_created_by FOREIGN KEY (created_by) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
+    INDEX idx_session_expiry_time (expiry_time),
+    CONSTRAINT fk_created_by FOREIGN KEY (created_by) REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
 -- Attendance Table
@@ -40,6 +42,19 @@ CREATE TABLE attendance (
     session_id INT NOT NULL,
     status VARCHAR(10) NOT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_attendance_student_session (student_id, session_id),
+    INDEX idx_attendance_student_timestamp (student_id, timestamp),
     FOREIGN KEY (student_id) REFERENCES student(id) ON DELETE CASCADE,
     FOREIGN KEY (session_id) REFERENCES session(id) ON DELETE CASCADE
 );
+
+-- Attendance totals per student and session class (kept in step with
+-- attendance by the app, see summary.py)
+CREATE TABLE attendance_summary (
+    student_id INT NOT NULL,
+    class VARCHAR(50) NOT NULL,
+    present_count INT NOT NULL DEFAULT 0,
+    absent_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, class),
+    FOREIGN KEY (student_id) REFERENCES student(id) ON DELETE CASCADE
+);
@@ -0,0 +1,60 @@
+-- SQLite version of database_schema.sql, for STORAGE_BACKEND=sqlite.
+-- Created automatically on first connection (see sqlite_store.py), so every
+-- statement must be safe to run again. Text columns that MySQL compares
+-- case-insensitively use COLLATE NOCASE, and DATETIME columns hold
+-- 'YYYY-MM-DD HH:MM:SS[.ffffff]' local times, which sort correctly as text.
+
+-- user Table
+CREATE TABLE IF NOT EXISTS user (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(50) NOT NULL,
+    email VARCHAR(100) NOT NULL UNIQUE COLLATE NOCASE,
+    phone VARCHAR(15) NOT NULL,
+    password VARCHAR(255) NOT NULL,
+    role VARCHAR(10) NOT NULL COLLATE NOCASE CHECK (role IN ('ADMIN', 'TEACHER'))
+);
+
+-- Student Table
+CREATE TABLE IF NOT EXISTS student (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(50) NOT NULL,
+    class VARCHAR(50) NOT NULL COLLATE NOCASE,
+    email VARCHAR(100) NOT NULL UNIQUE COLLATE NOCASE,
+    phone VARCHAR(15) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_student_class ON student (class);
+
+-- Session Table
+CREATE TABLE IF NOT EXISTS session (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_name VARCHAR(100) NOT NULL,
+    session_code VARCHAR(50) NOT NULL UNIQUE,
+    expiry_time DATETIME NOT NULL,
+    created_by INTEGER NOT NULL REFERENCES user(id) ON DELETE CASCADE ON UPDATE CASCADE,
+    class VARCHAR(50) NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS idx_session_expiry_time ON session (expiry_time);
+-- InnoDB indexes foreign keys by itself; SQLite needs them spelled out
+CREATE INDEX IF NOT EXISTS idx_session_created_by ON session (created_by);
+
+-- Attendance Table
+CREATE TABLE IF NOT EXISTS attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id INTEGER NOT NULL REFERENCES student(id) ON DELETE CASCADE,
+    session_id INTEGER NOT NULL REFERENCES session(id) ON DELETE CASCADE,
+    status VARCHAR(10) NOT NULL,
+    timestamp DATETIME DEFAULT (datetime('now', 'localtime')),
+    CONSTRAINT uq_attendance_student_session UNIQUE (student_id, session_id)
+);
+CREATE INDEX IF NOT EXISTS idx_attendance_student_timestamp ON attendance (student_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_attendance_session ON attendance (session_id);
+
+-- Attendance totals per student and session class (kept in step with
+-- attendance by the app, see summary.py)
+CREATE TABLE IF NOT EXISTS attendance_summary (
+    student_id INTEGER NOT NULL REFERENCES student(id) ON DELETE CASCADE,
+    class VARCHAR(50) NOT NULL COLLATE NOCASE,
+    present_count INTEGER NOT NULL DEFAULT 0,
+    absent_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, class)
+) WITHOUT ROWID;
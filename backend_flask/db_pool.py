@@ -0,0 +1,299 @@
+import threading
+import time
+from collections import deque
+
+import MySQLdb
+from MySQLdb import cursors
+from flask import current_app, g
+
+
+# Raised when no connection frees up within MYSQL_POOL_TIMEOUT. It subclasses
+# MySQLdb.OperationalError so the routes' existing `except MySQLdb.Error`
+# handlers turn it into a normal 500 response.
+class PoolTimeoutError(MySQLdb.OperationalError):
+    pass
+
+
+# Bounded pool of database connections shared by every request in the
+# process; connect() opens a new one (MySQLdb, or sqlite_store's wrapper).
+# Idle connections are kept LIFO so the hot ones stay warm and the cold ones
+# sink to the bottom, where they are evicted once they exceed max_idle.
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=5.0, max_idle=300.0, ping_interval=30.0):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_interval = ping_interval
+        self._idle = deque()  # (connection, last_used) pairs, most recent on the right
+        self._size = 0  # open connections, idle or checked out
+        self._waiting = 0  # threads blocked in acquire()
+        self._cond = threading.Condition()
+        self._metrics = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'idle_evictions': 0,
+            'health_check_failures': 0,
+            'acquired': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'timeouts': 0,
+        }
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        while True:
+            conn = None
+            last_used = None
+            create = False
+            with self._cond:
+                self._evict_idle_locked(time.monotonic())
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                    create = True
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f'Timed out after {self.timeout}s waiting for a database connection '
+                            f'(pool size {self.max_size}).')
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    continue
+
+            if create:
+                try:
+                    conn = self.connect()
+                except Exception:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._metrics['connections_created'] += 1
+            elif time.monotonic() - last_used >= self.ping_interval and not self._healthy(conn):
+                self._close(conn)
+                continue
+
+            self._record_acquire(time.monotonic() - start, waited)
+            return conn
+
+    def release(self, conn):
+        # End whatever transaction the request left open so the next borrower
+        # starts from a clean snapshot, and drop connections that can't.
+        try:
+            conn.rollback()
+        except Exception:
+            self._close(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._metrics)
+            stats['max_size'] = self.max_size
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['waiting'] = self._waiting
+        return stats
+
+    def _healthy(self, conn):
+        try:
+            conn.ping()
+            return True
+        except MySQLdb.Error:
+            with self._cond:
+                self._metrics['health_check_failures'] += 1
+            return False
+
+    def _evict_idle_locked(self, now):
+        # The oldest idle connections are on the left.
+        while self._idle and now - self._idle[0][1] >= self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._metrics['idle_evictions'] += 1
+            self._metrics['connections_closed'] += 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._metrics['connections_closed'] += 1
+        self._forget()
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _record_acquire(self, wait, waited):
+        with self._cond:
+            self._metrics['acquired'] += 1
+            if waited:
+                self._metrics['waits'] += 1
+                self._metrics['wait_seconds_total'] += wait
+                self._metrics['wait_seconds_max'] = max(self._metrics['wait_seconds_max'], wait)
+
+
+# Drop-in replacement for flask_mysqldb.MySQL: `mysql.connection` still hands
+# each app context one connection, but it is borrowed from the pool and given
+# back on teardown instead of being opened and closed per request.
+class PooledMySQL:
+    def __init__(self, app=None):
+        self.app = app
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        # Optional hook that wraps each request's connection (e.g. for query
+        # instrumentation); the pool itself only ever sees the raw connection.
+        self.wrap_connection = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MYSQL_HOST', 'localhost')
+        app.config.setdefault('MYSQL_USER', None)
+        app.config.setdefault('MYSQL_PASSWORD', None)
+        app.config.setdefault('MYSQL_DB', None)
+        app.config.setdefault('MYSQL_PORT', 3306)
+        app.config.setdefault('MYSQL_UNIX_SOCKET', None)
+        app.config.setdefault('MYSQL_CONNECT_TIMEOUT', 10)
+        app.config.setdefault('MYSQL_USE_UNICODE', True)
+        app.config.setdefault('MYSQL_CHARSET', 'utf8')
+        app.config.setdefault('MYSQL_SQL_MODE', None)
+        app.config.setdefault('MYSQL_CURSORCLASS', None)
+        app.config.setdefault('MYSQL_CUSTOM_OPTIONS', None)
+        # Pool tuning
+        app.config.setdefault('MYSQL_POOL_SIZE', 10)  # max open connections per process
+        app.config.setdefault('MYSQL_POOL_TIMEOUT', 5)  # seconds to wait for a free connection
+        app.config.setdefault('MYSQL_POOL_MAX_IDLE', 300)  # seconds before an idle connection is closed
+        app.config.setdefault('MYSQL_POOL_PING_INTERVAL', 30)  # ping connections idle longer than this
+
+        app.teardown_appcontext(self.teardown)
+
+    def connect_kwargs(self, config):
+        kwargs = {}
+        if config['MYSQL_HOST']:
+            kwargs['host'] = config['MYSQL_HOST']
+        if config['MYSQL_USER']:
+            kwargs['user'] = config['MYSQL_USER']
+        if config['MYSQL_PASSWORD']:
+            kwargs['passwd'] = config['MYSQL_PASSWORD']
+        if config['MYSQL_DB']:
+            kwargs['db'] = config['MYSQL_DB']
+        if config['MYSQL_PORT']:
+            kwargs['port'] = config['MYSQL_PORT']
+        if config['MYSQL_UNIX_SOCKET']:
+            kwargs['unix_socket'] = config['MYSQL_UNIX_SOCKET']
+        if config['MYSQL_CONNECT_TIMEOUT']:
+            kwargs['connect_timeout'] = config['MYSQL_CONNECT_TIMEOUT']
+        if config['MYSQL_USE_UNICODE']:
+            kwargs['use_unicode'] = config['MYSQL_USE_UNICODE']
+        if config['MYSQL_CHARSET']:
+            kwargs['charset'] = config['MYSQL_CHARSET']
+        if config['MYSQL_SQL_MODE']:
+            kwargs['sql_mode'] = config['MYSQL_SQL_MODE']
+        if config['MYSQL_CURSORCLASS']:
+            kwargs['cursorclass'] = getattr(cursors, config['MYSQL_CURSORCLASS'])
+        if config['MYSQL_CUSTOM_OPTIONS']:
+            kwargs.update(config['MYSQL_CUSTOM_OPTIONS'])
+        return kwargs
+
+    def connector(self, config):
+        # Opens a new connection with the app's settings; also handed to the
+        # background threads that keep a connection of their own.
+        kwargs = self.connect_kwargs(config)
+        return lambda: MySQLdb.connect(**kwargs)
+
+    def leader_lock(self, config, name):
+        # For background jobs that must run in only one process: a callable
+        # that tries to take the named lock `name` (per database) on the given
+        # connection and says whether it got it. MySQL holds the lock until
+        # that connection closes, so a dead leader frees it.
+        lock_name = f"{config['MYSQL_DB'] or ''}.{name}"
+
+        def lead(conn):
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT GET_LOCK(%s, 0)", (lock_name,))
+                return cur.fetchone()[0] == 1
+            finally:
+                cur.close()
+        return lead
+
+    def get_pool(self, app=None):
+        # The pool is built on first use rather than in init_app so it picks
+        # up config set after the extension is created.
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    config = (app or current_app).config
+                    self.pool = ConnectionPool(
+                        self.connector(config),
+                        max_size=config['MYSQL_POOL_SIZE'],
+                        timeout=config['MYSQL_POOL_TIMEOUT'],
+                        max_idle=config['MYSQL_POOL_MAX_IDLE'],
+                        ping_interval=config['MYSQL_POOL_PING_INTERVAL'],
+                    )
+        return self.pool
+
+    @property
+    def connection(self):
+        if 'mysql_db' not in g:
+            conn = self.get_pool().acquire()
+            g.mysql_db = conn
+            g.mysql_db_wrapped = self.wrap_connection(conn) if self.wrap_connection else conn
+        return g.mysql_db_wrapped
+
+    def release_connection(self):
+        # Give the context's connection back before teardown, for routes that
+        # go on to wait on something other than the database.
+        g.pop('mysql_db_wrapped', None)
+        conn = g.pop('mysql_db', None)
+        if conn is not None:
+            self.pool.release(conn)
+
+    def rollback_if_held(self):
+        # Roll back the context's connection, if it still holds one. After
+        # release_connection() there is nothing to roll back, and borrowing a
+        # connection just to do so can time out when the pool is busy.
+        if 'mysql_db' in g:
+            g.mysql_db.rollback()
+
+    def teardown(self, exception):
+        g.pop('mysql_db_wrapped', None)
+        conn = g.pop('mysql_db', None)
+        if conn is not None:
+            self.pool.release(conn)
+
+    def reset(self):
+        # Drop the pool in a forked child without closing its connections:
+        # their sockets are shared with the parent. A new pool is built on
+        # first use.
+        with self._pool_lock:
+            self.pool = None
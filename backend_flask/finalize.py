@@ -0,0 +1,66 @@
+from datetime import datetime
+
+import MySQLdb
+
+from summary import FINALIZE_SUMMARY_SQL
+
+
+ER_LOCK_DEADLOCK = 1213
+DEADLOCK_RETRIES = 3
+
+# ABSENT rows for every student of the sessions' classes who has no row yet,
+# built entirely on the server. The anti-join skips students who already
+# scanned, and INSERT IGNORE lets the (student_id, session_id) unique key
+# drop rows a concurrent finalize or a late scan inserted in the meantime, so
+# running it again (or twice at once) adds nothing.
+FINALIZE_SQL = """
+    INSERT IGNORE INTO attendance (student_id, session_id, status, timestamp)
+    SELECT st.id, se.id, 'ABSENT', %s
+    FROM session se
+    JOIN student st ON st.class = se.class
+    LEFT JOIN attendance a ON a.student_id = st.id AND a.session_id = se.id
+    WHERE se.id IN ({placeholders}) AND a.id IS NULL
+"""
+
+
+# Finalize the given sessions, batch_size sessions per statement and commit.
+# Returns {'finalized': [ids], 'not_found': [ids], 'absent_count': rows added}.
+def finalize_sessions(conn, session_ids, now=None, batch_size=500):
+    now = now or datetime.now()
+    session_ids = sorted(set(session_ids))  # same lock order for every caller
+    finalized = []
+    absent_count = 0
+    for offset in range(0, len(session_ids), batch_size):
+        batch = session_ids[offset:offset + batch_size]
+        placeholders = ', '.join(['%s'] * len(batch))
+        for attempt in range(DEADLOCK_RETRIES):
+            cur = conn.cursor()
+            try:
+                # Locking the sessions blocks scans into them (their foreign
+                # key check needs a shared lock on the session row) until we
+                # commit, so the summary counts below match the rows inserted.
+                cur.execute(f"SELECT id FROM session WHERE id IN ({placeholders}) FOR UPDATE", batch)
+                found = [row[0] for row in cur.fetchall()]
+                if found:
+                    found_placeholders = ', '.join(['%s'] * len(found))
+                    cur.execute(FINALIZE_SUMMARY_SQL.format(placeholders=found_placeholders), found)
+                    cur.execute(FINALIZE_SQL.format(placeholders=found_placeholders), [now] + found)
+                    inserted = cur.rowcount
+                else:
+                    inserted = 0
+                conn.commit()
+                break
+            except MySQLdb.OperationalError as e:
+                conn.rollback()
+                if not (e.args and e.args[0] == ER_LOCK_DEADLOCK) or attempt == DEADLOCK_RETRIES - 1:
+                    raise
+            finally:
+                cur.close()
+        finalized.extend(found)
+        absent_count += inserted
+    found_ids = set(finalized)
+    return {
+        'finalized': finalized,
+        'not_found': [session_id for session_id in session_ids if session_id not in found_ids],
+        'absent_count': absent_count,
+    }
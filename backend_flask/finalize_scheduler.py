@@ -0,0 +1,226 @@
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+
+import MySQLdb
+
+from finalize import finalize_sessions
+
+
+# Background thread that finalizes sessions (fills in ABSENT rows) shortly
+# after they expire, so nobody has to call /finalize_attendance by hand.
+#
+# Upcoming expiries sit in a min-heap of (due time, session id). The thread
+# sleeps until the earliest one is due (expiry_time + delay), then finalizes
+# up to batch_size due sessions with one finalize_sessions() call. Sessions
+# added by this process are pushed with schedule(); every reload_interval the
+# thread also picks up sessions created elsewhere (other workers, direct SQL)
+# by id. On start it loads every session that expired in the last `lookback`
+# or expires later, since finalizing twice is harmless.
+#
+# With several processes (gunicorn workers) only one scheduler may run, or
+# each would wake at every expiry and repeat the same finalize scans. Every
+# scheduler thread tries the `lead` callable (see PooledMySQL.leader_lock)
+# and the one that gets the lock does the work; the others retry every
+# retry_delay seconds and take over when the leader's process or connection
+# goes away. The leader picks up sessions created by other processes at its
+# next reload. Without `lead` the scheduler always runs.
+#
+# Times are naive local datetimes, like session.expiry_time.
+class FinalizeScheduler:
+    def __init__(self, connect, delay=60.0, batch_size=200, reload_interval=300.0,
+                 lookback=timedelta(days=1), retry_delay=30.0, ping_interval=30.0, lead=None, logger=None):
+        self.connect = connect
+        self.lead = lead
+        self.delay = timedelta(seconds=delay)
+        self.batch_size = batch_size
+        self.reload_interval = reload_interval
+        self.lookback = lookback
+        self.retry_delay = timedelta(seconds=retry_delay)
+        self.ping_interval = ping_interval
+        self.logger = logger
+        self._heap = []  # (due, session_id)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._conn = None
+        self._last_used = 0.0
+        self._max_loaded_id = None  # None until the startup load has run
+        self._next_reload = 0.0
+        self._leader = lead is None
+        self._metrics = {
+            'runs': 0,
+            'sessions_finalized': 0,
+            'absent_rows': 0,
+            'errors': 0,
+            'last_run': None,
+            'last_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0,
+        }
+
+    def start(self):
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='finalize-scheduler', daemon=True)
+                self._thread.start()
+
+    def schedule(self, session_id, expiry_time):
+        with self._cond:
+            if not self._leader:
+                return  # the leader loads it at its next reload
+            heapq.heappush(self._heap, (expiry_time + self.delay, session_id))
+            if self._heap[0][1] == session_id:
+                self._cond.notify()
+
+    # [(session_id, expiry_time)], e.g. a timetable's worth of sessions
+    def schedule_many(self, sessions):
+        with self._cond:
+            if not self._leader:
+                return
+            for session_id, expiry_time in sessions:
+                heapq.heappush(self._heap, (expiry_time + self.delay, session_id))
+            self._cond.notify()
+
+    def stats(self):
+        now = datetime.now()
+        with self._cond:
+            stats = dict(self._metrics)
+            stats['leader'] = self._leader
+            stats['queue_depth'] = len(self._heap)
+            stats['due'] = sum(1 for due, _ in self._heap if due <= now)
+            # How far behind the oldest due session is (0 when caught up)
+            stats['lag_seconds'] = max(0.0, (now - self._heap[0][0]).total_seconds()) if self._heap else 0.0
+            stats['next_due'] = self._heap[0][0].strftime('%Y-%m-%d %H:%M:%S') if self._heap else None
+        if stats['last_run']:
+            stats['last_run'] = stats['last_run'].strftime('%Y-%m-%d %H:%M:%S')
+        return stats
+
+    def _run(self):
+        while True:
+            if not self._leader:
+                if not self._take_lead():
+                    time.sleep(self.retry_delay.total_seconds())
+                    continue
+            try:
+                if time.monotonic() >= self._next_reload:
+                    self._load()
+                    self._next_reload = time.monotonic() + self.reload_interval
+            except Exception as e:
+                self._failed('loading sessions', e)
+                self._next_reload = time.monotonic() + self.retry_delay.total_seconds()
+            with self._cond:
+                while True:
+                    now = datetime.now()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    wait = self._next_reload - time.monotonic()
+                    if self._heap:
+                        wait = min(wait, (self._heap[0][0] - now).total_seconds())
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                batch = []
+                while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                    batch.append(heapq.heappop(self._heap))
+            if batch:
+                self._finalize(batch, now)
+
+    def _finalize(self, batch, now):
+        try:
+            result = finalize_sessions(self._connection(), [session_id for _, session_id in batch], now,
+                                       batch_size=self.batch_size)
+        except Exception as e:
+            self._failed(f'finalizing {len(batch)} sessions', e)
+            # Try the whole batch again later.
+            with self._cond:
+                for _, session_id in batch:
+                    heapq.heappush(self._heap, (now + self.retry_delay, session_id))
+            return
+        lag = (now - batch[0][0]).total_seconds()
+        with self._cond:
+            self._metrics['runs'] += 1
+            self._metrics['sessions_finalized'] += len(result['finalized'])
+            self._metrics['absent_rows'] += result['absent_count']
+            self._metrics['last_run'] = now
+            self._metrics['last_lag_seconds'] = lag
+            self._metrics['max_lag_seconds'] = max(self._metrics['max_lag_seconds'], lag)
+        if self.logger and result['absent_count']:
+            self.logger.info(f"Auto-finalized {len(result['finalized'])} sessions, "
+                             f"{result['absent_count']} students marked as absent.")
+
+    def _load(self):
+        conn = self._connection()
+        cur = conn.cursor()
+        try:
+            if self._max_loaded_id is None:
+                cur.execute("SELECT COALESCE(MAX(id), 0) FROM session")
+                max_id = cur.fetchone()[0]
+                cur.execute("SELECT id, expiry_time FROM session WHERE expiry_time >= %s AND id <= %s",
+                            (datetime.now() - self.lookback, max_id))
+            else:
+                cur.execute("SELECT id, expiry_time FROM session WHERE id > %s", (self._max_loaded_id,))
+            rows = cur.fetchall()
+            if self._max_loaded_id is not None:
+                max_id = max([self._max_loaded_id] + [row[0] for row in rows])
+            conn.commit()  # end the read snapshot so the next reload sees new sessions
+        finally:
+            cur.close()
+        with self._cond:
+            known = {session_id for _, session_id in self._heap}
+            for session_id, expiry_time in rows:
+                if session_id not in known:
+                    heapq.heappush(self._heap, (expiry_time + self.delay, session_id))
+            if rows:
+                self._cond.notify()
+        self._max_loaded_id = max_id
+
+    def _take_lead(self):
+        try:
+            leader = bool(self.lead(self._connection()))
+        except Exception as e:
+            self._failed('taking the scheduler lock', e)
+            return False
+        if leader:
+            if self.logger:
+                self.logger.info("This process now runs the finalize scheduler.")
+            with self._cond:
+                self._leader = True
+                # Start over with the startup load: sessions created while
+                # another process was leading are not in the heap.
+                self._max_loaded_id = None
+                self._next_reload = 0.0
+        return leader
+
+    def _failed(self, what, e):
+        if self.logger:
+            self.logger.error(f"Database error in finalize scheduler while {what}: {e}")
+        with self._cond:
+            self._metrics['errors'] += 1
+        self._discard_connection()
+
+    def _connection(self):
+        # Own connection, like the attendance batch writer, so the scheduler
+        # never takes a pooled one from a request.
+        now = time.monotonic()
+        if self._conn is not None and now - self._last_used >= self.ping_interval:
+            try:
+                self._conn.ping()
+            except MySQLdb.Error:
+                self._discard_connection()
+        if self._conn is None:
+            self._conn = self.connect()
+        self._last_used = now
+        return self._conn
+
+    def _discard_connection(self):
+        if self.lead is not None:
+            # The lock goes with the connection (or is checked again anyway)
+            with self._cond:
+                self._leader = False
+                self._heap.clear()
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
@@ -0,0 +1,203 @@
+import json
+import math
+
+
+EARTH_RADIUS_KM = 6371.0088  # mean Earth radius
+KM_PER_DEG_LAT = math.pi * EARTH_RADIUS_KM / 180
+WGS84_A_KM = 6378.137
+WGS84_E2 = 0.00669437999014
+
+# Circles up to this radius use a flat projection local to the centre; larger
+# ones fall back to haversine.
+LOCAL_PROJECTION_MAX_KM = 20.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_km_many(lat, lng, lats, lngs):
+    import numpy as np
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lngs - lng)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+# A fence is a circle or a polygon with a precomputed lat/lng bounding box.
+# The box check is a handful of comparisons and rejects almost every point
+# outside the fence before any trigonometry runs.
+class CircleFence:
+    def __init__(self, lat, lng, radius_km):
+        self.lat = lat
+        self.lng = lng
+        self.radius_km = radius_km
+        # km per degree of latitude/longitude on the WGS84 ellipsoid at the
+        # centre, so small circles match geodesic distance without any
+        # per-point trigonometry (equirectangular projection).
+        sin2 = math.sin(math.radians(lat)) ** 2
+        w = math.sqrt(1 - WGS84_E2 * sin2)
+        self.km_per_deg_lat = math.radians(WGS84_A_KM * (1 - WGS84_E2) / w ** 3)
+        self.km_per_deg_lng = math.radians(WGS84_A_KM / w * math.cos(math.radians(lat)))
+        self.local = radius_km <= LOCAL_PROJECTION_MAX_KM
+        self.radius_sq = radius_km * radius_km
+        if self.local:
+            dlat = radius_km / self.km_per_deg_lat
+            dlng = radius_km / max(self.km_per_deg_lng, 1e-12)
+        else:
+            dlat = radius_km / KM_PER_DEG_LAT
+            # Longitude degrees shrink towards the poles; widen the box to match.
+            cos_lat = max(math.cos(math.radians(min(abs(lat) + dlat, 90.0))), 1e-12)
+            dlng = min(radius_km / (KM_PER_DEG_LAT * cos_lat), 180.0)
+        self.bbox = (lat - dlat, lat + dlat, lng - dlng, lng + dlng)
+
+    def contains(self, lat, lng):
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return False
+        if self.local:
+            dy = (lat - self.lat) * self.km_per_deg_lat
+            dx = (lng - self.lng) * self.km_per_deg_lng
+            return dx * dx + dy * dy <= self.radius_sq
+        return haversine_km(self.lat, self.lng, lat, lng) <= self.radius_km
+
+    def contains_many(self, lats, lngs):
+        import numpy as np
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+        idx = np.flatnonzero(inside)
+        if not idx.size:
+            return inside
+        if self.local:
+            dy = (lats[idx] - self.lat) * self.km_per_deg_lat
+            dx = (lngs[idx] - self.lng) * self.km_per_deg_lng
+            inside[idx] = dx * dx + dy * dy <= self.radius_sq
+        else:
+            inside[idx] = haversine_km_many(self.lat, self.lng, lats[idx], lngs[idx]) <= self.radius_km
+        return inside
+
+
+# Polygons are tested with ray casting in plain lat/lng, which is accurate at
+# campus scale (they must not cross the antimeridian).
+class PolygonFence:
+    def __init__(self, points):
+        if len(points) < 3:
+            raise ValueError('A polygon fence needs at least 3 points.')
+        self.points = [(float(lat), float(lng)) for lat, lng in points]
+        lats = [p[0] for p in self.points]
+        lngs = [p[1] for p in self.points]
+        self.bbox = (min(lats), max(lats), min(lngs), max(lngs))
+
+    def contains(self, lat, lng):
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lng <= lng <= max_lng):
+            return False
+        inside = False
+        points = self.points
+        j = len(points) - 1
+        for i in range(len(points)):
+            lat_i, lng_i = points[i]
+            lat_j, lng_j = points[j]
+            if (lat_i > lat) != (lat_j > lat):
+                cross_lng = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+                if lng < cross_lng:
+                    inside = not inside
+            j = i
+        return inside
+
+    def contains_many(self, lats, lngs):
+        import numpy as np
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+        idx = np.flatnonzero(inside)
+        if not idx.size:
+            return inside
+        lat = lats[idx]
+        lng = lngs[idx]
+        crossings = np.zeros(idx.size, dtype=bool)
+        j = len(self.points) - 1
+        for i in range(len(self.points)):
+            lat_i, lng_i = self.points[i]
+            lat_j, lng_j = self.points[j]
+            if lat_i != lat_j:
+                spans = (lat_i > lat) != (lat_j > lat)
+                cross_lng = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+                crossings ^= spans & (lng < cross_lng)
+            j = i
+        inside[idx] = crossings
+        return inside
+
+
+def make_fence(spec):
+    kind = spec.get('type', 'circle')
+    if kind == 'circle':
+        return CircleFence(float(spec['lat']), float(spec['lng']), float(spec['radius_km']))
+    if kind == 'polygon':
+        return PolygonFence(spec['points'])
+    raise ValueError(f"Unknown fence type: {kind}")
+
+
+# Campuses are named groups of fences. A scan is inside if it falls in any
+# fence of any campus assigned to its session, else its class, else the
+# default campuses.
+#
+# Config (JSON):
+#   {
+#     "campuses": {"main": [{"type": "circle", "lat": 20.2961, "lng": 85.8245, "radius_km": 0.1}],
+#                  "annex": [{"type": "polygon", "points": [[20.30, 85.82], [20.30, 85.83], [20.29, 85.83]]}]},
+#     "default": ["main"],
+#     "classes": {"MCA-2": ["annex"]},
+#     "sessions": {"42": ["main", "annex"]}
+#   }
+class GeofenceRegistry:
+    def __init__(self, campuses, default=None, classes=None, sessions=None):
+        self.campuses = {name: [make_fence(spec) for spec in specs] for name, specs in campuses.items()}
+        self.default = list(default if default is not None else self.campuses)
+        self.classes = {name: list(campus_names) for name, campus_names in (classes or {}).items()}
+        self.sessions = {int(session_id): list(campus_names) for session_id, campus_names in (sessions or {}).items()}
+        for campus_names in [self.default, *self.classes.values(), *self.sessions.values()]:
+            for name in campus_names:
+                if name not in self.campuses:
+                    raise ValueError(f"Unknown campus in geofence config: {name}")
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config['campuses'], config.get('default'), config.get('classes'), config.get('sessions'))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls.from_config(json.load(f))
+
+    @classmethod
+    def single(cls, lat, lng, radius_km):
+        return cls({'main': [{'type': 'circle', 'lat': lat, 'lng': lng, 'radius_km': radius_km}]})
+
+    def fences_for(self, class_name=None, session_id=None):
+        if session_id is not None and session_id in self.sessions:
+            campus_names = self.sessions[session_id]
+        elif class_name is not None and class_name in self.classes:
+            campus_names = self.classes[class_name]
+        else:
+            campus_names = self.default
+        return [fence for name in campus_names for fence in self.campuses[name]]
+
+    def contains(self, lat, lng, class_name=None, session_id=None):
+        return any(fence.contains(lat, lng) for fence in self.fences_for(class_name, session_id))
+
+    def contains_many(self, lats, lngs, class_name=None, session_id=None):
+        # Imported here: only batch checks need NumPy, and it is slow to load
+        import numpy as np
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        inside = np.zeros(lats.shape, dtype=bool)
+        for fence in self.fences_for(class_name, session_id):
+            inside |= fence.contains_many(lats, lngs)
+        return inside
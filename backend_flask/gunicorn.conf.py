@@ -0,0 +1,32 @@
+# Multi-worker launcher: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is imported and built once in the master (preload_app) and the
+# workers are forked from it, so imports, config and geofences are shared
+# copy-on-write instead of being loaded again by every worker, and a new
+# worker is ready as soon as it is forked. Each worker then gets its own
+# database pool and background threads in post_fork (the finalize scheduler
+# only runs in whichever worker holds its leader lock).
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))  # gthread worker when > 1
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+
+# Background threads must not be started in the master: fork() only copies
+# the calling thread, and the workers start their own.
+os.environ['START_BACKGROUND_TASKS'] = '0'
+
+
+def post_fork(server, worker):
+    import app as app_module
+    from wsgi import app
+
+    app_module.after_fork(app)
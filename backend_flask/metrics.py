@@ -0,0 +1,250 @@
+import bisect
+import threading
+import time
+
+from flask import g, request
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+STATEMENTS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Prometheus histogram with fixed buckets, one series per label combination.
+# observe() is a bisect plus a few additions under a lock.
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> per-bucket counts (+Inf last) followed by the sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            snapshot = dict(self._values)
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+# Per-request tallies, kept in g and updated by the instrumented cursors.
+class RequestStats:
+    __slots__ = ('route', 'start', 'status', 'queries', 'db_seconds', 'rows')
+
+    def __init__(self, route):
+        self.route = route
+        self.start = time.perf_counter()
+        self.status = 500
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+
+
+# Cursor wrapper that times execute()/executemany() and counts fetched rows
+# into the request's RequestStats; everything else goes to the real cursor.
+class InstrumentedCursor:
+    def __init__(self, cursor, stats, metrics):
+        self._cursor = cursor
+        self._stats = stats
+        self._metrics = metrics
+
+    def execute(self, query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(query, *args, **kwargs)
+        finally:
+            self._metrics.record_query(self._stats, query, time.perf_counter() - start)
+
+    def executemany(self, query, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, *args, **kwargs)
+        finally:
+            self._metrics.record_query(self._stats, query, time.perf_counter() - start)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    def __init__(self, conn, stats, metrics):
+        self._conn = conn
+        self._stats = stats
+        self._metrics = metrics
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._stats, self._metrics)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# Request and query instrumentation for every route, rendered in Prometheus
+# text format by render(). Each request gets a RequestStats in g; the
+# request's database connection (PooledMySQL.wrap_connection) hands out
+# cursors that add query count, DB wall time and fetched rows to it, and the
+# totals are observed when the request is torn down (streamed responses: when
+# they are closed, so they count until their last row). Collectors add the components' own stats()
+# (pool, caches, writer, scheduler, ...) as gauges at scrape time.
+#
+# Metrics are per process: with several workers each has its own, and a
+# scrape sees whichever worker answered it.
+class RequestMetrics:
+    def __init__(self, app=None, prefix='attendance'):
+        self.prefix = prefix
+        self.collectors = []  # (name, zero-argument function returning a dict)
+        self.request_seconds = Histogram(
+            f'{prefix}_http_request_duration_seconds', 'Request latency, until the last byte is sent.',
+            ('method', 'route'), LATENCY_BUCKETS)
+        self.requests = Counter(f'{prefix}_http_requests_total', 'Requests by response status.',
+                                ('method', 'route', 'status'))
+        self.request_queries = Histogram(f'{prefix}_http_request_db_queries', 'Queries executed per request.',
+                                         ('route',), COUNT_BUCKETS)
+        self.request_db_seconds = Histogram(f'{prefix}_http_request_db_seconds', 'Database wall time per request.',
+                                            ('route',), LATENCY_BUCKETS)
+        self.request_rows = Histogram(f'{prefix}_http_request_db_rows', 'Rows fetched per request.',
+                                      ('route',), ROW_BUCKETS)
+        self.query_seconds = Histogram(f'{prefix}_db_query_duration_seconds', 'Latency of each execute() call.',
+                                       ('route', 'statement'), QUERY_BUCKETS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def add_collector(self, name, fn):
+        self.collectors.append((name, fn))
+
+    def wrap_connection(self, conn):
+        stats = g.get('request_metrics')
+        return InstrumentedConnection(conn, stats, self) if stats is not None else conn
+
+    def record_query(self, stats, query, seconds):
+        stats.queries += 1
+        stats.db_seconds += seconds
+        head = query.lstrip()[:7].split(None, 1)
+        statement = head[0].upper() if head else ''
+        self.query_seconds.observe(seconds, stats.route, statement if statement in STATEMENTS else 'OTHER')
+
+    def _before_request(self):
+        g.request_metrics = RequestStats(request.url_rule.rule if request.url_rule else 'unmatched')
+
+    def _after_request(self, response):
+        stats = g.get('request_metrics')
+        if stats is not None:
+            stats.status = response.status_code
+            if response.is_streamed:
+                # Streamed exports keep reading rows after the request is torn
+                # down; observe them once the server has sent the last chunk.
+                del g.request_metrics
+                method = request.method
+                response.call_on_close(lambda: self._observe(stats, method))
+        return response
+
+    def _teardown_request(self, exception):
+        stats = g.pop('request_metrics', None)
+        if stats is not None:
+            self._observe(stats, request.method)
+
+    def _observe(self, stats, method):
+        self.request_seconds.observe(time.perf_counter() - stats.start, method, stats.route)
+        self.requests.inc(method, stats.route, str(stats.status))
+        self.request_queries.observe(stats.queries, stats.route)
+        self.request_db_seconds.observe(stats.db_seconds, stats.route)
+        self.request_rows.observe(stats.rows, stats.route)
+
+    def render(self):
+        lines = []
+        for metric in (self.request_seconds, self.requests, self.request_queries,
+                       self.request_db_seconds, self.request_rows, self.query_seconds):
+            lines.extend(metric.render())
+        for name, collect in self.collectors:
+            for key, value in collect().items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                metric = f'{self.prefix}_{name}_{key}'
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'{metric} {_number(value)}')
+        return '\n'.join(lines) + '\n'
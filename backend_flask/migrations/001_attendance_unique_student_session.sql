@@ -0,0 +1,13 @@
+-- 001: one attendance row per (student, session)
+-- mark_attendance and the batched writer rely on this key to reject duplicate scans.
+USE attendance_app;
+
+-- Remove duplicates left by the old check-then-insert path, keeping the first row
+DELETE a FROM attendance a
+JOIN attendance b
+  ON a.student_id = b.student_id
+ AND a.session_id = b.session_id
+ AND a.id > b.id;
+
+ALTER TABLE attendance
+    ADD UNIQUE KEY uq_attendance_student_session (student_id, session_id);
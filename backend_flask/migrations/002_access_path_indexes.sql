@@ -0,0 +1,19 @@
+-- 002: secondary indexes for the hot queries
+-- Online DDL: reads and writes continue while the indexes are built.
+-- benchmarks/bench_indexes.py checks each one with EXPLAIN on ~1M attendance rows.
+USE attendance_app;
+
+-- get_student_by_class, and the student side of finalize's INSERT ... SELECT
+ALTER TABLE student
+    ADD INDEX idx_student_class (class),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- The finalize scheduler's scan for recently expired / upcoming sessions
+ALTER TABLE session
+    ADD INDEX idx_session_expiry_time (expiry_time),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+-- attendance_report: a student's rows already in timestamp order (no filesort)
+ALTER TABLE attendance
+    ADD INDEX idx_attendance_student_timestamp (student_id, timestamp),
+    ALGORITHM=INPLACE, LOCK=NONE;
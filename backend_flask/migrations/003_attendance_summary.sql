@@ -0,0 +1,33 @@
+-- 003: per-student attendance totals for attendance_report
+-- The app keeps attendance_summary in step with attendance from now on
+-- (see summary.py). Run the backfill with the app stopped; it can be run
+-- again at any time to re-sync the totals from attendance.
+USE attendance_app;
+
+CREATE TABLE IF NOT EXISTS attendance_summary (
+    student_id INT NOT NULL,
+    class VARCHAR(50) NOT NULL,
+    present_count INT NOT NULL DEFAULT 0,
+    absent_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, class),
+    FOREIGN KEY (student_id) REFERENCES student(id) ON DELETE CASCADE
+);
+
+-- Backfill / re-sync
+INSERT INTO attendance_summary (student_id, class, present_count, absent_count)
+SELECT a.student_id, s.class, SUM(a.status = 'PRESENT'), SUM(a.status = 'ABSENT')
+FROM attendance a
+JOIN session s ON s.id = a.session_id
+GROUP BY a.student_id, s.class
+ON DUPLICATE KEY UPDATE present_count = VALUES(present_count),
+                        absent_count = VALUES(absent_count);
+
+-- Totals for classes a student no longer has any attendance in
+UPDATE attendance_summary sm
+LEFT JOIN (
+    SELECT DISTINCT a.student_id, s.class
+    FROM attendance a
+    JOIN session s ON s.id = a.session_id
+) d ON d.student_id = sm.student_id AND d.class = sm.class
+SET sm.present_count = 0, sm.absent_count = 0
+WHERE d.student_id IS NULL;
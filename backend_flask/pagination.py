@@ -0,0 +1,74 @@
+# Keyset pagination and field selection for the list endpoints.
+#
+#   ?after_id=<last id seen>&limit=<page size>&fields=id,name,...
+#
+# Pages are ordered by id and fetched with `WHERE id > after_id ORDER BY id
+# LIMIT limit + 1`, so every page costs the same however deep the client
+# has paged. The extra row tells us whether there is a next page.
+
+
+class PageArgs:
+    def __init__(self, after_id, limit, fields):
+        self.after_id = after_id
+        self.limit = limit
+        self.fields = fields
+
+    # Column list for the selected fields; `columns` maps field name to a SQL
+    # expression. The id column always comes first since it is the cursor.
+    def select_list(self, columns):
+        return ', '.join([columns['id']] + [columns[f] for f in self.fields if f != 'id'])
+
+    # WHERE condition and params for the cursor, e.g. ('s.id > %s', [42]).
+    def keyset(self, id_column):
+        if self.after_id is None:
+            return 'TRUE', []
+        return f'{id_column} > %s', [self.after_id]
+
+    # Turn rows fetched with select_list() and a LIMIT of limit + 1 into the
+    # page of dicts and the cursor for the next page (None on the last page).
+    def build(self, rows, formatters=None):
+        formatters = formatters or {}
+        more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        names = ['id'] + [f for f in self.fields if f != 'id']
+        items = []
+        for row in rows:
+            item = {}
+            for name, value in zip(names, row):
+                if name in self.fields:
+                    item[name] = formatters[name](value) if name in formatters else value
+            items.append(item)
+        next_after_id = rows[-1][0] if more else None
+        return items, next_after_id
+
+
+def parse_limit(args, default_limit=100, max_limit=1000):
+    limit = args.get('limit')
+    if limit is None:
+        return default_limit
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer.')
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f'limit must be between 1 and {max_limit}.')
+    return limit
+
+
+def parse_page_args(args, columns, default_limit=100, max_limit=1000):
+    after_id = args.get('after_id')
+    if after_id is not None:
+        try:
+            after_id = int(after_id)
+        except ValueError:
+            raise ValueError('after_id must be an integer.')
+    limit = parse_limit(args, default_limit, max_limit)
+    fields = args.get('fields')
+    if fields:
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(columns)}")
+    else:
+        fields = list(columns)
+    return PageArgs(after_id, limit, fields)
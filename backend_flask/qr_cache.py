@@ -0,0 +1,101 @@
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+def render_qr_png(payload):
+    # Imported on first render: qrcode pulls in PIL, which most requests never touch.
+    import qrcode
+
+    img = qrcode.make(payload)
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+# Rendered QR PNGs keyed by the SHA-256 of their payload, so the same payload
+# is only ever rendered once and the key doubles as a strong ETag. Entries are
+# evicted least recently used first once their total size passes max_bytes.
+class QRImageCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024, logger=None):
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+
+    @staticmethod
+    def key(payload):
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # Return (etag, png) for the payload, rendering it on a miss. Concurrent
+    # misses for the same payload may both render; the result is identical.
+    def get(self, payload):
+        key = self.key(payload)
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                return key, png
+            self.misses += 1
+        start = time.perf_counter()
+        png = render_qr_png(payload)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.render_seconds += elapsed
+            self._store(key, png)
+        return key, png
+
+    # Render the payload in the background so the first request for it hits.
+    # Returns None when it is already cached.
+    def prerender(self, payload):
+        with self._lock:
+            if self.key(payload) in self._images:
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='qr-prerender')
+        return self._executor.submit(self._prerender, payload)
+
+    def _prerender(self, payload):
+        try:
+            self.get(payload)
+        except Exception as e:
+            # Not fatal: the image is rendered on first request instead.
+            if self.logger:
+                self.logger.error(f"QR pre-render failed: {e}")
+
+    def _store(self, key, png):
+        if key in self._images or len(png) > self.max_bytes:
+            return
+        self._images[key] = png
+        self._bytes += len(png)
+        while self._bytes > self.max_bytes:
+            _, old = self._images.popitem(last=False)
+            self._bytes -= len(old)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._images),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'render_seconds_total': round(self.render_seconds, 3),
+            }
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+
+
+# Rotating attendance tokens for the QR code.
+#
+#   <session_id>.<window>.<signature>
+#
+# `window` is the current time divided by the window length and `signature`
+# is a truncated HMAC-SHA256 of "<session_id>.<window>" under a server
+# secret. A token is only accepted for its own session and during its window
+# (or the `grace` windows after it, for scans taken just before a rotation),
+# and checking one needs no database access, so forged and stale scans are
+# turned away before mark_attendance touches MySQL. Scans without a token are
+# counted as 'missing'.
+class QRTokenSigner:
+    SIGNATURE_BYTES = 16
+
+    def __init__(self, secret, window=30, grace=1):
+        if isinstance(secret, str):
+            secret = secret.encode('utf-8')
+        if not secret:
+            raise ValueError('A QR token secret is required.')
+        self._secret = secret
+        self.window = window
+        self.grace = grace
+        self._lock = threading.Lock()
+        self._counts = {'issued': 0, 'accepted': 0, 'missing': 0, 'malformed': 0, 'wrong_session': 0,
+                        'expired': 0, 'bad_signature': 0}
+
+    @classmethod
+    def with_random_secret(cls, window=30, grace=1):
+        return cls(secrets.token_bytes(32), window, grace)
+
+    def current_window(self, now=None):
+        return int((time.time() if now is None else now) // self.window)
+
+    # Seconds until the current token is replaced by the next one.
+    def seconds_left(self, now=None):
+        now = time.time() if now is None else now
+        return self.window - (now % self.window)
+
+    def _sign(self, session_id, window):
+        digest = hmac.new(self._secret, f'{session_id}.{window}'.encode('ascii'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest[:self.SIGNATURE_BYTES]).rstrip(b'=').decode('ascii')
+
+    def issue(self, session_id, now=None):
+        window = self.current_window(now)
+        self._count('issued')
+        return f'{session_id}.{window}.{self._sign(session_id, window)}'
+
+    # The token of the window after the current one, for rendering its QR
+    # ahead of the rotation (not counted as issued).
+    def upcoming(self, session_id, now=None):
+        window = self.current_window(now) + 1
+        return f'{session_id}.{window}.{self._sign(session_id, window)}'
+
+    # None if the token is valid for session_id right now, otherwise the
+    # reason: 'missing' (None), 'malformed', 'wrong_session', 'expired' or
+    # 'bad_signature'.
+    def verify(self, token, session_id, now=None):
+        reason = self._check(token, session_id, now)
+        self._count(reason or 'accepted')
+        return reason
+
+    def _check(self, token, session_id, now):
+        if token is None:
+            return 'missing'
+        if not isinstance(token, str):
+            return 'malformed'
+        parts = token.split('.')
+        if len(parts) != 3:
+            return 'malformed'
+        try:
+            token_session, window = int(parts[0]), int(parts[1])
+        except ValueError:
+            return 'malformed'
+        if token_session != session_id:
+            return 'wrong_session'
+        current = self.current_window(now)
+        if not current - self.grace <= window <= current:
+            return 'expired'
+        if not hmac.compare_digest(parts[2], self._sign(token_session, window)):
+            return 'bad_signature'
+        return None
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, window_seconds=self.window, grace_windows=self.grace)
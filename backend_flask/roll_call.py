@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import MySQLdb
+
+from attendance_writer import INSERT_ATTENDANCE
+from finalize import DEADLOCK_RETRIES, ER_LOCK_DEADLOCK
+from summary import add_to_summary
+
+
+ROLL_CALL_STATUSES = ('PRESENT', 'ABSENT')
+
+
+# Record a teacher's roll call for one session in a single transaction.
+# entries: [(student_id, status)] in request order. Returns one result per
+# entry, or None if the session no longer exists:
+#
+#   'recorded'        inserted (and counted in attendance_summary)
+#   'already_marked'  the student already has a row for the session
+#   'duplicate'       the student appears earlier in the same roll call
+#   'invalid_status'  status is not PRESENT or ABSENT
+#   'not_in_class'    no such student in the session's class
+#
+# The session row is locked first, as finalize does, so scans into it wait
+# for the commit and the roster and existing rows read below stay accurate.
+# Backends without row locks (SQLite) can still lose a row to a concurrent
+# scan between the lookup and the insert; the whole roll call is then rolled
+# back and redone.
+def record_roll_call(conn, session_id, entries, now=None):
+    now = now or datetime.now()
+    results = [None] * len(entries)
+    first = {}
+    for i, (student_id, status) in enumerate(entries):
+        if status not in ROLL_CALL_STATUSES:
+            results[i] = 'invalid_status'
+        elif student_id in first:
+            results[i] = 'duplicate'
+        else:
+            first[student_id] = i
+
+    for attempt in range(DEADLOCK_RETRIES):
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT class FROM session WHERE id = %s FOR UPDATE", (session_id,))
+            row = cur.fetchone()
+            if not row:
+                conn.rollback()
+                return None
+            class_name = row[0]
+            attempt_results = list(results)
+            pending = []
+            if first:
+                placeholders = ', '.join(['%s'] * len(first))
+                # The class roster and the students already marked, one query each
+                cur.execute(f"SELECT id FROM student WHERE class = %s AND id IN ({placeholders})",
+                            [class_name] + list(first))
+                roster = {r[0] for r in cur.fetchall()}
+                cur.execute(f"SELECT student_id FROM attendance WHERE session_id = %s AND student_id IN ({placeholders})",
+                            [session_id] + list(first))
+                marked = {r[0] for r in cur.fetchall()}
+                for student_id, i in first.items():
+                    if student_id not in roster:
+                        attempt_results[i] = 'not_in_class'
+                    elif student_id in marked:
+                        attempt_results[i] = 'already_marked'
+                    else:
+                        pending.append(i)
+            if pending:
+                # Sorted by student so concurrent writers take row locks in one order
+                pending.sort(key=lambda i: entries[i][0])
+                rows = [(entries[i][0], session_id, entries[i][1], now) for i in pending]
+                cur.executemany(INSERT_ATTENDANCE, rows)
+                if cur.rowcount != len(rows):
+                    # A scan got in since the lookup; start over
+                    conn.rollback()
+                    continue
+                add_to_summary(cur, [(student_id, class_name, status) for student_id, _, status, _ in rows])
+                for i in pending:
+                    attempt_results[i] = 'recorded'
+            conn.commit()
+            return attempt_results
+        except (MySQLdb.OperationalError, MySQLdb.IntegrityError) as e:
+            conn.rollback()
+            # A deadlock, or a student deleted since the roster lookup
+            retry = isinstance(e, MySQLdb.IntegrityError) or (e.args and e.args[0] == ER_LOCK_DEADLOCK)
+            if not retry or attempt == DEADLOCK_RETRIES - 1:
+                raise
+        finally:
+            cur.close()
+    raise MySQLdb.OperationalError(ER_LOCK_DEADLOCK, f'roll call for session {session_id} kept conflicting with concurrent scans')
@@ -0,0 +1,98 @@
+from itertools import chain
+
+# pandas and openpyxl are imported on first use rather than here: they add
+# about a third of a second and tens of MB to every worker, and only the
+# roster import needs them.
+
+
+ROSTER_EXTENSIONS = {'xlsx', 'xls', 'csv'}
+
+
+def roster_extension(filename):
+    if '.' not in filename:
+        return None
+    ext = filename.rsplit('.', 1)[1].lower()
+    return ext if ext in ROSTER_EXTENSIONS else None
+
+
+def _normalise_columns(columns):
+    return [str(col).strip().lower() if col is not None else '' for col in columns]
+
+
+def _csv_chunks(stream, chunk_size):
+    import pandas as pd
+
+    reader = pd.read_csv(stream, dtype=object, chunksize=chunk_size)
+    next_row = 2  # row 1 is the header
+    for df in reader:
+        df.columns = _normalise_columns(df.columns)
+        df.index = range(next_row, next_row + len(df))
+        next_row += len(df)
+        yield df
+
+
+def _xlsx_chunks(stream, chunk_size):
+    import openpyxl
+    import pandas as pd
+
+    # Read-only mode parses the sheet XML lazily instead of building the
+    # whole workbook in memory.
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _normalise_columns(header)
+        width = len(columns)
+        batch = []
+        row_numbers = []
+        yielded = False
+        for row_number, row in enumerate(rows, start=2):
+            if all(value is None for value in row):
+                continue
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            row_numbers.append(row_number)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=columns, index=row_numbers, dtype=object)
+                yielded = True
+                batch = []
+                row_numbers = []
+        if batch or not yielded:
+            yield pd.DataFrame(batch, columns=columns, index=row_numbers, dtype=object)
+    finally:
+        workbook.close()
+
+
+def _xls_chunks(stream, chunk_size):
+    import pandas as pd
+
+    # The legacy .xls format has no streaming reader; parse it whole.
+    df = pd.read_excel(stream, dtype=object)
+    df.columns = _normalise_columns(df.columns)
+    df.index = df.index + 2
+    for offset in range(0, len(df), chunk_size):
+        yield df.iloc[offset:offset + chunk_size]
+
+
+# Parse an uploaded roster straight from the upload's file object (no copy
+# saved to disk) and return (columns, chunks). `chunks` yields DataFrames of
+# at most chunk_size rows, indexed by spreadsheet row number and with
+# lower-cased column names, so memory stays bounded by the chunk size rather
+# than the file size. An empty file gives no columns.
+def read_roster(stream, ext, chunk_size=1000):
+    import pandas as pd
+
+    if ext == 'csv':
+        chunks = _csv_chunks(stream, chunk_size)
+    elif ext == 'xlsx':
+        chunks = _xlsx_chunks(stream, chunk_size)
+    elif ext == 'xls':
+        chunks = _xls_chunks(stream, chunk_size)
+    else:
+        raise ValueError(f'Unsupported roster file type: {ext}')
+    try:
+        first = next(chunks)
+    except (StopIteration, pd.errors.EmptyDataError):
+        return [], iter(())
+    return list(first.columns), chain([first], chunks)
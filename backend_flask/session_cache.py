@@ -0,0 +1,47 @@
+from collections import namedtuple
+from datetime import datetime
+
+from cache import TTLCache
+
+
+SessionInfo = namedtuple('SessionInfo', ['id', 'session_code', 'expiry_time', 'created_by', 'class_name'])
+
+
+# Session rows don't change during a session's short lifetime, so the
+# attendance hot path (mark_attendance, generate_qr, finalize_attendance)
+# reads them from here. An entry lives until the session's expiry_time plus
+# a grace period, which covers late scans and the finalize call that follows.
+class SessionCache:
+    def __init__(self, maxsize=10000, grace=300.0):
+        self.grace = grace
+        self.cache = TTLCache(maxsize=maxsize, ttl=grace)
+
+    def get(self, session_id):
+        return self.cache.get(session_id)
+
+    def load(self, cur, session_id):
+        session = self.get(session_id)
+        if session is not None:
+            return session
+        cur.execute("""
+            SELECT session_code, expiry_time, created_by, class
+            FROM session
+            WHERE id = %s
+        """, (session_id,))
+        result = cur.fetchone()
+        if not result:
+            return None
+        return self.put(session_id, *result)
+
+    def put(self, session_id, session_code, expiry_time, created_by, class_name):
+        session = SessionInfo(session_id, session_code, expiry_time, created_by, class_name)
+        ttl = (expiry_time - datetime.now()).total_seconds() + self.grace
+        if ttl > 0:
+            self.cache.set(session_id, session, ttl=ttl)
+        return session
+
+    def invalidate(self, session_id):
+        self.cache.invalidate(session_id)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,265 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: no preforking servers, so one process anyway
+    fcntl = None
+
+import MySQLdb
+
+from db_pool import PooledMySQL
+
+
+SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_schema_sqlite.sql')
+
+# Per-connection settings for a single-node site: WAL lets readers run
+# alongside the one writer, and writers queue on busy_timeout instead of
+# failing with "database is locked".
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # fsync at checkpoints, not every commit (safe in WAL mode)
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY',
+}
+
+# Conflict targets for MySQL's INSERT IGNORE and ON DUPLICATE KEY UPDATE,
+# which SQLite's ON CONFLICT needs spelled out: the key each table's upserts
+# collide on. Naming it keeps other failures (NOT NULL, CHECK, another unique
+# key) errors, where a bare DO NOTHING or INSERT OR IGNORE would skip them.
+CONFLICT_KEYS = {
+    'attendance': 'student_id, session_id',
+    'attendance_summary': 'student_id, class',
+    'student': 'id',
+}
+
+# MySQL error codes the routes and the batch writer look for.
+ER_DUP_ENTRY = 1062
+ER_BAD_NULL_ERROR = 1048
+ER_NO_REFERENCED_ROW = 1452
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_CHECK_CONSTRAINT_VIOLATED = 3819
+ER_UNKNOWN_ERROR = 1105
+
+# SQLite's extended result codes for constraint failures, and the message
+# prefixes they come with (for sqlite3 modules without sqlite_errorname)
+CONSTRAINT_ERRORS = (
+    ('SQLITE_CONSTRAINT_UNIQUE', 'UNIQUE constraint failed', ER_DUP_ENTRY),
+    ('SQLITE_CONSTRAINT_PRIMARYKEY', 'PRIMARY KEY constraint failed', ER_DUP_ENTRY),
+    ('SQLITE_CONSTRAINT_FOREIGNKEY', 'FOREIGN KEY constraint failed', ER_NO_REFERENCED_ROW),
+    ('SQLITE_CONSTRAINT_NOTNULL', 'NOT NULL constraint failed', ER_BAD_NULL_ERROR),
+    ('SQLITE_CONSTRAINT_CHECK', 'CHECK constraint failed', ER_CHECK_CONSTRAINT_VIOLATED),
+)
+
+
+def _adapt_datetime(value):
+    return value.isoformat(' ')
+
+
+def _convert_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter('DATETIME', _convert_datetime)
+
+
+# Rewrite a MySQL statement for SQLite: %s placeholders, INSERT IGNORE and
+# ON DUPLICATE KEY UPDATE id = id (as ON CONFLICT (key) DO NOTHING), other
+# ON DUPLICATE KEY UPDATEs (as ON CONFLICT (key) DO UPDATE with excluded.*
+# for VALUES()), and FOR UPDATE, which SQLite has no use for since writers
+# are serialized anyway. Cached, so each distinct statement is translated
+# once and then hits sqlite3's own prepared statement cache by its text.
+@lru_cache(maxsize=1024)
+def translate(sql):
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'\s+FOR\s+UPDATE\b', '', sql)
+    ignore = re.search(r'\bINSERT\s+IGNORE\b', sql)
+    if ignore:
+        sql = sql[:ignore.start()] + 'INSERT' + sql[ignore.end():]
+        return f'{sql.rstrip()}\nON CONFLICT ({_conflict_key(sql)}) DO NOTHING'
+    match = re.search(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', sql)
+    if match:
+        head, assignments = sql[:match.start()], sql[match.end():]
+        if re.fullmatch(r'\s*id\s*=\s*id\s*', assignments):
+            return f'{head}ON CONFLICT ({_conflict_key(head)}) DO NOTHING'
+        assignments = re.sub(r'\bVALUES\((\w+)\)', r'excluded.\1', assignments)
+        sql = f'{head}ON CONFLICT ({_conflict_key(head)}) DO UPDATE SET{assignments}'
+    return sql
+
+
+def _conflict_key(sql):
+    return CONFLICT_KEYS[re.search(r'\bINSERT\s+INTO\s+(\w+)', sql).group(1)]
+
+
+def _mysql_error(e):
+    # Re-raise sqlite3 errors as the MySQLdb exceptions (and error codes) the
+    # routes already handle.
+    message = str(e)
+    if isinstance(e, sqlite3.IntegrityError):
+        name = getattr(e, 'sqlite_errorname', None)
+        for errorname, prefix, code in CONSTRAINT_ERRORS:
+            if name == errorname or (name is None and message.startswith(prefix)):
+                return MySQLdb.IntegrityError(code, message)
+        # Anything else must not pass for a duplicate key
+        return MySQLdb.IntegrityError(ER_UNKNOWN_ERROR, message)
+    if isinstance(e, sqlite3.OperationalError):
+        code = ER_LOCK_WAIT_TIMEOUT if 'locked' in message or 'busy' in message else ER_UNKNOWN_ERROR
+        return MySQLdb.OperationalError(code, message)
+    return MySQLdb.DatabaseError(ER_UNKNOWN_ERROR, message)
+
+
+# DB-API cursor over sqlite3 that takes the app's MySQL-flavoured SQL.
+# sqlite3 cursors step through results lazily, so this also stands in for
+# the SSCursor used by the streaming exports.
+class SQLiteCursor:
+    dialect = 'sqlite'
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, args=None):
+        try:
+            self._cursor.execute(translate(query), tuple(args) if args is not None else ())
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        try:
+            self._cursor.executemany(translate(query), [tuple(row) for row in args])
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size if size is not None else self._cursor.arraysize)
+
+    def fetchall(self):
+        return tuple(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    dialect = 'sqlite'
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, cursorclass=None):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise _mysql_error(e) from e
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        pass
+
+    def close(self):
+        self._conn.close()
+
+
+def connect(path, busy_timeout=5.0, cache_mb=64, mmap_mb=256, cached_statements=256):
+    # IMMEDIATE: a transaction takes the write lock at its first write, so two
+    # writers queue on busy_timeout rather than deadlocking on a lock upgrade.
+    conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level='IMMEDIATE',
+                           detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False,
+                           cached_statements=cached_statements)
+    for name, value in PRAGMAS.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+    conn.execute(f'PRAGMA cache_size = {-cache_mb * 1024}')
+    conn.execute(f'PRAGMA mmap_size = {mmap_mb * 1024 * 1024}')
+    return SQLiteConnection(conn)
+
+
+def create_schema(path, schema=SCHEMA):
+    # The schema only uses IF NOT EXISTS, so this is safe on an existing
+    # database and from several processes at once.
+    with open(schema) as f:
+        script = f.read()
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.executescript(script)
+    finally:
+        conn.close()
+
+
+# PooledMySQL for an embedded SQLite database file (STORAGE_BACKEND=sqlite):
+# the same `connection` per app context and the same pool, holding sqlite3
+# connections that speak the app's MySQL dialect through SQLiteConnection.
+class PooledSQLite(PooledMySQL):
+    def __init__(self, app=None):
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        super().__init__(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SQLITE_PATH', 'attendance.db')
+        app.config.setdefault('SQLITE_BUSY_TIMEOUT', 5)
+        app.config.setdefault('SQLITE_CACHE_MB', 64)
+        app.config.setdefault('SQLITE_MMAP_MB', 256)
+        app.config.setdefault('SQLITE_CREATE_SCHEMA', True)
+        super().init_app(app)
+
+    def leader_lock(self, config, name):
+        # Same contract as PooledMySQL.leader_lock, with an exclusive flock on
+        # a file next to the database; the OS drops it when the process exits.
+        lock_path = f"{config['SQLITE_PATH']}.{name}.lock"
+        state = {}
+
+        def lead(conn):
+            if fcntl is None:
+                return True
+            if 'fd' not in state:
+                state['fd'] = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(state['fd'], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            return True
+        return lead
+
+    def connector(self, config):
+        path = config['SQLITE_PATH']
+        settings = dict(busy_timeout=config['SQLITE_BUSY_TIMEOUT'], cache_mb=config['SQLITE_CACHE_MB'],
+                        mmap_mb=config['SQLITE_MMAP_MB'])
+
+        def open_connection():
+            if config['SQLITE_CREATE_SCHEMA'] and not self._schema_ready:
+                with self._schema_lock:
+                    if not self._schema_ready:
+                        create_schema(path)
+                        self._schema_ready = True
+            return connect(path, **settings)
+        return open_connection
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+
+from flask import Response, current_app, stream_with_context
+
+
+# Streaming export formats (?format=) and their content types.
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+STREAM_BATCH_SIZE = 1000  # rows pulled from the server-side cursor per chunk
+
+
+def _ndjson_chunk(names, rows, formatters):
+    lines = []
+    for row in rows:
+        item = {name: (formatters[name](value) if name in formatters else value)
+                for name, value in zip(names, row)}
+        lines.append(json.dumps(item, default=str))
+    return '\n'.join(lines) + '\n'
+
+
+def _csv_chunk(names, rows, formatters):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([formatters[name](value) if name in formatters else value
+                         for name, value in zip(names, row)])
+    return buffer.getvalue()
+
+
+# Stream the rows of an executed server-side cursor (MySQLdb SSCursor) as
+# NDJSON or CSV. Rows are pulled and encoded a batch at a time, so memory
+# stays flat however big the result is and the first chunk goes out as soon
+# as the first batch arrives. The response has no Content-Length and is sent
+# with chunked transfer encoding. The cursor is closed when the stream ends
+# or the client goes away.
+def stream_rows(cursor, names, fmt, formatters=None, filename=None):
+    formatters = formatters or {}
+    encode = _csv_chunk if fmt == 'csv' else _ndjson_chunk
+
+    def generate():
+        try:
+            if fmt == 'csv':
+                yield _csv_chunk(names, [names], {})
+            while True:
+                rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                yield encode(names, rows, formatters)
+        except Exception as e:
+            # Headers are already sent; all we can do is log and cut the stream short.
+            current_app.logger.error(f"Error while streaming {filename or 'export'}: {e}")
+        finally:
+            cursor.close()
+
+    headers = {'X-Accel-Buffering': 'no'}  # don't let a reverse proxy buffer the stream
+    if filename:
+        headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt], headers=headers)
@@ -0,0 +1,199 @@
+import threading
+import time
+
+# pandas is imported inside the methods that use it, so importing this module
+# (for IMPORT_MODES, import_totals, ...) doesn't load it into every worker.
+
+
+REQUIRED_COLUMNS = ['id', 'name', 'class', 'email', 'phone']
+TEXT_COLUMNS = ['name', 'class', 'email', 'phone']
+MAX_LENGTHS = {'name': 50, 'class': 50, 'email': 100, 'phone': 15}  # from database_schema.sql
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+IMPORT_MODES = ('skip', 'upsert')
+
+INSERT_SQL = {
+    # Existing students are left alone (the key check makes this race-safe).
+    'skip': """
+        INSERT INTO student (id, name, class, email, phone)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE id = id
+    """,
+    # Existing students get the roster's name/class/email/phone.
+    'upsert': """
+        INSERT INTO student (id, name, class, email, phone)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE name = VALUES(name), class = VALUES(class),
+                                email = VALUES(email), phone = VALUES(phone)
+    """,
+}
+
+# Process-wide totals across imports, for monitoring.
+_totals = {'imports': 0, 'rows': 0, 'rows_written': 0, 'rows_rejected': 0, 'seconds': 0.0}
+_totals_lock = threading.Lock()
+
+
+def import_totals():
+    with _totals_lock:
+        totals = dict(_totals)
+    totals['rows_per_second'] = totals['rows'] / totals['seconds'] if totals['seconds'] else 0.0
+    return totals
+
+
+def _text(series):
+    # Spreadsheet cells come back as str, int or float (phone numbers are
+    # often read as 9876543210.0); normalise to stripped strings or NA.
+    text = series.astype('string').str.strip()
+    text = text.str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+    return text.mask(text == '')
+
+
+def _flag(mask):
+    return mask.fillna(False).astype(bool)
+
+
+# Validates roster rows with whole-column pandas operations and writes the
+# valid ones in chunks: per chunk, one SELECT finds existing ids/emails and
+# one multi-row INSERT ... ON DUPLICATE KEY writes the rest, followed by a
+# commit, so no transaction stays open for the whole file. feed() can be
+# called repeatedly with consecutive pieces of one file; the index of each
+# frame is the spreadsheet row number used in the error report.
+class StudentImporter:
+    def __init__(self, conn, mode='skip', chunk_size=1000, max_errors=1000):
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(IMPORT_MODES)}.")
+        self.conn = conn
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.skipped = 0
+        self.error_count = 0
+        self.errors = []
+        self._seen_ids = set()
+        self._seen_emails = set()
+        self._elapsed = 0.0
+
+    def feed(self, df):
+        start = time.perf_counter()
+        try:
+            valid = self._validate(df)
+            for offset in range(0, len(valid), self.chunk_size):
+                self._write(valid.iloc[offset:offset + self.chunk_size])
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def result(self):
+        rows_per_second = self.rows / self._elapsed if self._elapsed else 0.0
+        with _totals_lock:
+            _totals['imports'] += 1
+            _totals['rows'] += self.rows
+            _totals['rows_written'] += self.inserted + self.updated
+            _totals['rows_rejected'] += self.error_count
+            _totals['seconds'] += self._elapsed
+        return {
+            'rows_total': self.rows,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors),
+            'elapsed_seconds': round(self._elapsed, 3),
+            'rows_per_second': round(rows_per_second, 1),
+        }
+
+    def _reject(self, rows, ids, messages):
+        self.error_count += len(rows)
+        room = self.max_errors - len(self.errors)
+        for row, student_id, message in list(zip(rows, ids, messages))[:max(room, 0)]:
+            self.errors.append({'row': int(row), 'id': student_id, 'errors': message})
+
+    def _validate(self, df):
+        import pandas as pd
+
+        self.rows += len(df)
+        text = pd.DataFrame({col: _text(df[col]) for col in TEXT_COLUMNS}, index=df.index)
+        raw_ids = _text(df['id'])
+        numeric_ids = pd.to_numeric(raw_ids, errors='coerce')
+        checks = [(_flag(raw_ids.isna()), 'id is missing'),
+                  (_flag(raw_ids.notna() & ~(numeric_ids.notna() & (numeric_ids % 1 == 0) & (numeric_ids > 0))),
+                   'id must be a positive integer')]
+        for col in TEXT_COLUMNS:
+            checks.append((_flag(text[col].isna()), f'{col} is missing'))
+            checks.append((_flag(text[col].str.len() > MAX_LENGTHS[col]),
+                           f'{col} is longer than {MAX_LENGTHS[col]} characters'))
+        checks.append((_flag(text['email'].notna() & ~_flag(text['email'].str.match(EMAIL_PATTERN))),
+                       'email is not a valid email address'))
+        bad = pd.Series(False, index=df.index)
+        for mask, _ in checks:
+            bad |= mask
+
+        # Duplicates are only checked between otherwise valid rows, so a
+        # broken row doesn't shadow a later good one with the same id. Emails
+        # compare case-insensitively, like the unique key on student.email.
+        good = ~bad
+        ids = numeric_ids.where(good).astype('Int64')
+        email_keys = text['email'].str.lower().where(good)
+        dup_id = good & _flag(ids.duplicated() | ids.isin(self._seen_ids))
+        dup_email = good & _flag(email_keys.duplicated() | email_keys.isin(self._seen_emails))
+        checks.append((dup_id, 'duplicate id in file'))
+        checks.append((dup_email, 'duplicate email in file'))
+        bad |= dup_id | dup_email
+
+        if bad.any():
+            failed = [[message for mask, message in checks if mask[row]]
+                      for row in df.index[bad]]
+            report_ids = [int(n) if pd.notna(n) and n % 1 == 0 else (None if pd.isna(r) else r)
+                          for r, n in zip(raw_ids[bad].tolist(), numeric_ids[bad].tolist())]
+            self._reject(df.index[bad], report_ids, failed)
+
+        valid = text[~bad].copy()
+        valid.insert(0, 'id', ids[~bad].astype('int64'))
+        valid['email_key'] = email_keys[~bad]
+        self._seen_ids.update(valid['id'].tolist())
+        self._seen_emails.update(valid['email_key'].tolist())
+        return valid
+
+    def _write(self, chunk):
+        import pandas as pd
+
+        if chunk.empty:
+            return
+        ids = chunk['id'].tolist()
+        emails = chunk['email'].tolist()
+        cur = self.conn.cursor()
+        try:
+            cur.execute(f"""
+                SELECT id, email FROM student
+                WHERE id IN ({', '.join(['%s'] * len(ids))}) OR email IN ({', '.join(['%s'] * len(emails))})
+            """, ids + emails)
+            existing = cur.fetchall()
+            existing_ids = {row[0] for row in existing}
+            email_owner = chunk['email_key'].map({row[1].lower(): row[0] for row in existing})
+
+            exists = chunk['id'].isin(existing_ids)
+            # An email already held by another student would trip the unique key.
+            conflict = email_owner.notna() & (email_owner != chunk['id'])
+            if self.mode == 'skip':
+                skip = exists
+                conflict &= ~exists
+            else:
+                skip = pd.Series(False, index=chunk.index)
+            if conflict.any():
+                rejected = chunk[conflict]
+                self._reject(rejected.index, rejected['id'].tolist(),
+                             [[f'email already belongs to student {int(owner)}'] for owner in email_owner[conflict]])
+            write = ~skip & ~conflict
+            rows = chunk.loc[write, REQUIRED_COLUMNS]
+            if not rows.empty:
+                # astype(object) hands the driver plain Python ints/strs, not numpy scalars
+                cur.executemany(INSERT_SQL[self.mode], list(rows.astype(object).itertuples(index=False, name=None)))
+            self.conn.commit()
+        finally:
+            cur.close()
+        self.skipped += int(skip.sum())
+        self.inserted += int((write & ~exists).sum())
+        self.updated += int((write & exists).sum())
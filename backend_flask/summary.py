@@ -0,0 +1,110 @@
+# attendance_summary keeps PRESENT/ABSENT counts per (student, session
+# class), so a student's totals are a primary-key lookup instead of a scan of
+# their whole history. Every write to `attendance` updates it in the same
+# transaction:
+#
+#   mark_attendance / batch writer   add_to_summary() for the rows inserted
+#   finalize_sessions()              FINALIZE_SUMMARY_SQL before its insert
+#   deleting attendance or sessions  subtract_*() before the DELETE
+#   deleting a student               ON DELETE CASCADE
+#
+# migrations/003_attendance_summary.sql backfills (and can re-sync) it.
+
+UPSERT_SUMMARY = """
+    INSERT INTO attendance_summary (student_id, class, present_count, absent_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE present_count = present_count + VALUES(present_count),
+                            absent_count = absent_count + VALUES(absent_count)
+"""
+
+# Counts of the ABSENT rows finalize is about to insert; run while the
+# sessions are locked FOR UPDATE so no scan can slip in between the two.
+FINALIZE_SUMMARY_SQL = """
+    INSERT INTO attendance_summary (student_id, class, present_count, absent_count)
+    SELECT st.id, se.class, 0, COUNT(*)
+    FROM session se
+    JOIN student st ON st.class = se.class
+    LEFT JOIN attendance a ON a.student_id = st.id AND a.session_id = se.id
+    WHERE se.id IN ({placeholders}) AND a.id IS NULL
+    GROUP BY st.id, se.class
+    ON DUPLICATE KEY UPDATE absent_count = absent_count + VALUES(absent_count)
+"""
+
+_SUBTRACT_SQL = """
+    UPDATE attendance_summary sm
+    JOIN (
+        SELECT a.student_id, s.class,
+               SUM(a.status = 'PRESENT') AS present, SUM(a.status = 'ABSENT') AS absent
+        FROM attendance a
+        JOIN session s ON s.id = a.session_id
+        WHERE {where}
+        GROUP BY a.student_id, s.class
+    ) d ON d.student_id = sm.student_id AND d.class = sm.class
+    SET sm.present_count = sm.present_count - d.present,
+        sm.absent_count = sm.absent_count - d.absent
+"""
+
+# SQLite (sqlite_store.py) has no UPDATE ... JOIN; UPDATE ... FROM does the same.
+_SUBTRACT_SQL_SQLITE = """
+    UPDATE attendance_summary AS sm
+    SET present_count = sm.present_count - d.present,
+        absent_count = sm.absent_count - d.absent
+    FROM (
+        SELECT a.student_id, s.class,
+               SUM(a.status = 'PRESENT') AS present, SUM(a.status = 'ABSENT') AS absent
+        FROM attendance a
+        JOIN session s ON s.id = a.session_id
+        WHERE {where}
+        GROUP BY a.student_id, s.class
+    ) AS d
+    WHERE d.student_id = sm.student_id AND d.class = sm.class
+"""
+
+
+def _subtract(cur, where, params):
+    sql = _SUBTRACT_SQL_SQLITE if getattr(cur, 'dialect', 'mysql') == 'sqlite' else _SUBTRACT_SQL
+    cur.execute(sql.format(where=where), params)
+
+
+# rows: (student_id, class_name, status) of newly inserted attendance rows.
+def add_to_summary(cur, rows):
+    totals = {}
+    for student_id, class_name, status in rows:
+        present, absent = totals.get((student_id, class_name), (0, 0))
+        if status == 'PRESENT':
+            present += 1
+        elif status == 'ABSENT':
+            absent += 1
+        totals[(student_id, class_name)] = (present, absent)
+    if totals:
+        # Sorted so concurrent writers lock summary rows in the same order
+        cur.executemany(UPSERT_SUMMARY, [key + value for key, value in sorted(totals.items())])
+
+
+# Take a session's attendance out of the summary; call before deleting it
+# (or the session). The session row is locked so no scan lands in between.
+def subtract_session(cur, session_id):
+    cur.execute("SELECT id FROM session WHERE id = %s FOR UPDATE", (session_id,))
+    _subtract(cur, 'a.session_id = %s', (session_id,))
+
+
+# Same for every session created by a user (deleting a teacher cascades).
+def subtract_sessions_created_by(cur, user_id):
+    cur.execute("SELECT id FROM session WHERE created_by = %s FOR UPDATE", (user_id,))
+    _subtract(cur, 's.created_by = %s', (user_id,))
+
+
+# All of a student's attendance is being deleted.
+def clear_student(cur, student_id):
+    cur.execute("DELETE FROM attendance_summary WHERE student_id = %s", (student_id,))
+
+
+# [(class, present_count, absent_count)] for a student.
+def student_summary(cur, student_id):
+    cur.execute("""
+        SELECT class, present_count, absent_count
+        FROM attendance_summary
+        WHERE student_id = %s
+        ORDER BY class
+    """, (student_id,))
+    return cur.fetchall()
@@ -0,0 +1,108 @@
+# Route tests, each against a fresh database: an SQLite file by default, or
+# a scratch MySQL/MariaDB database with TEST_STORAGE_BACKEND=mysql (settings
+# from MYSQL_HOST/MYSQL_PORT/MYSQL_USER/MYSQL_PASSWORD; TEST_MYSQL_DB, default
+# attendance_test, is dropped and recreated for every test).
+#
+#   python -m pytest tests
+#   TEST_STORAGE_BACKEND=mysql MYSQL_PASSWORD=... python -m pytest tests
+#
+# Only the SQLite run is exercised regularly; nothing runs the MySQL one
+# automatically, so treat it as unverified until it has been run by hand
+# against a server.
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from benchmarks.suite import datagen  # noqa: E402
+
+BACKEND = os.environ.get('TEST_STORAGE_BACKEND', 'sqlite')
+
+
+@pytest.fixture
+def app(tmp_path):
+    db = SimpleNamespace(
+        backend=BACKEND,
+        sqlite_path=str(tmp_path / 'attendance.db'),
+        host=os.environ.get('MYSQL_HOST', '127.0.0.1'),
+        port=int(os.environ.get('MYSQL_PORT', 3306)),
+        user=os.environ.get('MYSQL_USER', 'root'),
+        password=os.environ.get('MYSQL_PASSWORD', ''),
+        database=os.environ.get('TEST_MYSQL_DB', 'attendance_test'),
+    )
+    datagen.recreate_database(db).close()
+    app = create_app({
+        'TESTING': True,
+        'STORAGE_BACKEND': BACKEND,
+        'SQLITE_PATH': db.sqlite_path,
+        'MYSQL_HOST': db.host,
+        'MYSQL_PORT': db.port,
+        'MYSQL_USER': db.user,
+        'MYSQL_PASSWORD': db.password,
+        'MYSQL_DB': db.database,
+        'START_BACKGROUND_TASKS': False,
+        'FINALIZE_SCHEDULER': False,
+        'QR_TOKEN_SECRET': 'test-secret',
+        'METRICS_ENABLED': True,
+    })
+
+    # Queries run by each request, from the metrics' per-request stats. This
+    # teardown is registered after the metrics' own, so it runs before it.
+    app.query_counts = []
+
+    @app.teardown_request
+    def record_queries(exception):
+        stats = g.get('request_metrics')
+        if stats is not None:
+            app.query_counts.append(stats.queries)
+
+    yield app
+    mysql = app.extensions['attendance'].mysql
+    if mysql.pool is not None:
+        mysql.pool.close_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# Creates users, students and sessions through the API.
+class Seed:
+    def __init__(self, client):
+        self.client = client
+        self.users = 0
+
+    def user(self, role='TEACHER'):
+        self.users += 1
+        response = self.client.post('/register_user', json={
+            'name': f'User {self.users}', 'email': f'user{self.users}@example.com', 'phone': '9000000000',
+            'password': 'secret', 'role': role})
+        assert response.status_code == 201, response.json
+        return response.json['user_id']
+
+    def students(self, request_id, class_name, ids):
+        for student_id in ids:
+            response = self.client.post('/add_student', json={
+                'request_id': request_id, 'id': student_id, 'name': f'Student {student_id}', 'class': class_name,
+                'email': f'student{student_id}@example.com', 'phone': '9100000000'})
+            assert response.status_code == 201, response.json
+
+    def session(self, created_by, class_name, expiry_time=None):
+        expiry_time = expiry_time or datetime.now() + timedelta(hours=1)
+        response = self.client.post('/add_session', json={
+            'session_name': f'{class_name} lecture', 'expiry_time': expiry_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'created_by': created_by, 'class': class_name})
+        assert response.status_code == 201, response.json
+        return response.json['session_id']
+
+
+@pytest.fixture
+def seed(client):
+    return Seed(client)
@@ -0,0 +1,44 @@
+# The list and report endpoints must fetch their rows in a fixed number of
+# queries, however many rows there are (no query per row, the N+1 pattern).
+N = 5
+
+
+def test_get_sessions_query_count_is_constant(app, client, seed):
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1])
+    for _ in range(N):
+        seed.session(teacher, 'CSE-A')
+
+    def queries():
+        del app.query_counts[:]
+        response = client.get(f'/get_sessions?id={teacher}')
+        assert response.status_code == 200
+        return len(response.json['sessions']), app.query_counts[-1]
+
+    rows, small = queries()
+    assert rows == N
+    for _ in range(9 * N):
+        seed.session(teacher, 'CSE-A')
+    rows, large = queries()
+    assert rows == 10 * N
+    assert small > 0
+    assert large == small
+
+
+def test_get_session_attendance_query_count_is_constant(app, client, seed):
+    teacher = seed.user()
+    seed.students(teacher, 'SMALL', range(1, N + 1))
+    seed.students(teacher, 'LARGE', range(100, 100 + 10 * N))
+    counts = {}
+    for class_name, size in (('SMALL', N), ('LARGE', 10 * N)):
+        session_id = seed.session(teacher, class_name)
+        response = client.post('/finalize_attendance', json={'session_id': session_id})
+        assert response.json['absent_count'] == size
+
+        del app.query_counts[:]
+        response = client.get(f'/get_session_attendance?session_id={session_id}&request_id={teacher}')
+        assert response.status_code == 200
+        assert response.json['record_count'] == size
+        counts[class_name] = app.query_counts[-1]
+    assert counts['SMALL'] > 0
+    assert counts['LARGE'] == counts['SMALL']
@@ -0,0 +1,152 @@
+# Request-level tests of the main flows. They go through the storage backend
+# chosen in conftest.py, so the same tests can check SQLite and MySQL (the
+# MySQL run is manual, see conftest.py).
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import ALLOWED_LOCATION, create_app
+
+INSIDE = {'latitude': ALLOWED_LOCATION[0], 'longitude': ALLOWED_LOCATION[1]}
+OUTSIDE = {'latitude': ALLOWED_LOCATION[0] + 1, 'longitude': ALLOWED_LOCATION[1]}
+
+
+def qr_token(client, session_id, requesting_user_id):
+    response = client.post('/generate_qr', json={'session_id': session_id, 'requesting_user_id': requesting_user_id})
+    assert response.status_code == 200, response.json
+    return response.json['token']
+
+
+def test_register_and_login(client, seed):
+    seed.user('ADMIN')
+    response = client.post('/register_user', json={
+        'name': 'Again', 'email': 'user1@example.com', 'phone': '1', 'password': 'x', 'role': 'TEACHER'})
+    assert response.status_code == 400
+    response = client.post('/register_user', json={
+        'name': 'Bad', 'email': 'bad@example.com', 'phone': '1', 'password': 'x', 'role': 'JANITOR'})
+    assert response.status_code == 400
+
+    response = client.post('/login_user', json={'email': 'user1@example.com', 'password': 'secret'})
+    assert response.status_code == 200
+    assert response.json['role'] == 'ADMIN'
+    response = client.post('/login_user', json={'email': 'user1@example.com', 'password': 'wrong'})
+    assert response.status_code == 401
+
+
+def test_add_student_rejects_duplicates_and_unknown_users(client, seed):
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1])
+    student = {'id': 1, 'name': 'Student 1', 'class': 'CSE-A', 'email': 'other@example.com', 'phone': '1'}
+    response = client.post('/add_student', json={'request_id': teacher, **student})
+    assert response.status_code == 409
+    response = client.post('/add_student', json={'request_id': teacher + 100, **student, 'id': 2})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('batch_writes', [False, True])
+def test_mark_attendance(app, client, seed, batch_writes):
+    app.config['ATTENDANCE_BATCH_WRITES'] = batch_writes
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1, 2])
+    session_id = seed.session(teacher, 'CSE-A')
+    token = qr_token(client, session_id, teacher)
+
+    response = client.post('/mark_attendance', json={'student_id': 1, 'session_id': session_id, 'token': token, **INSIDE})
+    assert response.status_code == 200
+    assert response.json['status'] == 'PRESENT'
+    response = client.post('/mark_attendance', json={'student_id': 1, 'session_id': session_id, 'token': token, **INSIDE})
+    assert response.status_code == 409
+    response = client.post('/mark_attendance', json={'student_id': 2, 'session_id': session_id, 'token': token, **OUTSIDE})
+    assert response.json['status'] == 'ABSENT'
+    response = client.post('/mark_attendance', json={'student_id': 99, 'session_id': session_id, 'token': token, **INSIDE})
+    assert response.status_code == 400
+
+    response = client.get('/attendance_report?student_id=1')
+    assert (response.json['present_count'], response.json['absent_count']) == (1, 0)
+    response = client.get('/attendance_report?student_id=2')
+    assert (response.json['present_count'], response.json['absent_count']) == (0, 1)
+
+
+def test_mark_attendance_checks_the_qr_token(app, client, seed):
+    assert app.config['QR_TOKEN_REQUIRED']
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1])
+    session_id = seed.session(teacher, 'CSE-A')
+    other_session_id = seed.session(teacher, 'CSE-A')
+
+    response = client.post('/mark_attendance', json={'student_id': 1, 'session_id': session_id, **INSIDE})
+    assert response.status_code == 403
+    token = qr_token(client, other_session_id, teacher)
+    response = client.post('/mark_attendance', json={'student_id': 1, 'session_id': session_id, 'token': token, **INSIDE})
+    assert response.status_code == 403
+    assert response.json['status'] == 'invalid_token'
+    token = qr_token(client, session_id, teacher)
+    response = client.post('/mark_attendance', json={'student_id': 1, 'session_id': session_id, 'token': token, **INSIDE})
+    assert response.status_code == 200
+
+
+def test_token_checks_need_a_shared_secret(app):
+    config = {'STORAGE_BACKEND': 'sqlite', 'SQLITE_PATH': app.config['SQLITE_PATH'], 'START_BACKGROUND_TASKS': False,
+              'FINALIZE_SCHEDULER': False, 'QR_TOKEN_SECRET': None}
+    with pytest.raises(RuntimeError):
+        create_app({**config, 'QR_TOKEN_REQUIRED': True})
+    assert not create_app({**config, 'QR_TOKEN_REQUIRED': False}).config['QR_TOKEN_REQUIRED']
+
+
+def test_finalize_marks_the_rest_absent(client, seed):
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1, 2, 3])
+    session_id = seed.session(teacher, 'CSE-A', datetime.now() - timedelta(minutes=1))
+    response = client.post('/roll_call', json={'session_id': session_id, 'requesting_user_id': teacher,
+                                               'records': [{'student_id': 1}, {'student_id': 1}, {'student_id': 7}]})
+    assert response.status_code == 200
+    assert [r['result'] for r in response.json['results']] == ['recorded', 'duplicate', 'not_in_class']
+
+    response = client.post('/finalize_attendance', json={'session_id': session_id})
+    assert response.status_code == 200
+    assert response.json['absent_count'] == 2
+    response = client.post('/finalize_attendance', json={'session_id': session_id})
+    assert response.json['absent_count'] == 0
+
+    response = client.get(f'/get_session_attendance?session_id={session_id}&request_id={teacher}&format=csv')
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 4  # header and one row per student
+
+    response = client.get(f'/class_analytics?request_id={teacher}&class=CSE-A')
+    assert response.status_code == 200, response.json
+    assert response.json['attendance_percentage'] == 33.33
+    assert [student['id'] for student in response.json['at_risk']] == [2, 3]
+
+    # Deleting the session's attendance takes it out of the totals too
+    response = client.delete('/delete_attendance_by_session', json={'id': session_id, 'request_id': teacher})
+    assert response.status_code == 200
+    response = client.get('/attendance_report?student_id=1')
+    assert response.json['total_session'] == 0
+    assert response.json['records'] == []
+
+
+def test_metrics_require_the_token(app, client):
+    response = client.get('/metrics')
+    assert response.status_code == 404
+    app.config['METRICS_TOKEN'] = 'scrape'
+    response = client.get('/metrics', headers={'Authorization': 'Bearer wrong'})
+    assert response.status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape'})
+    assert response.status_code == 200
+
+
+def test_import_students_upserts(client, seed):
+    pytest.importorskip('pandas')
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1])
+    roster = (b'id,name,class,email,phone\n'
+              b'1,Renamed,CSE-B,student1@example.com,1\n'
+              b'2,New,CSE-B,student2@example.com,2\n')
+    response = client.post('/import_students', data={'request_id': str(teacher), 'mode': 'upsert',
+                                                     'file': (io.BytesIO(roster), 'roster.csv')})
+    assert response.status_code == 201, response.json
+    assert (response.json['inserted'], response.json['updated']) == (1, 1)
+    response = client.get(f'/get_student_by_class?class_name=CSE-B&request_id={teacher}')
+    assert [student['name'] for student in response.json['students']] == ['Renamed', 'New']
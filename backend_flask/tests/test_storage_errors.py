@@ -0,0 +1,55 @@
+# The routes tell constraint failures apart by MySQL error code, so the
+# SQLite backend must report the same codes (and only a UNIQUE or PRIMARY KEY
+# failure as a duplicate entry).
+from datetime import datetime
+
+import MySQLdb
+import pytest
+
+from attendance_writer import INSERT_ATTENDANCE
+from conftest import BACKEND
+from sqlite_store import ER_BAD_NULL_ERROR, ER_CHECK_CONSTRAINT_VIOLATED, ER_DUP_ENTRY, ER_NO_REFERENCED_ROW
+
+INSERT_USER = "INSERT INTO user (name, email, phone, password, role) VALUES (%s, %s, %s, %s, %s)"
+
+
+def error_code(app, query, params):
+    with app.app_context():
+        mysql = app.extensions['attendance'].mysql
+        cur = mysql.connection.cursor()
+        try:
+            with pytest.raises(MySQLdb.IntegrityError) as info:
+                cur.execute(query, params)
+        finally:
+            cur.close()
+            mysql.connection.rollback()
+    return info.value.args[0]
+
+
+@pytest.mark.parametrize('query, params, code', [
+    (INSERT_USER, ('Copy', 'user1@example.com', '1', 'x', 'TEACHER'), ER_DUP_ENTRY),
+    ("INSERT INTO attendance_summary (student_id, class) VALUES (%s, %s)", (1, 'CSE-A'), ER_DUP_ENTRY),
+    ("INSERT INTO attendance (student_id, session_id, status) VALUES (%s, %s, %s)", (99, 1, 'PRESENT'),
+     ER_NO_REFERENCED_ROW),
+    (INSERT_USER, ('Nobody', 'nobody@example.com', None, 'x', 'TEACHER'), ER_BAD_NULL_ERROR),
+    # The duplicate-key clause must only absorb a duplicate (student, session)
+    (INSERT_ATTENDANCE, (1, 1, None, datetime.now()), ER_BAD_NULL_ERROR),
+    (INSERT_ATTENDANCE, (99, 1, 'PRESENT', datetime.now()), ER_NO_REFERENCED_ROW),
+])
+def test_constraint_error_codes(app, seed, query, params, code):
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1])
+    seed.session(teacher, 'CSE-A')
+    with app.app_context():
+        mysql = app.extensions['attendance'].mysql
+        cur = mysql.connection.cursor()
+        cur.execute("INSERT INTO attendance_summary (student_id, class) VALUES (%s, %s)", (1, 'CSE-A'))
+        mysql.connection.commit()
+        cur.close()
+    assert error_code(app, query, params) == code
+
+
+@pytest.mark.skipif(BACKEND != 'sqlite', reason='MySQL rejects the role with its ENUM type')
+def test_check_failure_is_not_a_duplicate(app):
+    code = error_code(app, INSERT_USER, ('Bad', 'bad@example.com', '1', 'x', 'JANITOR'))
+    assert code == ER_CHECK_CONSTRAINT_VIOLATED
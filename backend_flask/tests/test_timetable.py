@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+WEEKDAYS = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
+
+
+# A daily lecture from `start` to `end` days from now, expiring at `at`
+def rule(start, end, at):
+    today = at.date()
+    return {'class': 'CSE-A', 'session_name': 'Maths', 'weekdays': WEEKDAYS,
+            'expiry_time': at.strftime('%H:%M:%S'),
+            'start_date': (today + timedelta(days=start)).isoformat(),
+            'end_date': (today + timedelta(days=end)).isoformat()}
+
+
+def test_add_timetable_leaves_out_past_dates(app, client, seed):
+    app.config['FINALIZE_SCHEDULER'] = True
+    scheduled = []
+    app.extensions['attendance'].finalize_scheduler.schedule_many = scheduled.extend
+    teacher = seed.user()
+    seed.students(teacher, 'CSE-A', [1])
+    # An hour from now, so today's lecture is still ahead whatever the time
+    # of day; the 30 days before it are over
+    at = datetime.now() + timedelta(hours=1)
+
+    response = client.post('/add_timetable', json={'created_by': teacher, 'rules': [rule(-30, 9, at)]})
+    assert response.status_code == 201, response.json
+    assert response.json['session_count'] == 10
+    assert response.json['skipped_past'] == 30
+    now = datetime.now()
+    assert all(datetime.fromisoformat(s['expiry_time']) > now for s in response.json['sessions'])
+    assert len(scheduled) == 10
+    assert all(expiry_time > now for _, expiry_time in scheduled)
+
+    response = client.get('/attendance_report?student_id=1')
+    assert response.json['total_session'] == 0
+
+
+def test_add_timetable_rejects_a_term_in_the_past(client, seed):
+    teacher = seed.user()
+    at = datetime.now() + timedelta(hours=1)
+    response = client.post('/add_timetable', json={'created_by': teacher, 'rules': [rule(-30, -1, at)]})
+    assert response.status_code == 400
+    response = client.get(f'/get_sessions?id={teacher}')
+    assert response.json.get('sessions', []) == []
+
+
+def test_add_timetable_caps_the_rule_count(app, client, seed):
+    teacher = seed.user()
+    at = datetime.now() + timedelta(hours=1)
+    rules = [rule(0, 0, at)] * (app.config['TIMETABLE_MAX_RULES'] + 1)
+    response = client.post('/add_timetable', json={'created_by': teacher, 'rules': rules})
+    assert response.status_code == 400
+    response = client.post('/add_timetable', json={'created_by': teacher, 'rules': rules[1:]})
+    assert response.status_code == 201
@@ -0,0 +1,99 @@
+# Recurring sessions for /add_timetable: each rule describes one lecture slot
+# of a class over a date range, and is expanded here into one session per
+# matching day.
+#
+#   {"class": "CSE-A", "session_name": "Maths", "weekdays": ["MON", "WED"],
+#    "expiry_time": "10:50:00", "start_date": "2026-08-03", "end_date": "2026-12-11",
+#    "every_weeks": 1, "skip_dates": ["2026-10-02"]}
+#
+# weekdays are names (MON..SUN) or numbers (0 = Monday); every_weeks counts
+# from the week of start_date. Bad input raises ValueError with a message for
+# the client.
+import uuid
+from datetime import date, datetime, time, timedelta
+
+
+WEEKDAYS = ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
+MAX_RULE_DAYS = 731  # a rule covers a term or an academic year, not decades
+
+INSERT_SESSION = """
+    INSERT INTO session (session_name, session_code, expiry_time, created_by, class)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+# Random, so codes can't collide however many sessions are created at once
+# (session_code is UNIQUE; 40 of its 50 characters).
+def new_session_code():
+    return f"SESSION_{uuid.uuid4().hex.upper()}"
+
+
+def _date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD).")
+
+
+def _weekday(value):
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 6:
+        return value
+    if isinstance(value, str) and value[:3].upper() in WEEKDAYS:
+        return WEEKDAYS.index(value[:3].upper())
+    raise ValueError(f"Invalid weekday {value!r}; use MON..SUN or 0 (Monday)..6.")
+
+
+# [(session_name, class, expiry_time)] for one rule, in date order.
+def expand_rule(rule):
+    if not isinstance(rule, dict):
+        raise ValueError("Each rule must be an object.")
+    missing = [key for key in ('class', 'session_name', 'weekdays', 'expiry_time', 'start_date', 'end_date')
+               if rule.get(key) is None]
+    if missing:
+        raise ValueError(f"Missing required fields in rule: {', '.join(missing)}")
+    weekdays = rule['weekdays']
+    if not isinstance(weekdays, list) or not weekdays:
+        raise ValueError("weekdays must be a non-empty list.")
+    weekdays = {_weekday(value) for value in weekdays}
+    try:
+        at = time.fromisoformat(rule['expiry_time'])
+    except (TypeError, ValueError):
+        raise ValueError("expiry_time must be a time of day (HH:MM or HH:MM:SS).")
+    start = _date(rule['start_date'], 'start_date')
+    end = _date(rule['end_date'], 'end_date')
+    if end < start:
+        raise ValueError("end_date is before start_date.")
+    if (end - start).days >= MAX_RULE_DAYS:
+        raise ValueError(f"A rule can span at most {MAX_RULE_DAYS} days.")
+    every_weeks = rule.get('every_weeks', 1)
+    if not isinstance(every_weeks, int) or isinstance(every_weeks, bool) or every_weeks < 1:
+        raise ValueError("every_weeks must be a positive integer.")
+    skip = {_date(value, 'skip_dates') for value in rule.get('skip_dates') or []}
+
+    first_monday = start - timedelta(days=start.weekday())
+    sessions = []
+    day = start
+    while day <= end:
+        if (day.weekday() in weekdays and day not in skip
+                and ((day - first_monday).days // 7) % every_weeks == 0):
+            sessions.append((rule['session_name'], rule['class'], datetime.combine(day, at)))
+        day += timedelta(days=1)
+    return sessions
+
+
+# Insert the sessions in chunks of multi-row inserts inside the caller's
+# transaction and return [(id, session_code)] in the same order. Ids are read
+# back by session_code, since a multi-row insert's auto-increment ids are not
+# guaranteed to be consecutive.
+def insert_sessions(cur, sessions, created_by, chunk_size=500):
+    ids = []
+    for offset in range(0, len(sessions), chunk_size):
+        chunk = sessions[offset:offset + chunk_size]
+        codes = [new_session_code() for _ in chunk]
+        cur.executemany(INSERT_SESSION, [(name, code, expiry_time, created_by, class_name)
+                                         for (name, class_name, expiry_time), code in zip(chunk, codes)])
+        placeholders = ', '.join(['%s'] * len(codes))
+        cur.execute(f"SELECT session_code, id FROM session WHERE session_code IN ({placeholders})", codes)
+        id_of = dict(cur.fetchall())
+        ids.extend((id_of[code], code) for code in codes)
+    return ids